@@ -4,8 +4,11 @@ import re
 import markdown
 import time
 import hashlib
-from datetime import datetime
-from io import StringIO
+import base64
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO, BytesIO
 from html.parser import HTMLParser
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Image, Spacer, ListFlowable, ListItem
@@ -17,7 +20,14 @@ from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import EXPORTS_DIR
+from config import EXPORTS_DIR, EXPORT_CACHE_ENTRIES, EXPORT_CACHE_MAX_BYTES, EXPORT_MEDIA_TYPES
+from utils.cache import MemoryCache
+from utils.markdown_ir import parse_markdown, plain_text, Heading, ListBlock, ImageBlock
+from utils.image_pipeline import ImagePipeline
+from utils.artifact_store import get_artifact_store
+
+# Widest print size of an embedded image (letter page minus 1 inch margins)
+DOCUMENT_IMAGE_WIDTH_INCHES = 6.5
 
 class MLStripper(HTMLParser):
     """HTML tag stripper for cleaning markdown-to-HTML conversions"""
@@ -46,6 +56,14 @@ class ExportAgent:
         # Initialize styles for each instance
         self.styles = getSampleStyleSheet()
         self._create_styles()  # Always create styles on initialization
+        # Rendered documents keyed by content hash, image set and format
+        self.document_cache = MemoryCache(max_entries=EXPORT_CACHE_ENTRIES, max_bytes=EXPORT_CACHE_MAX_BYTES)
+        # Charts are downsampled once and shared by every exporter
+        self.image_pipeline = ImagePipeline()
+        # Size-bounded manifest of the exports directory
+        self.artifacts = get_artifact_store("exports")
+        # Only charts this server rendered may be embedded
+        self.charts = get_artifact_store("charts")
 
     def _create_styles(self):
         """Create advanced styles with standard ReportLab fonts"""
@@ -127,139 +145,7 @@ class ExportAgent:
             str: Path to the generated PDF file
         """
         try:
-            # Create exports directory if it doesn't exist
-            os.makedirs(EXPORTS_DIR, exist_ok=True)
-            
-            # Generate a unique filename if not provided
-            if not filename:
-                # Extract title from content
-                title = self._extract_title_from_content(content)
-                # Create a timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                # Create a short hash of the content to ensure uniqueness
-                content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-                # Combine to create a unique filename
-                filename = f"{title}_{timestamp}_{content_hash}.pdf"
-                # Clean the filename to remove invalid characters
-                filename = re.sub(r'[\\/*?:"<>|]', "_", filename)
-                # Limit filename length
-                if len(filename) > 100:
-                    filename = filename[:90] + "_" + filename[-9:]
-            
-            filepath = os.path.join(EXPORTS_DIR, filename)
-            
-            # Define page size and margins
-            page_width, page_height = letter
-            margin = 72  # 1 inch margin in points
-            
-            doc = SimpleDocTemplate(filepath, pagesize=letter, 
-                                rightMargin=margin, leftMargin=margin,
-                                topMargin=margin, bottomMargin=margin)
-            
-            story = []
-            
-            # Title
-            story.append(Paragraph("Stock Analysis Report", self.styles['ReportTitle']))
-            story.append(Spacer(1, 0.3*inch))
-            
-            # Process content
-            # First, replace markdown formatting with HTML
-            # Replace bold text
-            content = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', content)
-            # Replace italic text
-            content = re.sub(r'\*(.*?)\*', r'<i>\1</i>', content)
-            
-            # Split content into paragraphs
-            paragraphs = content.split('\n\n')
-            
-            for para in paragraphs:
-                para = para.strip()
-                if not para:
-                    continue
-                
-                # Handle headings
-                if para.startswith('# '):
-                    heading_text = para[2:].strip()
-                    story.append(Paragraph(heading_text, self.styles['ReportHeading1']))
-                elif para.startswith('## '):
-                    heading_text = para[3:].strip()
-                    story.append(Paragraph(heading_text, self.styles['ReportHeading2']))
-                elif para.startswith('### '):
-                    heading_text = para[4:].strip()
-                    story.append(Paragraph(heading_text, self.styles['ReportHeading3']))
-                else:
-                    # Handle bullet lists
-                    if '\n* ' in para or para.startswith('* '):
-                        # Split into bullet points
-                        bullet_items = []
-                        for line in para.split('\n'):
-                            line = line.strip()
-                            if line.startswith('* '):
-                                bullet_text = line[2:].strip()
-                                bullet_items.append(Paragraph(bullet_text, self.styles['ReportBody']))
-                        
-                        if bullet_items:
-                            bullet_list = ListFlowable(
-                                bullet_items,
-                                bulletType='bullet',
-                                leftIndent=20,
-                                spaceBefore=10,
-                                spaceAfter=10
-                            )
-                            story.append(bullet_list)
-                    else:
-                        # Regular paragraph
-                        story.append(Paragraph(para, self.styles['ReportBody']))
-            
-            # Images with captions
-            if images:
-                story.append(Spacer(1, 0.2*inch))
-                story.append(Paragraph("Generated Charts", self.styles['ReportHeading2']))
-                
-                for i, img_path in enumerate(images):
-                    if os.path.exists(img_path):
-                        try:
-                            # Get image dimensions to calculate appropriate size
-                            from PIL import Image as PILImage
-                            with PILImage.open(img_path) as pil_img:
-                                img_width, img_height = pil_img.size
-                                
-                            # Calculate scaling factor to fit within page
-                            content_width = page_width - (2 * margin)
-                            width_ratio = content_width / img_width
-                            # Limit to 5 inches height at most to ensure it fits on page
-                            max_height = 5 * inch
-                            
-                            # Calculate actual dimensions to use
-                            pdf_img_width = min(content_width, img_width * width_ratio)
-                            pdf_img_height = min(max_height, img_height * width_ratio)
-                            
-                            story.append(Spacer(1, 0.2*inch))
-                            img = Image(img_path, width=pdf_img_width, height=pdf_img_height)
-                            story.append(img)
-                        except Exception as e:
-                            print(f"Error processing image {img_path}: {str(e)}")
-                            # Use a safe fixed size if any issues
-                            story.append(Spacer(1, 0.2*inch))
-                            img = Image(img_path, width=5*inch, height=3*inch)
-                            story.append(img)
-                        
-                        # Simple text caption without using HTML
-                        caption_text = f"Chart {i+1}: {os.path.basename(img_path).replace('_', ' ').replace('.png', '')}"
-                        story.append(Paragraph(caption_text, self.styles['ChartCaption']))
-            
-            # Add footer with page numbers
-            def add_page_number(canvas, doc):
-                canvas.saveState()
-                canvas.setFont('Helvetica', 9)
-                page_num_text = f"Page {doc.page}"
-                canvas.drawRightString(page_width - margin, margin/2, page_num_text)
-                canvas.restoreState()
-            
-            # Build the document with page numbers
-            doc.build(story, onFirstPage=add_page_number, onLaterPages=add_page_number)
-            return filepath
-            
+            return self._export_file(content, images, "pdf", filename)
         except Exception as e:
             import traceback
             print(f"PDF Export Error: {str(e)}")
@@ -278,95 +164,510 @@ class ExportAgent:
             str: Path to the generated Word file
         """
         try:
-            from docx import Document
-            from docx.shared import Inches
+            return self._export_file(content, images, "docx")
+        except Exception as e:
+            import traceback
+            print(f"Word Export Error: {str(e)}")
+            print(traceback.format_exc())
+            return f"Error generating Word document: {str(e)}"
+
+    def render_document(self, content, images=None, fmt="pdf", image_data=None):
+        """
+        Render a report into memory, reusing an identical earlier render
+        
+        Args:
+            content (str): Markdown content for the report
+            images (list): Paths to images to include
+            fmt (str): "pdf", "docx" or "html"
+            image_data (dict): Prepared images by path, already loaded (optional)
             
-            # Create exports directory if it doesn't exist
-            os.makedirs(EXPORTS_DIR, exist_ok=True)
+        Returns:
+            tuple: (document bytes, suggested filename)
+        """
+        if fmt not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unsupported format: {fmt}")
+        
+        key = self._cache_key(content, images, fmt)
+        filename = self._build_filename(content, key, fmt)
+        
+        data = self.document_cache.get(key)
+        if data is not None:
+            print(f"Export cache hit for {filename}")
+            return data, filename
+        
+        # Parsed once per content string, whatever number of formats it is exported to
+        blocks = parse_markdown(content)
+        if image_data is None:
+            image_data = self._load_images(content, images)
+        
+        if fmt == "pdf":
+            data = self._render_pdf(blocks, images, image_data)
+        elif fmt == "docx":
+            data = self._render_word(blocks, images, image_data)
+        else:
+            data = self._render_html(blocks, images, image_data)
+        self.document_cache.set(key, data, size=len(data))
+        return data, filename
+
+    def render_batch(self, content, images=None, formats=("pdf", "docx")):
+        """
+        Render a report to several formats in parallel from one parse and one image load
+        
+        Args:
+            content (str): Markdown content for the report
+            images (list): Paths to images to include
+            formats (list): Output formats
             
-            # Generate a unique filename
-            # Extract title from content
-            title = self._extract_title_from_content(content)
-            # Create a timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            # Create a short hash of the content to ensure uniqueness
-            content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-            # Combine to create a unique filename
-            filename = f"{title}_{timestamp}_{content_hash}.docx"
-            # Clean the filename to remove invalid characters
-            filename = re.sub(r'[\\/*?:"<>|]', "_", filename)
-            # Limit filename length
-            if len(filename) > 100:
-                filename = filename[:90] + "_" + filename[-9:]
+        Returns:
+            dict: Format to (document bytes, suggested filename)
+        """
+        formats = list(dict.fromkeys(fmt.lower() for fmt in formats))
+        unsupported = [fmt for fmt in formats if fmt not in EXPORT_MEDIA_TYPES]
+        if unsupported:
+            raise ValueError(f"Unsupported format: {', '.join(unsupported)}")
+        
+        # Shared by every format's render
+        parse_markdown(content)
+        image_data = self._load_images(content, images)
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(formats))) as pool:
+            futures = {fmt: pool.submit(self.render_document, content, images, fmt, image_data)
+                       for fmt in formats}
+            return {fmt: future.result() for fmt, future in futures.items()}
+
+    def export_batch(self, content, images=None, formats=("pdf", "docx")):
+        """
+        Export a report to several formats in the exports directory
+        
+        Args:
+            content (str): Markdown content for the report
+            images (list): Paths to images to include
+            formats (list): Output formats
+            
+        Returns:
+            dict: Format to path of the exported file
+        """
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
+        
+        paths = {}
+        pending = []
+        for fmt in dict.fromkeys(fmt.lower() for fmt in formats):
+            key = self._cache_key(content, images, fmt)
+            filepath = os.path.join(EXPORTS_DIR, self._build_filename(content, key, fmt))
+            if os.path.exists(filepath):
+                print(f"Reusing exported file {filepath}")
+                self.artifacts.touch(filepath)
+                paths[fmt] = filepath
+            else:
+                pending.append(fmt)
+        
+        if pending:
+            for fmt, (data, filename) in self.render_batch(content, images, pending).items():
+                paths[fmt] = self._write_file(os.path.join(EXPORTS_DIR, filename), data)
+        return paths
+
+    def _load_images(self, content, images):
+        """
+        Read and prepare every image a report references once
+        
+        Paths come from the client, so only charts in the charts directory that
+        the chart manifest knows are read; anything else is skipped.
+        
+        Args:
+            content (str): Markdown content (for inline images)
+            images (list): Chart image paths
+            
+        Returns:
+            dict: PreparedImage by path, for the known charts
+        """
+        paths = list(images or [])
+        paths.extend(block.path for block in parse_markdown(content) if isinstance(block, ImageBlock))
+        
+        image_data = {}
+        for img_path in dict.fromkeys(paths):
+            real_path = self.charts.resolve(img_path)
+            if real_path is None:
+                print(f"Skipping image outside the chart store: {img_path}")
+                continue
+            try:
+                with open(real_path, 'rb') as f:
+                    prepared = self.image_pipeline.prepare(f.read(), DOCUMENT_IMAGE_WIDTH_INCHES)
+            except OSError as e:
+                print(f"Error reading image {img_path}: {str(e)}")
+                continue
+            if prepared is not None:
+                image_data[img_path] = prepared
+        return image_data
+
+    def _write_file(self, filepath, data):
+        """
+        Atomically write a document
+        
+        Args:
+            filepath (str): Destination path
+            data (bytes): Document bytes
             
+        Returns:
+            str: The destination path
+        """
+        # Write to a temp file first so a concurrent download never sees a partial document
+        tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+        return self.artifacts.register(filepath)
+
+    def _export_file(self, content, images, fmt, filename=None):
+        """
+        Write a report to the exports directory, skipping the build when it already exists
+        
+        Args:
+            content (str): Markdown content for the report
+            images (list): Paths to images to include
+            fmt (str): "pdf" or "docx"
+            filename (str): Output filename (optional; generated names are content-addressed)
+            
+        Returns:
+            str: Path to the exported file
+        """
+        # Create exports directory if it doesn't exist
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
+        
+        if not filename:
+            key = self._cache_key(content, images, fmt)
+            filepath = os.path.join(EXPORTS_DIR, self._build_filename(content, key, fmt))
+            # Same content, images and format were exported before
+            if os.path.exists(filepath):
+                print(f"Reusing exported file {filepath}")
+                self.artifacts.touch(filepath)
+                return filepath
+        else:
             filepath = os.path.join(EXPORTS_DIR, filename)
+        
+        data, _ = self.render_document(content, images, fmt)
+        return self._write_file(filepath, data)
+
+    def _cache_key(self, content, images, fmt):
+        """
+        Hash the content, image set and format of an export
+        
+        Args:
+            content (str): Markdown content for the report
+            images (list): Paths to images to include
+            fmt (str): Output format
+            
+        Returns:
+            str: Hex digest identifying the export
+        """
+        digest = hashlib.sha256(f"{fmt}\0{content}".encode())
+        for img_path in images or []:
+            # Paths outside the chart store are never embedded, so they are not looked at either
+            real_path = self.charts.resolve(img_path)
+            if real_path is None:
+                continue
+            digest.update(f"\0{img_path}".encode())
+            try:
+                # Size and mtime catch a chart rewritten under the same name
+                stat = os.stat(real_path)
+                digest.update(f":{stat.st_size}:{stat.st_mtime_ns}".encode())
+            except OSError:
+                pass
+        return digest.hexdigest()
+
+    def _build_filename(self, content, key, fmt):
+        """
+        Build a content-addressed filename for an export
+        
+        Args:
+            content (str): Markdown content for the report
+            key (str): Digest from _cache_key
+            fmt (str): File extension
+            
+        Returns:
+            str: Sanitized filename
+        """
+        # Extract title from content
+        title = self._extract_title_from_content(content)
+        # The content hash makes the name unique and lets repeated exports find the existing file
+        filename = f"{title}_{key[:16]}.{fmt}"
+        # Clean the filename to remove invalid characters
+        filename = re.sub(r'[\\/*?:"<>|]', "_", filename)
+        # Limit filename length
+        if len(filename) > 100:
+            filename = filename[:80] + "_" + filename[-(len(fmt) + 18):]
+        return filename
+
+    def _render_pdf(self, blocks, images, image_data):
+        """
+        Build a PDF report in memory
+        
+        Args:
+            blocks (tuple): Parsed markdown blocks from parse_markdown
+            images (list): Paths to images to include
+            image_data (dict): PreparedImage by path
+            
+        Returns:
+            bytes: The PDF document
+        """
+        # Define page size and margins
+        page_width, page_height = letter
+        margin = 72  # 1 inch margin in points
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=letter, 
+                            rightMargin=margin, leftMargin=margin,
+                            topMargin=margin, bottomMargin=margin)
+
+        story = []
+
+        # Title
+        story.append(Paragraph("Stock Analysis Report", self.styles['ReportTitle']))
+        story.append(Spacer(1, 0.3*inch))
+
+        # Content blocks from the shared markdown IR
+        story.extend(self._pdf_flowables(blocks, page_width - (2 * margin), image_data))
+
+        # Images with captions
+        if images:
+            story.append(Spacer(1, 0.2*inch))
+            story.append(Paragraph("Generated Charts", self.styles['ReportHeading2']))
+
+            for i, img_path in enumerate(images):
+                if img_path in image_data:
+                    story.extend(self._pdf_image(image_data[img_path], img_path, page_width - (2 * margin)))
+
+                    # Simple text caption without using HTML
+                    caption_text = f"Chart {i+1}: {os.path.basename(img_path).replace('_', ' ').replace('.png', '')}"
+                    story.append(Paragraph(caption_text, self.styles['ChartCaption']))
+
+        # Add footer with page numbers
+        def add_page_number(canvas, doc):
+            canvas.saveState()
+            canvas.setFont('Helvetica', 9)
+            page_num_text = f"Page {doc.page}"
+            canvas.drawRightString(page_width - margin, margin/2, page_num_text)
+            canvas.restoreState()
+
+        # Build the document with page numbers
+        doc.build(story, onFirstPage=add_page_number, onLaterPages=add_page_number)
+        return buffer.getvalue()
+
+    def _render_word(self, blocks, images, image_data):
+        """
+        Build a Word report in memory
+        
+        Args:
+            blocks (tuple): Parsed markdown blocks from parse_markdown
+            images (list): Paths to images to include
+            image_data (dict): PreparedImage by path
             
-            doc = Document()
-            doc.add_heading('Stock Analysis Report', 0)
+        Returns:
+            bytes: The DOCX document
+        """
+        from docx import Document
+        from docx.shared import Inches
+        
+        doc = Document()
+        doc.add_heading('Stock Analysis Report', 0)
+
+        # Content blocks from the shared markdown IR
+        self._add_word_blocks(doc, blocks, image_data)
+
+        # Add images
+        if images:
+            doc.add_heading('Generated Charts', level=1)
+            for img_path in images:
+                if img_path in image_data:
+                    # Word document default page width is about 6 inches;
+                    # the pre-sized image keeps its aspect ratio at this width
+                    doc.add_picture(BytesIO(image_data[img_path].data), width=Inches(5.5))
+
+                    caption = os.path.basename(img_path).replace('_', ' ').replace('.png', '')
+                    doc.add_paragraph(caption, style='Caption')
+        
+        buffer = BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+    def _pdf_markup(self, runs):
+        """
+        Convert inline runs into ReportLab paragraph markup
+        
+        Args:
+            runs (tuple): Run tuples
             
-            # Add content paragraphs
-            paragraphs = content.split('\n\n')
-            for para in paragraphs:
-                if para.strip():
-                    if para.startswith('#'):
-                        # Handle markdown headings
-                        level = 1
-                        while para.startswith('#'):
-                            para = para[1:]
-                            level += 1
-                        doc.add_heading(para.strip(), level=min(level, 9))
-                    else:
-                        # Handle bullet points
-                        if '\n* ' in para or para.startswith('* '):
-                            for line in para.split('\n'):
-                                line = line.strip()
-                                if line.startswith('* '):
-                                    bullet_text = line[2:].strip()
-                                    # Replace markdown formatting
-                                    bullet_text = re.sub(r'\*\*(.*?)\*\*', r'\1', bullet_text)
-                                    bullet_text = re.sub(r'\*(.*?)\*', r'\1', bullet_text)
-                                    doc.add_paragraph(bullet_text, style='ListBullet')
-                        else:
-                            # Regular paragraph
-                            # Replace markdown formatting
-                            para = re.sub(r'\*\*(.*?)\*\*', r'\1', para)
-                            para = re.sub(r'\*(.*?)\*', r'\1', para)
-                            doc.add_paragraph(para)
+        Returns:
+            str: Escaped text with <b>, <i> and <font> tags
+        """
+        parts = []
+        for run in runs:
+            text = run.text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            if run.code:
+                text = f'<font name="Courier">{text}</font>'
+            if run.bold:
+                text = f'<b>{text}</b>'
+            if run.italic:
+                text = f'<i>{text}</i>'
+            parts.append(text)
+        return "".join(parts)
+
+    def _pdf_flowables(self, blocks, content_width, image_data):
+        """
+        Convert markdown blocks into ReportLab flowables
+        
+        Args:
+            blocks (tuple): Parsed markdown blocks
+            content_width (float): Usable page width in points
+            image_data (dict): PreparedImage by path
             
-            # Add images
-            if images:
-                doc.add_heading('Generated Charts', level=1)
-                for img_path in images:
-                    if os.path.exists(img_path):
-                        try:
-                            # Calculate appropriate image width based on page width
-                            # Word document default page width is about 6 inches
-                            max_width = Inches(5.5)  # Slightly less than page width to ensure margins
-                            
-                            # Get image dimensions to calculate appropriate size
-                            from PIL import Image as PILImage
-                            with PILImage.open(img_path) as pil_img:
-                                img_width, img_height = pil_img.size
-                                aspect_ratio = img_height / img_width
-                                
-                            # Use a width that fits the page
-                            doc.add_picture(img_path, width=max_width)
-                        except Exception:
-                            # Fallback if PIL is not available or any other error
-                            doc.add_picture(img_path, width=Inches(5))
-                            
-                        caption = os.path.basename(img_path).replace('_', ' ').replace('.png', '')
-                        doc.add_paragraph(caption, style='Caption')
+        Returns:
+            list: Flowables for the story
+        """
+        heading_styles = {1: 'ReportHeading1', 2: 'ReportHeading2'}
+        flowables = []
+        for block in blocks:
+            if isinstance(block, Heading):
+                style = self.styles[heading_styles.get(block.level, 'ReportHeading3')]
+                flowables.append(Paragraph(self._pdf_markup(block.runs), style))
+            elif isinstance(block, ListBlock):
+                items = [Paragraph(self._pdf_markup(item), self.styles['ReportBody']) for item in block.items]
+                flowables.append(ListFlowable(
+                    items,
+                    bulletType='1' if block.ordered else 'bullet',
+                    leftIndent=20,
+                    spaceBefore=10,
+                    spaceAfter=10
+                ))
+            elif isinstance(block, ImageBlock):
+                if block.path in image_data:
+                    flowables.extend(self._pdf_image(image_data[block.path], block.path, content_width))
+            else:
+                flowables.append(Paragraph(self._pdf_markup(block.runs), self.styles['ReportBody']))
+        return flowables
+
+    def _pdf_image(self, prepared, img_path, content_width):
+        """
+        Build flowables that embed an image scaled to the page
+        
+        Args:
+            prepared (PreparedImage): Pre-sized image
+            img_path (str): Image file path (for error messages)
+            content_width (float): Usable page width in points
             
-            # Save the document
-            doc.save(filepath)
-            return filepath
+        Returns:
+            list: Spacer and Image flowables
+        """
+        try:
+            # Limit to 5 inches height at most to ensure it fits on page, keeping the aspect ratio
+            max_height = 5 * inch
+            pdf_img_width = content_width
+            pdf_img_height = content_width * prepared.aspect
+            if pdf_img_height > max_height:
+                pdf_img_width *= max_height / pdf_img_height
+                pdf_img_height = max_height
             
+            return [Spacer(1, 0.2*inch), Image(BytesIO(prepared.data), width=pdf_img_width, height=pdf_img_height)]
         except Exception as e:
-            import traceback
-            print(f"Word Export Error: {str(e)}")
-            print(traceback.format_exc())
-            return f"Error generating Word document: {str(e)}"
+            print(f"Error processing image {img_path}: {str(e)}")
+            # Use a safe fixed size if any issues
+            return [Spacer(1, 0.2*inch), Image(BytesIO(prepared.data), width=5*inch, height=3*inch)]
+
+    def _add_word_blocks(self, doc, blocks, image_data):
+        """
+        Append markdown blocks to a Word document
+        
+        Args:
+            doc (docx.Document): Target document
+            blocks (tuple): Parsed markdown blocks
+            image_data (dict): PreparedImage by path
+        """
+        from docx.shared import Inches
+        
+        for block in blocks:
+            if isinstance(block, Heading):
+                doc.add_heading(plain_text(block.runs), level=min(block.level, 9))
+            elif isinstance(block, ListBlock):
+                style = 'List Number' if block.ordered else 'List Bullet'
+                for item in block.items:
+                    self._add_word_runs(doc.add_paragraph(style=style), item)
+            elif isinstance(block, ImageBlock):
+                if block.path in image_data:
+                    doc.add_picture(BytesIO(image_data[block.path].data), width=Inches(5.5))
+            else:
+                self._add_word_runs(doc.add_paragraph(), block.runs)
+
+    def _add_word_runs(self, paragraph, runs):
+        """Add styled runs to a Word paragraph"""
+        for run in runs:
+            word_run = paragraph.add_run(run.text)
+            word_run.bold = run.bold
+            word_run.italic = run.italic
+            if run.code:
+                word_run.font.name = 'Courier New'
+
+    def _render_html(self, blocks, images, image_data):
+        """
+        Build a self-contained HTML report with images inlined as data URIs
+        
+        Args:
+            blocks (tuple): Parsed markdown blocks from parse_markdown
+            images (list): Paths to images to include
+            image_data (dict): PreparedImage by path
+            
+        Returns:
+            bytes: UTF-8 encoded HTML document
+        """
+        def img_tag(img_path, alt):
+            prepared = image_data[img_path]
+            encoded = base64.b64encode(prepared.data).decode('ascii')
+            return f'<img src="data:{prepared.mime};base64,{encoded}" alt="{html.escape(alt)}">'
+        
+        body = ['<h1 class="report-title">Stock Analysis Report</h1>']
+        for block in blocks:
+            if isinstance(block, Heading):
+                level = min(block.level, 6)
+                body.append(f"<h{level}>{self._html_markup(block.runs)}</h{level}>")
+            elif isinstance(block, ListBlock):
+                tag = 'ol' if block.ordered else 'ul'
+                items = "".join(f"<li>{self._html_markup(item)}</li>" for item in block.items)
+                body.append(f"<{tag}>{items}</{tag}>")
+            elif isinstance(block, ImageBlock):
+                if block.path in image_data:
+                    body.append(f"<figure>{img_tag(block.path, block.alt)}</figure>")
+            else:
+                body.append(f"<p>{self._html_markup(block.runs)}</p>")
+        
+        charts = [p for p in images or [] if p in image_data]
+        if charts:
+            body.append("<h2>Generated Charts</h2>")
+            for i, img_path in enumerate(charts):
+                caption = os.path.basename(img_path).replace('_', ' ').replace('.png', '')
+                body.append(f"<figure>{img_tag(img_path, caption)}"
+                            f"<figcaption>Chart {i+1}: {html.escape(caption)}</figcaption></figure>")
+        
+        document = (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            '<title>Stock Analysis Report</title>\n'
+            '<style>body{font-family:Helvetica,Arial,sans-serif;max-width:8in;margin:1in auto;line-height:1.4}'
+            '.report-title{text-align:center;color:darkblue}img{max-width:100%}'
+            'figcaption{text-align:center;color:#555;font-size:0.9em}</style>\n'
+            '</head>\n<body>\n' + "\n".join(body) + '\n</body>\n</html>\n'
+        )
+        return document.encode('utf-8')
+
+    def _html_markup(self, runs):
+        """Convert inline runs into escaped HTML"""
+        parts = []
+        for run in runs:
+            text = html.escape(run.text, quote=False)
+            if run.code:
+                text = f"<code>{text}</code>"
+            if run.bold:
+                text = f"<strong>{text}</strong>"
+            if run.italic:
+                text = f"<em>{text}</em>"
+            parts.append(text)
+        return "".join(parts)
 
     def _extract_title_from_content(self, content):
         """
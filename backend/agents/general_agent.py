@@ -6,17 +6,24 @@ from langchain_groq import ChatGroq
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.tools import ResearchTools
-from config import GROQ_API_KEY, GENERAL_MODEL, MAX_RESEARCH_RESULTS
+from utils.query_planner import decompose_query
+from utils.context_builder import ContextBuilder
+from utils.llm_cache import get_llm_cache, stream_completion, astream_completion
+from config import (GROQ_API_KEY, GENERAL_MODEL, MAX_RESEARCH_RESULTS,
+                    SEARCH_FANOUT_ENABLED, SEARCH_FANOUT_MAX_SUBQUERIES)
 
 class GeneralAgent:
     def __init__(self):
         """Initialize the general agent with LLM and research tools"""
+        self.temperature = 0.3
         self.llm = ChatGroq(
-            temperature=0.3,
+            temperature=self.temperature,
             model_name=GENERAL_MODEL,
             groq_api_key=GROQ_API_KEY
         )
         self.research_tools = ResearchTools()
+        self.llm_cache = get_llm_cache()
+        self.context_builder = ContextBuilder(GENERAL_MODEL)
 
     def handle_query(self, state):
         """
@@ -26,36 +33,120 @@ class GeneralAgent:
             state (dict): Contains the query and other state information
                 - query: The research query
                 - site_count: Number of sites to search (5-20)
+                - bypass_cache: Skip the LLM completion cache (optional)
+                - progress: Callback receiving (stage, status) updates (optional)
             
         Returns:
             dict: Result, sources, and images
         """
+        progress = state.get("progress")
+        prepared = self.prepare_query(state)
+        
+        if progress:
+            progress("llm", "running")
+        content = self._invoke_llm(prepared["prompt"], bypass=state.get("bypass_cache", False),
+                                   progress=progress)
+        if progress:
+            progress("llm", "done")
+        
+        return {
+            "result": content,
+            "sources": prepared["sources"],
+            "images": []
+        }
+
+    def prepare_query(self, state):
+        """
+        Search the web and build the LLM prompt for a general query
+        
+        Args:
+            state (dict): Contains the query and site_count
+                - fanout: Override SEARCH_FANOUT_ENABLED for this query (optional)
+            
+        Returns:
+            dict: The prompt and the processed sources
+        """
         query = state["query"]
         site_count = state.get("site_count", 5)  # Default to 5 if not specified
         
         print(f"Handling general query: {query}")
         print(f"Using site count: {site_count}")
         
-        # Perform web search with specified site count
-        results = self.research_tools.web_search(query, max_results=min(site_count, MAX_RESEARCH_RESULTS))
+        progress = state.get("progress")
+        if progress:
+            progress("search", "running")
+        
+        # Search each facet of the query concurrently, then merge by URL
+        per_search = min(site_count, MAX_RESEARCH_RESULTS)
+        if state.get("fanout", SEARCH_FANOUT_ENABLED):
+            subqueries = decompose_query(query, SEARCH_FANOUT_MAX_SUBQUERIES)
+        else:
+            subqueries = [query]
+        results = self.research_tools.fanout_search(subqueries, max_results=per_search,
+                                                    limit=max(site_count, per_search))
         processed = self.research_tools.extract_key_information(results)
         
-        # Generate response using LLM
-        prompt = f"""Answer the following query concisely and accurately:
+        if progress:
+            progress("search", "done")
+        
+        # Pack the most relevant parts of the sources into what the model can take
+        budget = self.context_builder.budget_for(self._format_prompt(query, "", len(processed)))
+        context = self.context_builder.build(query, processed, budget)
+        prompt = self._format_prompt(query, context, len(processed))
+        
+        return {
+            "prompt": prompt,
+            "sources": processed
+        }
+
+    def _format_prompt(self, query, context, source_count):
+        """Generate prompt for a general query"""
+        return f"""Answer the following query concisely and accurately:
         
         QUERY: {query}
         
         RESEARCH DATA:
-        {processed}
+        {context}
         
         Provide a well-structured response with clear sections and bullet points where appropriate.
-        Note: This research is based on data from {len(processed)} different sources.
+        Cite sources by their [number].
+        Note: This research is based on data from {source_count} different sources.
+        """
+
+    def astream_llm(self, prompt, bypass=False):
         """
+        Stream the LLM answer for a prepared prompt
         
-        response = self.llm.invoke(prompt)
+        Args:
+            prompt (str): Prompt from prepare_query
+            bypass (bool): Skip the completion cache lookup
+            
+        Returns:
+            AsyncIterator[str]: Completion text chunks
+        """
+        return astream_completion(self.llm, prompt, GENERAL_MODEL, self.temperature,
+                                  cache=self.llm_cache, bypass=bypass)
+
+    def _invoke_llm(self, prompt, bypass=False, progress=None):
+        """
+        Invoke the LLM, going through the completion cache when enabled
         
-        return {
-            "result": response.content,
-            "sources": processed,
-            "images": []
-        } 
\ No newline at end of file
+        Args:
+            prompt (str): Prompt text
+            bypass (bool): Skip the cache lookup for this request
+            progress (callable): Job progress callback (optional)
+            
+        Returns:
+            str: Completion text
+        """
+        if progress is not None:
+            # Stream so a cancelled job can stop between chunks instead of waiting for the full answer
+            chunks = []
+            for chunk in stream_completion(self.llm, prompt, GENERAL_MODEL, self.temperature,
+                                           cache=self.llm_cache, bypass=bypass):
+                chunks.append(chunk)
+                progress("llm", "running")
+            return "".join(chunks)
+        if self.llm_cache is None:
+            return self.llm.invoke(prompt).content
+        return self.llm_cache.invoke(self.llm, prompt, GENERAL_MODEL, self.temperature, bypass=bypass)
\ No newline at end of file
@@ -1,25 +1,38 @@
 import os
 import sys
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import yfinance as yf
-from datetime import datetime, timedelta
+import numpy as np
 from langchain_groq import ChatGroq
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import GROQ_API_KEY, RESEARCH_MODEL, CHARTS_DIR
+from config import GROQ_API_KEY, RESEARCH_MODEL, CHARTS_DIR, COMPARISON_MAX_LINES
+from utils.market_data import MarketData, MarketSnapshot
+from utils.indicators import IndicatorEngine, summarize, format_indicator_table
+from utils.comparison import compare_assets, format_comparison_summary
+from utils.chart_renderer import (ChartRenderer, render_price_chart, render_comparison_chart,
+                                  render_correlation_heatmap)
+from utils.chart_store import ChartStore
+from utils.llm_cache import get_llm_cache, stream_completion, astream_completion
+from utils.context_builder import ContextBuilder
+from utils.entity_matcher import get_symbol_matcher
 
 class ResearchAgent:
     def __init__(self):
         """Initialize the research agent with LLM"""
+        self.temperature = 0.1
         self.llm = ChatGroq(
-            temperature=0.1,
+            temperature=self.temperature,
             model_name=RESEARCH_MODEL,
             groq_api_key=GROQ_API_KEY
         )
+        self.market_data = MarketData()
+        self.indicator_engine = IndicatorEngine()
+        self.chart_renderer = ChartRenderer()
+        self.chart_store = ChartStore()
+        self.llm_cache = get_llm_cache()
+        self.context_builder = ContextBuilder(RESEARCH_MODEL)
+        self.symbol_matcher = get_symbol_matcher()
 
     def deep_analysis(self, state):
         """
@@ -29,6 +42,9 @@ class ResearchAgent:
             state (dict): Contains the query and other state information
                 - query: The research query
                 - site_count: Number of sites to search (5-20)
+                - bypass_cache: Skip the LLM completion cache (optional)
+                - progress: Callback receiving (stage, status) updates (optional)
+                - pin_artifacts: Callback receiving chart paths to protect from eviction (optional)
             
         Returns:
             dict: Result, sources, and images
@@ -36,6 +52,7 @@ class ResearchAgent:
         try:
             query = state["query"]
             site_count = state.get("site_count", 5)  # Default to 5 if not specified
+            progress = state.get("progress")
             
             print(f"Starting deep analysis for query: {query}")
             print(f"Using site count: {site_count}")
@@ -43,32 +60,41 @@ class ResearchAgent:
             # Determine which tickers to use based on the query
             tickers = self._extract_tickers_from_query(query)
             
+            # One market data fetch feeds the indicators, the comparison, the charts and the prompt
+            snapshot, indicators = self._load_market_data(tickers, progress=progress)
+            comparison = self._compare(snapshot)
+            
             # Generate charts with better error handling
-            images = self._generate_charts(tickers)
+            images = self._generate_charts(snapshot, indicators, comparison, progress=progress,
+                                           pin=state.get("pin_artifacts"))
             if not images:
                 print("Failed to generate charts")
                 return {
                     **state,
                     "result": "Failed to generate stock charts. Possible network or data issue.",
-                    "sources": self._get_sources(site_count),
+                    "sources": self.get_sources(site_count),
                     "images": []
                 }
                 
             # Perform analysis with better error handling
-            analysis = self._perform_analysis(query, images, site_count)
+            analysis = self._perform_analysis(query, images, site_count,
+                                              indicator_table=self._indicator_table(indicators, comparison),
+                                              comparison_summary=format_comparison_summary(comparison),
+                                              bypass_cache=state.get("bypass_cache", False),
+                                              progress=progress)
             if not analysis or analysis.startswith("Analysis Error"):
                 print(f"Analysis failed: {analysis}")
                 return {
                     **state,
                     "result": analysis or "LLM analysis failed to generate content",
-                    "sources": self._get_sources(site_count),
+                    "sources": self.get_sources(site_count),
                     "images": images  # Still return images if we have them
                 }
             
             print("Analysis completed successfully")
             return {
                 "result": analysis,
-                "sources": self._get_sources(site_count),
+                "sources": self.get_sources(site_count),
                 "images": images
             }
                 
@@ -92,33 +118,8 @@ class ResearchAgent:
         Returns:
             list: List of ticker symbols to analyze
         """
-        query_lower = query.lower()
-        
-        # Check for cryptocurrency comparison
-        if "bitcoin" in query_lower and "ethereum" in query_lower:
-            return ["BTC-USD", "ETH-USD"]
-        
-        # Check for specific company mentions
-        tickers = []
-        company_ticker_map = {
-            "nvidia": "NVDA",
-            "nvda": "NVDA",
-            "apple": "AAPL",
-            "microsoft": "MSFT",
-            "amazon": "AMZN",
-            "google": "GOOGL",
-            "alphabet": "GOOGL",
-            "meta": "META",
-            "facebook": "META",
-            "tesla": "TSLA",
-            "netflix": "NFLX",
-            "bitcoin": "BTC-USD",
-            "ethereum": "ETH-USD"
-        }
-        
-        for company, ticker in company_ticker_map.items():
-            if company in query_lower:
-                tickers.append(ticker)
+        # Company names, aliases and symbols from the ticker universe, in order of mention
+        tickers = self.symbol_matcher.find(query)
         
         # Default to NVDA if no specific tickers found
         if not tickers:
@@ -126,113 +127,180 @@ class ResearchAgent:
         
         return tickers
 
-    def _generate_charts(self, tickers=None):
+    def _load_market_data(self, tickers=None, progress=None):
         """
-        Generate stock charts for analysis
+        Fetch market data and compute technical indicators for the tickers
         
         Args:
             tickers (list): List of stock ticker symbols
+            progress (callable): Job progress callback (optional)
             
         Returns:
-            list: Paths to generated chart images
+            tuple: (MarketSnapshot, dict of ticker to indicator DataFrame on the snapshot's dates)
         """
         if tickers is None:
             tickers = ["NVDA"]
         
+        if progress:
+            progress("data", "running")
         try:
-            images = []
+            # One batched download for every ticker, shared by all charts
+            snapshot = self.market_data.fetch(tickers)
+        except Exception as e:
+            print(f"Market data error: {str(e)}")
+            snapshot = MarketSnapshot({})
+        
+        indicators = {}
+        for ticker in snapshot.tickers:
+            if snapshot[ticker].empty:
+                continue
+            try:
+                # Computed over the full cached history so long windows are warmed up
+                computed = self.indicator_engine.compute(ticker, snapshot.history[ticker],
+                                                         self.market_data.interval)
+                indicators[ticker] = computed.reindex(snapshot[ticker].index)
+            except Exception as e:
+                print(f"Indicator error for {ticker}: {str(e)}")
+        if progress:
+            progress("data", "done")
+        return snapshot, indicators
+
+    def _indicator_table(self, indicators, comparison=None):
+        """Summarize the latest indicator values as a markdown table, strongest tickers first"""
+        tickers = [t for t in indicators if not indicators[t].empty]
+        if comparison is not None:
+            # Follow the comparison ranking; tickers it left out go last
+            rank = {comparison.tickers[i]: r for r, i in enumerate(comparison.ranking)}
+            tickers.sort(key=lambda t: rank.get(t, len(rank)))
+        return format_indicator_table({t: summarize(indicators[t]) for t in tickers})
+
+    def _charted_tickers(self, snapshot, comparison=None):
+        """
+        Pick the tickers that get their own price chart
+        
+        Up to COMPARISON_MAX_LINES tickers are charted individually. Larger sets
+        are covered by the heatmap and the tables, so only the strongest and
+        weakest by relative strength get a price chart.
+        
+        Args:
+            snapshot (MarketSnapshot): Market data for this request
+            comparison (ComparisonResult): Multi-asset comparison (optional)
             
-            for i, ticker in enumerate(tickers):
-                print(f"Downloading {ticker} data for 1 year...")
-                # Use 1y period instead of 5mo since it's known to work
-                data = yf.download(ticker, period="1y", auto_adjust=True)
-                
-                # Verify data was retrieved successfully
-                if data.empty:
-                    print(f"No data received for {ticker}")
-                    continue
+        Returns:
+            list: Ticker symbols to chart
+        """
+        tickers = [t for t in snapshot.tickers if not snapshot[t].empty]
+        if len(tickers) <= COMPARISON_MAX_LINES:
+            return tickers
+        if comparison is None:
+            return tickers[:COMPARISON_MAX_LINES]
+        ranked = [comparison.tickers[i] for i in comparison.ranking]
+        # Assets with too little history are left out of the comparison, so it can be small
+        if len(ranked) <= COMPARISON_MAX_LINES:
+            return ranked
+        bottom = COMPARISON_MAX_LINES // 2
+        return ranked[:COMPARISON_MAX_LINES - bottom] + ranked[len(ranked) - bottom:]
+
+    def _compare(self, snapshot):
+        """
+        Compare the assets of a snapshot on one aligned calendar
+        
+        Args:
+            snapshot (MarketSnapshot): Market data already fetched for this request
+            
+        Returns:
+            ComparisonResult: Aligned returns and statistics, or None for fewer than two assets
+        """
+        if len(snapshot) < 2:
+            return None
+        try:
+            return compare_assets(snapshot.closes)
+        except Exception as e:
+            print(f"Comparison error: {str(e)}")
+            return None
+
+    def _generate_charts(self, snapshot, indicators=None, comparison=None, progress=None, pin=None):
+        """
+        Generate stock charts for analysis
+        
+        Args:
+            snapshot (MarketSnapshot): Market data already fetched for this request
+            indicators (dict): Ticker to indicator DataFrame for chart overlays (optional)
+            comparison (ComparisonResult): Multi-asset comparison to chart (optional)
+            progress (callable): Job progress callback (optional)
+            pin (callable): Receives the chart paths before rendering so they outlive eviction (optional)
+            
+        Returns:
+            list: Paths to generated chart images
+        """
+        indicators = indicators or {}
+        try:
+            if progress:
+                progress("charts", "running")
+            os.makedirs(CHARTS_DIR, exist_ok=True)
+            
+            for ticker in snapshot.tickers:
+                if snapshot[ticker].empty:
+                    print(f"No recent data for {ticker}")
+            
+            # Each entry is (final path, render job, catalog metadata); cached charts have no job
+            planned = []
+            for ticker in self._charted_tickers(snapshot, comparison):
+                data = snapshot[ticker]
                 
                 # Print debug info about the data
-                print(f"Total trading days: {data.shape[0]}")
+                print(f"{ticker} trading days: {data.shape[0]}")
                 print(f"Date range: {data.index[0].date()} to {data.index[-1].date()}")
                 
-                # If we need the past 5 months only, filter the data
-                # Get 5 months ago from today
-                five_months_ago = datetime.now() - timedelta(days=150)
-                # Filter the data for the last 5 months
-                if len(data) > 0:
-                    data = data[data.index >= five_months_ago]
-                
-                os.makedirs(CHARTS_DIR, exist_ok=True)
-                
-                # Price Chart with volume subplot
-                fig, axes = plt.subplots(2, 1, figsize=(12, 10), gridspec_kw={'height_ratios': [3, 1]})
-                
-                # Plot price
-                data['Close'].plot(ax=axes[0], title=f"{ticker} Price Trend (Last 5 Months)")
-                axes[0].set_ylabel("Price ($)")
-                axes[0].grid(True)
-                
-                # Format x-axis dates to be more readable
-                import matplotlib.dates as mdates
-                # Only show a subset of dates to avoid overcrowding
-                date_format = mdates.DateFormatter('%Y-%m-%d')
-                axes[0].xaxis.set_major_formatter(date_format)
-                # Rotate date labels for better visibility
-                plt.setp(axes[0].xaxis.get_majorticklabels(), rotation=45, ha='right')
-                # Hide x-axis labels on top plot since they're shown in bottom plot
-                axes[0].set_xticklabels([])
+                volume_col = self._find_volume_column(data)
+                if volume_col is None:
+                    print("Volume data not available")
                 
-                # Plot volume
-                if 'Volume' in data.columns:
-                    data['Volume'].plot(ax=axes[1], kind='bar', color='gray', alpha=0.5)
-                    axes[1].set_ylabel("Volume")
-                    axes[1].set_title("Trading Volume")
-                    
-                    # Format x-axis dates on volume plot
-                    # Show fewer x-tick labels to avoid overcrowding
-                    locator = mdates.MonthLocator()  # Show one label per month
-                    axes[1].xaxis.set_major_locator(locator)
-                    axes[1].xaxis.set_major_formatter(date_format)
-                    # Rotate date labels for better visibility
-                    plt.setp(axes[1].xaxis.get_majorticklabels(), rotation=45, ha='right')
-                else:
-                    # Check for alternative volume column names
-                    volume_col = None
-                    for col in data.columns:
-                        if 'volume' in str(col).lower():
-                            volume_col = col
-                            break
-                    
-                    if volume_col:
-                        data[volume_col].plot(ax=axes[1], kind='bar', color='gray', alpha=0.5)
-                        axes[1].set_ylabel("Volume")
-                        axes[1].set_title("Trading Volume")
-                        
-                        # Format x-axis dates on volume plot
-                        locator = mdates.MonthLocator()  # Show one label per month
-                        axes[1].xaxis.set_major_locator(locator)
-                        axes[1].xaxis.set_major_formatter(date_format)
-                        # Rotate date labels for better visibility
-                        plt.setp(axes[1].xaxis.get_majorticklabels(), rotation=45, ha='right')
-                    else:
-                        print("Volume data not available")
-                
-                # Add more space at the bottom for the rotated date labels
-                plt.tight_layout()
-                plt.subplots_adjust(bottom=0.2)
-                
-                # Use ticker-specific filename to avoid overwriting
-                chart_filename = f"{ticker.lower().replace('-', '_')}_price_trend.png"
-                price_path = os.path.join(CHARTS_DIR, chart_filename)
-                fig.savefig(price_path)
-                plt.close(fig)
-                images.append(price_path)
-                
-                # If we have multiple tickers, create a comparison chart
-                if len(tickers) > 1 and i == len(tickers) - 1:
-                    self._generate_comparison_chart(tickers, images)
+                dates = data.index.to_numpy()
+                close = data['Close'].to_numpy()
+                volume = data[volume_col].to_numpy() if volume_col is not None else None
+                overlays = {}
+                if ticker in indicators:
+                    ind = indicators[ticker]
+                    overlays = {
+                        "sma_fast": ind["sma_20"].to_numpy(),
+                        "sma_slow": ind["sma_50"].to_numpy(),
+                        "bb_upper": ind["bb_upper"].to_numpy(),
+                        "bb_lower": ind["bb_lower"].to_numpy()
+                    }
+                planned.append(self._plan_chart(ticker, "price_trend", dates,
+                                                [close, volume, *overlays.values()],
+                                                render_price_chart, {
+                    "ticker": ticker,
+                    "dates": dates,
+                    "close": close,
+                    "volume": volume,
+                    **overlays
+                }))
+            
+            # If we have multiple tickers, create a comparison chart from the same data
+            if comparison is not None:
+                comparison_chart = self._plan_comparison_chart(comparison)
+                if comparison_chart:
+                    planned.append(comparison_chart)
+            
+            if pin is not None:
+                pin([final_path for final_path, _, _ in planned])
+            
+            # Render every missing chart of this request in parallel
+            jobs = [job for _, job, _ in planned if job is not None]
+            rendered = set(self.chart_renderer.render(jobs))
+            if progress:
+                progress("charts", "done")
             
+            images = []
+            for final_path, job, metadata in planned:
+                if job is None:
+                    images.append(final_path)
+                elif job[1]["path"] in rendered:
+                    images.append(self.chart_store.commit(job[1]["path"], final_path, metadata))
+                else:
+                    self.chart_store.discard(job[1]["path"])
             return images
             
         except Exception as e:
@@ -241,58 +309,88 @@ class ResearchAgent:
             print(traceback.format_exc())
             return []
 
-    def _generate_comparison_chart(self, tickers, images):
+    def _find_volume_column(self, data):
+        """
+        Find the volume column in an OHLCV frame
+        
+        Args:
+            data (pandas.DataFrame): OHLCV data
+            
+        Returns:
+            str: Column name, or None if there is no volume data
+        """
+        if 'Volume' in data.columns:
+            return 'Volume'
+        # Check for alternative volume column names
+        for col in data.columns:
+            if 'volume' in str(col).lower():
+                return col
+        return None
+
+    def _plan_chart(self, ticker, chart_type, dates, arrays, render_func, kwargs):
+        """
+        Reuse a stored chart or prepare a job that renders it
+        
+        Args:
+            ticker (str): Ticker symbol (or joined symbols)
+            chart_type (str): Chart type used in the store key
+            dates (numpy.ndarray): Dates covered by the chart
+            arrays (list): Plotted data arrays
+            render_func (callable): Module-level render function
+            kwargs (dict): Render arguments, without the output path
+            
+        Returns:
+            tuple: (final path, render job or None if the chart already exists, catalog metadata)
+        """
+        start, end = str(dates[0])[:10], str(dates[-1])[:10]
+        key = self.chart_store.key(ticker, chart_type, str(dates[0]), str(dates[-1]), dates, *arrays)
+        metadata = {"ticker": ticker, "chart_type": chart_type, "start": start, "end": end}
+        existing = self.chart_store.get(ticker, chart_type, key)
+        if existing:
+            print(f"Reusing stored chart {existing}")
+            return existing, None, metadata
+        
+        final_path = self.chart_store.path(ticker, chart_type, key)
+        # Render to a private temp file so concurrent requests never see a partial PNG
+        return final_path, (render_func, {**kwargs, "path": self.chart_store.temp_path(final_path)}), metadata
+
+    def _plan_comparison_chart(self, comparison):
         """
-        Generate a comparison chart for multiple tickers
+        Plan a comparison chart for multiple tickers
+        
+        A few assets are drawn as price lines normalized to 100; more than
+        COMPARISON_MAX_LINES become a correlation heatmap instead.
         
         Args:
-            tickers (list): List of ticker symbols
-            images (list): List to append the new image path to
+            comparison (ComparisonResult): Aligned multi-asset data for this request
+            
+        Returns:
+            tuple: (final path, render job or None, catalog metadata), or None if there is nothing to compare
         """
         try:
-            # Download data for all tickers
-            all_data = {}
-            for ticker in tickers:
-                data = yf.download(ticker, period="1y", auto_adjust=True)
-                if not data.empty:
-                    # Get 5 months ago from today
-                    five_months_ago = datetime.now() - timedelta(days=150)
-                    # Filter the data for the last 5 months
-                    data = data[data.index >= five_months_ago]
-                    
-                    # Normalize the data to start at 100 for fair comparison
-                    all_data[ticker] = data['Close'] / data['Close'].iloc[0] * 100
-            
-            if all_data:
-                # Create comparison chart
-                fig, ax = plt.subplots(figsize=(12, 8))
-                
-                for ticker, prices in all_data.items():
-                    prices.plot(ax=ax, label=ticker)
-                
-                ax.set_title("Price Comparison (Normalized to 100)")
-                ax.set_ylabel("Normalized Price")
-                ax.grid(True)
-                ax.legend()
-                
-                # Format x-axis dates
-                import matplotlib.dates as mdates
-                date_format = mdates.DateFormatter('%Y-%m-%d')
-                ax.xaxis.set_major_formatter(date_format)
-                plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
-                
-                plt.tight_layout()
-                
-                # Save comparison chart
-                comparison_path = os.path.join(CHARTS_DIR, "comparison_chart.png")
-                fig.savefig(comparison_path)
-                plt.close(fig)
-                images.append(comparison_path)
+            tickers, dates = comparison.tickers, comparison.dates
+            if len(tickers) > COMPARISON_MAX_LINES:
+                order = comparison.heatmap_order()
+                ordered = [tickers[i] for i in order]
+                correlation = comparison.correlation[np.ix_(order, order)]
+                return self._plan_chart(",".join(ordered), "correlation", dates, [correlation],
+                                        render_correlation_heatmap, {
+                    "tickers": ordered,
+                    "correlation": correlation
+                })
+            
+            # Every asset on the same aligned dates, rebased to 100 for a fair comparison
+            normalized = comparison.normalized
+            series = {t: (dates, normalized[:, i]) for i, t in enumerate(tickers)}
+            return self._plan_chart(",".join(tickers), "comparison", dates, [normalized],
+                                    render_comparison_chart, {"series": series})
         
         except Exception as e:
             print(f"Comparison chart error: {str(e)}")
+            return None
 
-    def _perform_analysis(self, query, images, site_count=5):
+    def _perform_analysis(self, query, images, site_count=5, indicator_table="", comparison_summary="",
+                          bypass_cache=False, progress=None):
         """
         Generate analysis with proper markdown formatting
         
@@ -300,39 +398,33 @@ class ResearchAgent:
             query (str): Research query
             images (list): Paths to chart images
             site_count (int): Number of sites to search
+            indicator_table (str): Markdown table of technical indicators
+            comparison_summary (str): Markdown multi-asset comparison
+            bypass_cache (bool): Skip the LLM completion cache
+            progress (callable): Job progress callback (optional)
             
         Returns:
             str: Formatted analysis text
         """
         try:
-            chart_refs = "\n".join([f"Chart {i+1}: {os.path.basename(p)}" for i,p in enumerate(images)])
-            
-            # Determine the type of analysis needed based on the query
-            query_lower = query.lower()
-            
-            # Cryptocurrency analysis
-            if "bitcoin" in query_lower or "ethereum" in query_lower or "crypto" in query_lower:
-                prompt = self._get_crypto_analysis_prompt(query, chart_refs, site_count)
-            # Stock comparison analysis
-            elif "compare" in query_lower or "vs" in query_lower or "versus" in query_lower:
-                prompt = self._get_comparison_analysis_prompt(query, chart_refs, site_count)
-            # Default stock analysis
-            else:
-                prompt = self._get_stock_analysis_prompt(query, chart_refs, site_count)
+            prompt = self.build_analysis_prompt(query, images, site_count, indicator_table,
+                                                comparison_summary)
             
             print(f"Sending LLM prompt: {prompt[:100]}...")
-            response = self.llm.invoke(prompt)
+            if progress:
+                progress("llm", "running")
+            content = self._invoke_llm(prompt, bypass=bypass_cache, progress=progress)
+            if progress:
+                progress("llm", "done")
             
             # Debug
-            print(f"LLM response type: {type(response)}")
-            if hasattr(response, 'content'):
-                print(f"LLM response length: {len(response.content)}")
+            print(f"LLM response length: {len(content)}")
                 
-            if not response or not hasattr(response, 'content') or not response.content:
+            if not content:
                 print("Empty or invalid LLM response")
                 return "Analysis Error: Empty or invalid response from LLM"
                 
-            return response.content
+            return content
             
         except Exception as e:
             import traceback
@@ -340,6 +432,103 @@ class ResearchAgent:
             print(traceback.format_exc())
             return f"Analysis Error: {str(e)}"
 
+    def prepare_charts(self, query):
+        """
+        Generate the charts and indicators for the tickers mentioned in a query
+        
+        Args:
+            query (str): The research query
+            
+        Returns:
+            dict: Paths to generated chart images, the indicator table and the comparison summary
+        """
+        snapshot, indicators = self._load_market_data(self._extract_tickers_from_query(query))
+        comparison = self._compare(snapshot)
+        return {
+            "images": self._generate_charts(snapshot, indicators, comparison),
+            "indicators": self._indicator_table(indicators, comparison),
+            "comparison": format_comparison_summary(comparison)
+        }
+
+    def build_analysis_prompt(self, query, images, site_count=5, indicator_table="", comparison_summary=""):
+        """
+        Build the analysis prompt that matches the kind of query
+        
+        Args:
+            query (str): Research query
+            images (list): Paths to chart images
+            site_count (int): Number of sites to search
+            indicator_table (str): Markdown table of technical indicators (optional)
+            comparison_summary (str): Markdown multi-asset comparison (optional)
+            
+        Returns:
+            str: Prompt text
+        """
+        # Numeric summaries go first: fitting to the context window trims from the end
+        sections = []
+        if comparison_summary:
+            sections.append(f"Comparison (aligned daily returns, ranked by relative strength):\n{comparison_summary}")
+        if indicator_table:
+            sections.append(f"Technical indicators (latest trading day):\n{indicator_table}")
+        sections.append("\n".join([f"Chart {i+1}: {os.path.basename(p)}" for i,p in enumerate(images)]))
+        chart_refs = "\n\n".join(s for s in sections if s)
+        
+        # Determine the type of analysis needed based on the query
+        query_lower = query.lower()
+        
+        # Cryptocurrency analysis
+        if "bitcoin" in query_lower or "ethereum" in query_lower or "crypto" in query_lower:
+            build_prompt = self._get_crypto_analysis_prompt
+        # Stock comparison analysis
+        elif "compare" in query_lower or "vs" in query_lower or "versus" in query_lower:
+            build_prompt = self._get_comparison_analysis_prompt
+        # Default stock analysis
+        else:
+            build_prompt = self._get_stock_analysis_prompt
+        
+        # Keep the chart data within the model's context window
+        budget = self.context_builder.budget_for(build_prompt(query, "", site_count))
+        return build_prompt(query, self.context_builder.fit(chart_refs, budget), site_count)
+
+    def astream_llm(self, prompt, bypass=False):
+        """
+        Stream the analysis for a prepared prompt
+        
+        Args:
+            prompt (str): Prompt from build_analysis_prompt
+            bypass (bool): Skip the completion cache lookup
+            
+        Returns:
+            AsyncIterator[str]: Completion text chunks
+        """
+        return astream_completion(self.llm, prompt, RESEARCH_MODEL, self.temperature,
+                                  cache=self.llm_cache, bypass=bypass)
+
+    def _invoke_llm(self, prompt, bypass=False, progress=None):
+        """
+        Invoke the LLM, going through the completion cache when enabled
+        
+        Args:
+            prompt (str): Prompt text
+            bypass (bool): Skip the cache lookup for this request
+            progress (callable): Job progress callback (optional)
+            
+        Returns:
+            str: Completion text
+        """
+        if progress is not None:
+            # Stream so a cancelled job can stop between chunks instead of waiting for the full answer
+            chunks = []
+            for chunk in stream_completion(self.llm, prompt, RESEARCH_MODEL, self.temperature,
+                                           cache=self.llm_cache, bypass=bypass):
+                chunks.append(chunk)
+                progress("llm", "running")
+            return "".join(chunks)
+        if self.llm_cache is None:
+            response = self.llm.invoke(prompt)
+            return getattr(response, 'content', None) or ""
+        return self.llm_cache.invoke(self.llm, prompt, RESEARCH_MODEL, self.temperature, bypass=bypass)
+
     def _get_stock_analysis_prompt(self, query, chart_refs, site_count):
         """Generate prompt for standard stock analysis"""
         return f"""Analyze {query} using these charts: {chart_refs}
@@ -362,7 +551,7 @@ class ResearchAgent:
             (Your detailed analysis here)
             
             ## 3. Technical Indicators
-            (Your detailed analysis here)
+            (Interpret the indicator table: moving averages, RSI, MACD, Bollinger Bands, ATR and volume trend)
             
             ## 4. Future Predictions
             (Your detailed analysis here)
@@ -434,10 +623,10 @@ class ResearchAgent:
             (Compare trading volumes and what they indicate)
             
             ## 4. Correlation Analysis
-            (Analyze how the assets move in relation to each other)
+            (Analyze how the assets move in relation to each other, using the correlation and beta figures)
             
             ## 5. Relative Strength
-            (Determine which asset has shown stronger performance)
+            (Determine which asset has shown stronger performance, using the relative-strength ranking)
             
             ## 6. Future Outlook
             (Provide insights on potential future movements)
@@ -448,7 +637,7 @@ class ResearchAgent:
             Note: This analysis is based on data from {site_count} different sources.
             """
 
-    def _get_sources(self, count=5):
+    def get_sources(self, count=5):
         """
         Get validated sources for research
         
@@ -20,10 +20,159 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GENERAL_MODEL = os.getenv("GENERAL_MODEL", "mixtral-8x7b-32768")
 RESEARCH_MODEL = os.getenv("RESEARCH_MODEL", "llama3-70b-8192")
 
+# Concurrency settings
+# Size of the thread pool that runs blocking agent work off the event loop
+RESEARCH_WORKERS = int(os.getenv("RESEARCH_WORKERS", "4"))
+# Processes used to render charts in parallel (0 uses one per CPU core)
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "0"))
+
+# Startup settings
+# Agents built in the background right after startup ("general,research,export" or "all");
+# by default each is built on its first request
+STARTUP_WARMUP = [name.strip() for name in os.getenv("STARTUP_WARMUP", "").split(",") if name.strip()]
+
+# Background research job settings
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Jobs allowed to wait for a worker before new submissions are rejected
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "16"))
+# Seconds finished jobs stay available for status and result polling
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+
+# Market data settings
+MARKET_DATA_PERIOD = os.getenv("MARKET_DATA_PERIOD", "1y")
+MARKET_DATA_LOOKBACK_DAYS = int(os.getenv("MARKET_DATA_LOOKBACK_DAYS", "150"))
+MARKET_DATA_INTERVAL = os.getenv("MARKET_DATA_INTERVAL", "1d")
+# Seconds before cached bars are refreshed with an incremental download
+OHLCV_CACHE_TTL = int(os.getenv("OHLCV_CACHE_TTL", "900"))
+
+# Multi-asset comparison settings
+# Above this many assets the comparison chart is a correlation heatmap instead of price lines
+COMPARISON_MAX_LINES = int(os.getenv("COMPARISON_MAX_LINES", "8"))
+# Assets with bars on fewer than this share of the common dates are left out of comparisons
+COMPARISON_MIN_COVERAGE = float(os.getenv("COMPARISON_MIN_COVERAGE", "0.8"))
+# Ticker that betas are measured against (empty uses an equal-weighted basket of the assets)
+COMPARISON_BENCHMARK = os.getenv("COMPARISON_BENCHMARK", "")
+# Assets listed in the prompt's ranking table
+COMPARISON_SUMMARY_ROWS = int(os.getenv("COMPARISON_SUMMARY_ROWS", "20"))
+
+# Web search cache settings
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "True").lower() == "true"
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MEMORY_ENTRIES = int(os.getenv("SEARCH_CACHE_MEMORY_ENTRIES", "256"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Search fan-out settings
+# Split multi-part queries into sub-queries searched concurrently
+SEARCH_FANOUT_ENABLED = os.getenv("SEARCH_FANOUT_ENABLED", "True").lower() == "true"
+# Maximum searches per query, including the full query
+SEARCH_FANOUT_MAX_SUBQUERIES = int(os.getenv("SEARCH_FANOUT_MAX_SUBQUERIES", "4"))
+# Maximum searches in flight for one request
+SEARCH_FANOUT_CONCURRENCY = int(os.getenv("SEARCH_FANOUT_CONCURRENCY", "3"))
+
+# Source page fetch settings
+# Replace search snippets with the full text of each result page
+PAGE_FETCH_ENABLED = os.getenv("PAGE_FETCH_ENABLED", "True").lower() == "true"
+# Seconds allowed for one page, including the body
+PAGE_FETCH_TIMEOUT = float(os.getenv("PAGE_FETCH_TIMEOUT", "8"))
+PAGE_FETCH_MAX_BYTES = int(os.getenv("PAGE_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+PAGE_FETCH_MAX_CONNECTIONS = int(os.getenv("PAGE_FETCH_MAX_CONNECTIONS", "20"))
+# Maximum concurrent requests to one host
+PAGE_FETCH_PER_HOST = int(os.getenv("PAGE_FETCH_PER_HOST", "2"))
+# Characters of page text kept per source
+PAGE_CONTENT_MAX_CHARS = int(os.getenv("PAGE_CONTENT_MAX_CHARS", "4000"))
+# Seconds a page is used as-is, and how long it is kept for revalidation
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "86400"))
+PAGE_CACHE_MAX_AGE = int(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+PAGE_CACHE_MEMORY_ENTRIES = int(os.getenv("PAGE_CACHE_MEMORY_ENTRIES", "128"))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Prompt context settings
+# Tokens kept free for the completion
+CONTEXT_OUTPUT_RESERVE = int(os.getenv("CONTEXT_OUTPUT_RESERVE", "2048"))
+# Maximum tokens of source text per prompt (0 fills the model's context window)
+CONTEXT_SOURCE_BUDGET = int(os.getenv("CONTEXT_SOURCE_BUDGET", "0"))
+# Words per ranked source chunk
+CONTEXT_CHUNK_WORDS = int(os.getenv("CONTEXT_CHUNK_WORDS", "120"))
+
+# Local source index settings
+# Answer from previously collected sources before searching the web
+SOURCE_INDEX_ENABLED = os.getenv("SOURCE_INDEX_ENABLED", "True").lower() == "true"
+SOURCE_INDEX_DIM = int(os.getenv("SOURCE_INDEX_DIM", "512"))
+SOURCE_INDEX_MAX_ENTRIES = int(os.getenv("SOURCE_INDEX_MAX_ENTRIES", "50000"))
+# Seconds an indexed source counts as fresh
+SOURCE_INDEX_MAX_AGE = int(os.getenv("SOURCE_INDEX_MAX_AGE", "86400"))
+# Minimum cosine similarity for an indexed source to be shortlisted; long relevant pages score around 0.1
+SOURCE_INDEX_MIN_SCORE = float(os.getenv("SOURCE_INDEX_MIN_SCORE", "0.05"))
+# IDF-weighted share of the query's non-company terms a shortlisted source must contain
+SOURCE_INDEX_MIN_COVERAGE = float(os.getenv("SOURCE_INDEX_MIN_COVERAGE", "0.8"))
+# Fraction of the requested results that must be found locally to skip web search
+SOURCE_INDEX_COVERAGE = float(os.getenv("SOURCE_INDEX_COVERAGE", "0.6"))
+
+# LLM completion cache settings
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+# "exact" matches the prompt hash only, "similar" also reuses near-identical prompts
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "exact")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "21600"))
+LLM_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.97"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Export settings
+# Rendered PDF/DOCX documents kept in memory for repeated exports
+EXPORT_CACHE_ENTRIES = int(os.getenv("EXPORT_CACHE_ENTRIES", "64"))
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Media types of the supported export formats
+EXPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "html": "text/html; charset=utf-8"
+}
+# Resolution charts are resampled to for the document's print width
+IMAGE_TARGET_DPI = int(os.getenv("IMAGE_TARGET_DPI", "150"))
+IMAGE_QUANTIZE = os.getenv("IMAGE_QUANTIZE", "True").lower() == "true"
+
+# Artifact storage limits for charts/ and exports/ (0 disables a limit)
+CHARTS_MAX_BYTES = int(os.getenv("CHARTS_MAX_BYTES", str(512 * 1024 * 1024)))
+CHARTS_MAX_COUNT = int(os.getenv("CHARTS_MAX_COUNT", "2000"))
+EXPORTS_MAX_BYTES = int(os.getenv("EXPORTS_MAX_BYTES", str(1024 * 1024 * 1024)))
+EXPORTS_MAX_COUNT = int(os.getenv("EXPORTS_MAX_COUNT", "1000"))
+# Seconds since last access before an unpinned artifact is removed
+ARTIFACT_MAX_AGE = int(os.getenv("ARTIFACT_MAX_AGE", str(7 * 24 * 3600)))
+
+# HTTP response settings
+# Smallest JSON body worth compressing, in bytes
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Browser cache lifetime for content-hashed charts and exports
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", str(365 * 24 * 3600)))
+
+# Shared state settings
+# Where caches, job records and locks shared by all workers live: "sqlite" (files on this host)
+# or "redis" (one server for several hosts; falls back to sqlite when unreachable)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Prefix for every Redis key, so several deployments can share a server
+REDIS_PREFIX = os.getenv("REDIS_PREFIX", "deep-research")
+# Seconds to wait for a shared lock
+STATE_LOCK_TIMEOUT = float(os.getenv("STATE_LOCK_TIMEOUT", "30"))
+# Seconds between checks for a cancellation requested through another worker
+JOB_CANCEL_POLL_INTERVAL = float(os.getenv("JOB_CANCEL_POLL_INTERVAL", "1"))
+
 # File paths
 CHARTS_DIR = "charts"
 EXPORTS_DIR = "exports"
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+OHLCV_CACHE_DIR = os.path.join(CACHE_DIR, "ohlcv")
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+SOURCE_INDEX_DIR = os.path.join(CACHE_DIR, "index")
+# SQLite state backend files (the default keeps the existing cache files in place)
+STATE_DIR = os.getenv("STATE_DIR", CACHE_DIR)
+# Ticker universe used to find companies and assets in queries
+SYMBOLS_FILE = os.getenv("SYMBOLS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.tsv"))
 
 # Ensure directories exist
 os.makedirs(CHARTS_DIR, exist_ok=True)
-os.makedirs(EXPORTS_DIR, exist_ok=True) 
\ No newline at end of file
+os.makedirs(EXPORTS_DIR, exist_ok=True)
+os.makedirs(OHLCV_CACHE_DIR, exist_ok=True) 
\ No newline at end of file
@@ -1,12 +1,18 @@
+# Imported first so startup timings are measured from here
+from utils.startup import PROCESS_STARTED, record, warm_up
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
+import sys
+import time
 from dotenv import load_dotenv
 
-# Import routers
+# Import routers (agents and their heavy dependencies load on first use)
 from routers import research
+from config import STARTUP_WARMUP
+from utils.executor import shutdown_executor
+from utils.http_cache import CachedStaticFiles, CompressionMiddleware, JSON_RESPONSE_CLASS
 
 # Load environment variables
 load_dotenv()
@@ -15,7 +21,8 @@ load_dotenv()
 app = FastAPI(
     title="Deep Research API",
     description="API for AI-powered deep research system",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=JSON_RESPONSE_CLASS
 )
 
 # Configure CORS
@@ -27,6 +34,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress API responses; static artifacts are already compressed formats
+app.add_middleware(CompressionMiddleware, exclude_prefixes=("/charts", "/exports"))
+
 # Include routers
 app.include_router(research.router, prefix="/api")
 
@@ -35,9 +45,27 @@ app.include_router(research.router, prefix="/api")
 os.makedirs("exports", exist_ok=True)
 os.makedirs("charts", exist_ok=True)
 
-# Mount static files
-app.mount("/exports", StaticFiles(directory="exports"), name="exports")
-app.mount("/charts", StaticFiles(directory="charts"), name="charts")
+# Mount static files with cache headers and range support
+app.mount("/exports", CachedStaticFiles(directory="exports"), name="exports")
+app.mount("/charts", CachedStaticFiles(directory="charts"), name="charts")
+
+record("app_import", time.perf_counter() - PROCESS_STARTED)
+
+# Report time to ready and optionally build agents in the background
+@app.on_event("startup")
+async def startup():
+    record("ready", time.perf_counter() - PROCESS_STARTED)
+    warm_up(research.AGENTS, STARTUP_WARMUP)
+
+# Release the research executor, job workers, page fetcher and chart render processes on shutdown
+@app.on_event("shutdown")
+async def shutdown():
+    shutdown_executor()
+    # The page fetcher only exists if a request loaded it
+    page_fetcher = sys.modules.get("utils.page_fetcher")
+    if page_fetcher is not None:
+        page_fetcher.shutdown_page_fetcher()
+    research.shutdown_agents()
 
 # Root endpoint
 @app.get("/")
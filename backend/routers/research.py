@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Query
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
 import sys
+import json
+import hashlib
+import zipfile
+from io import BytesIO
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import agents
-from agents.general_agent import GeneralAgent
-from agents.research_agent import ResearchAgent
-from agents.export_agent import ExportAgent
+# Agents are imported on first use; see AGENTS below
+from config import EXPORT_MEDIA_TYPES
+from utils.executor import run_blocking
+from utils.jobs import JobManager, QueueFullError
+from utils.http_cache import JSON_RESPONSE_CLASS
+from utils.entity_matcher import EntityMatcher
+from utils.artifact_store import get_artifact_store
+from utils.startup import LazyComponent, startup_report
 
 # Create router
 router = APIRouter(
@@ -24,6 +33,7 @@ class ResearchRequest(BaseModel):
     query: str
     search_type: str = "normal"  # "normal" or "deep"
     site_count: int = 5  # Number of sites to search (5-20)
+    bypass_cache: bool = False  # Skip the LLM completion cache for this request
 
 class ResearchResponse(BaseModel):
     result: str
@@ -31,6 +41,10 @@ class ResearchResponse(BaseModel):
     images: List[str]
     status: str
 
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+
 class ExportRequest(BaseModel):
     content: str
     images: List[str]
@@ -40,10 +54,76 @@ class ExportResponse(BaseModel):
     filepath: str
     status: str
 
-# Initialize agents
-general_agent = GeneralAgent()
-research_agent = ResearchAgent()
-export_agent = ExportAgent()
+class BatchExportRequest(BaseModel):
+    content: str
+    images: List[str]
+    formats: List[str] = ["pdf", "docx", "html"]
+    archive: bool = False  # Return all documents in one zip instead of file paths
+
+# Agent factories import their modules here, so langchain, yfinance, pandas and
+# reportlab load with the first request that needs them rather than at startup
+def _build_general_agent():
+    from agents.general_agent import GeneralAgent
+    return GeneralAgent()
+
+def _build_research_agent():
+    from agents.research_agent import ResearchAgent
+    return ResearchAgent()
+
+def _build_export_agent():
+    from agents.export_agent import ExportAgent
+    return ExportAgent()
+
+AGENTS = {
+    "general": LazyComponent("general_agent", _build_general_agent),
+    "research": LazyComponent("research_agent", _build_research_agent),
+    "export": LazyComponent("export_agent", _build_export_agent)
+}
+
+def _run_general(state):
+    """Job entry point for general research (builds the agent in the worker if needed)"""
+    return AGENTS["general"].get().handle_query(state)
+
+def _run_deep(state):
+    """Job entry point for deep analysis (builds the agent in the worker if needed)"""
+    return AGENTS["research"].get().deep_analysis(state)
+
+# Background jobs for long-running deep research
+job_manager = JobManager()
+
+# Words that route a normal search to the deep analysis agent
+COMPLEX_KEYWORDS = [
+    "analyze", "analyzes", "analyzed", "analyzing", "trend", "trends", "trending",
+    "compare", "compared", "compares", "comparing", "forecast", "forecasts",
+    "forecasting", "technical", "technically"
+]
+complexity_matcher = EntityMatcher([(kw, kw, False) for kw in COMPLEX_KEYWORDS])
+
+def _plan_research(request):
+    """
+    Decide which agent handles a request and clamp its site count
+    
+    Args:
+        request (ResearchRequest): Incoming research request
+        
+    Returns:
+        tuple: ("general" or "complex", site count between 5 and 20)
+    """
+    # Validate site count
+    site_count = max(5, min(20, request.site_count))  # Ensure between 5-20
+    
+    # Determine if this is a forced deep search or check complexity
+    if request.search_type == "deep":
+        analysis_type = "complex"
+    else:
+        # For normal search, still check if query is complex
+        analysis_type = "complex" if complexity_matcher.contains_any(request.query) else "general"
+    
+    return analysis_type, site_count
+
+def _sse(event, data):
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 # Routes
 @router.post("/query", response_model=ResearchResponse)
@@ -52,28 +132,20 @@ async def conduct_research(request: ResearchRequest):
     Conduct research based on the provided query
     """
     try:
-        # Validate site count
-        site_count = max(5, min(20, request.site_count))  # Ensure between 5-20
-        
-        # Determine if this is a forced deep search or check complexity
-        if request.search_type == "deep":
-            analysis_type = "complex"
-        else:
-            # For normal search, still check if query is complex
-            query_lower = request.query.lower()
-            complex_keywords = ["analyze", "trend", "compare", "forecast", "technical"]
-            analysis_type = "complex" if any(kw in query_lower for kw in complex_keywords) else "general"
+        analysis_type, site_count = _plan_research(request)
         
-        # Perform analysis based on type
+        # Perform analysis based on type (in the research executor, off the event loop)
         if analysis_type == "general":
-            result = general_agent.handle_query({
+            result = await run_blocking(_run_general, {
                 "query": request.query,
-                "site_count": site_count
+                "site_count": site_count,
+                "bypass_cache": request.bypass_cache
             })
         else:
-            result = research_agent.deep_analysis({
+            result = await run_blocking(_run_deep, {
                 "query": request.query,
-                "site_count": site_count
+                "site_count": site_count,
+                "bypass_cache": request.bypass_cache
             })
         
         # Extract results
@@ -86,16 +158,136 @@ async def conduct_research(request: ResearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/query/stream")
+async def stream_research(request: ResearchRequest, http_request: Request):
+    """
+    Conduct research and stream the answer as server-sent events
+    
+    Events are sent in this order: "sources", "images" (deep analysis only),
+    one "token" per LLM chunk, then "done" or "error". The stream stops as soon
+    as the client disconnects.
+    """
+    analysis_type, site_count = _plan_research(request)
+    
+    async def events():
+        stream = None
+        try:
+            if analysis_type == "general":
+                general_agent = await AGENTS["general"].aget()
+                prepared = await run_blocking(general_agent.prepare_query, {
+                    "query": request.query,
+                    "site_count": site_count
+                })
+                sources, images, prompt = prepared["sources"], [], prepared["prompt"]
+                yield _sse("sources", sources)
+                stream = general_agent.astream_llm(prompt, bypass=request.bypass_cache)
+            else:
+                # Sources are known up front, so send them before the slow chart work
+                research_agent = await AGENTS["research"].aget()
+                sources = research_agent.get_sources(site_count)
+                yield _sse("sources", sources)
+                
+                market = await run_blocking(research_agent.prepare_charts, request.query)
+                images = market["images"]
+                yield _sse("images", images)
+                if not images:
+                    yield _sse("error", {"detail": "Failed to generate stock charts. Possible network or data issue."})
+                    return
+                prompt = research_agent.build_analysis_prompt(request.query, images, site_count,
+                                                              market["indicators"], market["comparison"])
+                stream = research_agent.astream_llm(prompt, bypass=request.bypass_cache)
+            
+            async for token in stream:
+                if await http_request.is_disconnected():
+                    print("Client disconnected, cancelling research stream")
+                    return
+                yield _sse("token", {"text": token})
+            
+            yield _sse("done", {"status": "success"})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Closing the generator cancels the in-flight LLM request
+            if stream is not None:
+                await stream.aclose()
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_research_job(request: ResearchRequest):
+    """
+    Queue a research request and return its job id immediately
+    """
+    analysis_type, site_count = _plan_research(request)
+    agent_call = _run_general if analysis_type == "general" else _run_deep
+    try:
+        job = job_manager.submit(agent_call, {
+            "query": request.query,
+            "site_count": site_count,
+            "bypass_cache": request.bypass_cache
+        })
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    
+    return {
+        "job_id": job.id,
+        "status": job.status
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_research_job(job_id: str):
+    """
+    Get the status and per-stage progress of a research job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/result", response_model=ResearchResponse)
+async def get_research_job_result(job_id: str):
+    """
+    Get the result of a finished research job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.finished:
+        return JSON_RESPONSE_CLASS(status_code=202, content=job.to_dict())
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=job.error or f"Job {job.status}")
+    
+    return {
+        "result": job.result.get("result", ""),
+        "sources": job.result.get("sources", []),
+        "images": job.result.get("images", []),
+        "status": "success"
+    }
+
+@router.delete("/jobs/{job_id}")
+async def cancel_research_job(job_id: str):
+    """
+    Cancel a queued or running research job
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @router.post("/export", response_model=ExportResponse)
 async def export_report(request: ExportRequest):
     """
     Export research results to PDF or Word document
     """
     try:
+        export_agent = await AGENTS["export"].aget()
         if request.format.lower() == "pdf":
-            filepath = export_agent.export_pdf(request.content, request.images)
+            filepath = await run_blocking(export_agent.export_pdf, request.content, request.images)
         elif request.format.lower() == "docx":
-            filepath = export_agent.export_word(request.content, request.images)
+            filepath = await run_blocking(export_agent.export_word, request.content, request.images)
         else:
             raise HTTPException(status_code=400, detail="Unsupported format")
         
@@ -108,17 +300,128 @@ async def export_report(request: ExportRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/images")
-async def get_images():
+@router.post("/export/batch")
+async def export_batch(request: BatchExportRequest):
     """
-    Get list of available chart images
+    Export research results to several formats in one call
+    
+    Every format is built in parallel from a single markdown parse and a single
+    read of each chart. Returns the file paths, or a zip of all documents when
+    archive is true.
     """
+    formats = [fmt.lower() for fmt in request.formats]
+    if not formats or any(fmt not in EXPORT_MEDIA_TYPES for fmt in formats):
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    
     try:
-        charts_dir = "charts"
-        if not os.path.exists(charts_dir):
-            return {"images": []}
+        export_agent = await AGENTS["export"].aget()
+        if request.archive:
+            documents = await run_blocking(export_agent.render_batch, request.content, request.images, formats)
+            buffer = BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for data, filename in documents.values():
+                    archive.writestr(filename, data)
+            # Every document shares the same content-addressed stem
+            stem = os.path.splitext(next(iter(documents.values()))[1])[0]
+            return Response(content=buffer.getvalue(), media_type="application/zip", headers={
+                "Content-Disposition": f'attachment; filename="{stem}.zip"'
+            })
         
-        images = [os.path.join(charts_dir, f) for f in os.listdir(charts_dir) if f.endswith(('.png', '.jpg'))]
-        return {"images": images}
+        paths = await run_blocking(export_agent.export_batch, request.content, request.images, formats)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Return relative paths for frontend
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return {
+        "files": [{"format": fmt, "filepath": os.path.relpath(path, base_dir)} for fmt, path in paths.items()],
+        "status": "success"
+    }
+
+@router.post("/export/download")
+async def download_report(request: ExportRequest):
+    """
+    Render research results to PDF, Word or HTML in memory and return the document directly
+    """
+    fmt = request.format.lower()
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    
+    try:
+        export_agent = await AGENTS["export"].aget()
+        data, filename = await run_blocking(export_agent.render_document, request.content, request.images, fmt)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return Response(content=data, media_type=EXPORT_MEDIA_TYPES[fmt], headers={
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit/miss counters for the research caches
+    """
+    # The caches are process-wide singletons, so this does not need to build an agent
+    from utils.search_cache import get_search_cache
+    from utils.source_index import get_source_index
+    from utils.llm_cache import get_llm_cache
+    from utils.state_backend import get_state_backend
+    search_cache = get_search_cache()
+    source_index = get_source_index()
+    llm_cache = get_llm_cache()
+    return {
+        "search": search_cache.stats() if search_cache is not None else None,
+        "source_index": source_index.stats() if source_index is not None else None,
+        "llm": llm_cache.stats() if llm_cache is not None else None,
+        "state_backend": get_state_backend().name
+    }
+
+@router.get("/images")
+async def get_images(http_request: Request,
+                     ticker: Optional[str] = None,
+                     chart_type: Optional[str] = None,
+                     limit: int = Query(50, ge=1, le=500),
+                     cursor: Optional[str] = None):
+    """
+    Get a page of available chart images from the chart catalog
+    
+    Results are newest first. Pass next_cursor back as cursor to get the next
+    page; clients that send If-None-Match get a 304 while the catalog is unchanged.
+    """
+    artifacts = get_artifact_store("charts")
+    params = json.dumps([ticker, chart_type, limit, cursor])
+    etag = '"' + hashlib.sha256(f"{artifacts.version()}:{params}".encode()).hexdigest()[:32] + '"'
+    if etag in http_request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    try:
+        items, next_cursor = artifacts.list({"ticker": ticker, "chart_type": chart_type}, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return JSON_RESPONSE_CLASS(content={
+        "images": [item["path"] for item in items],
+        "items": items,
+        "next_cursor": next_cursor
+    }, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+@router.get("/startup")
+async def get_startup_profile():
+    """
+    Get startup timings and which agents have been built
+    
+    Import times are profiled offline with `python utils/startup.py`.
+    """
+    report = startup_report()
+    report["agents"] = {name: component.peek() is not None for name, component in AGENTS.items()}
+    return report
+
+def shutdown_agents():
+    """Stop the job workers and release resources of the agents that were built"""
+    job_manager.shutdown()
+    research_agent = AGENTS["research"].peek()
+    if research_agent is not None:
+        research_agent.chart_renderer.shutdown()
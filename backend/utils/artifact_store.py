@@ -0,0 +1,329 @@
+import os
+import sys
+import json
+import time
+import base64
+import sqlite3
+import threading
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (CACHE_DIR, CHARTS_DIR, EXPORTS_DIR, CHARTS_MAX_BYTES, CHARTS_MAX_COUNT,
+                    EXPORTS_MAX_BYTES, EXPORTS_MAX_COUNT, ARTIFACT_MAX_AGE)
+from utils.state_backend import get_state_backend
+
+class ArtifactStore:
+    """Manifest of the files in a served directory with size/count limits and LRU eviction"""
+    def __init__(self, name, directory, max_bytes=None, max_count=None, max_age=None, manifest_path=None):
+        """
+        Initialize the artifact store
+        
+        Args:
+            name (str): Store name, used for the manifest file
+            directory (str): Directory holding the artifacts
+            max_bytes (int): Total size limit (None for no limit)
+            max_count (int): File count limit (None for no limit)
+            max_age (float): Seconds since last access before an artifact expires (None to keep)
+            manifest_path (str): SQLite manifest file (kept outside the served directory)
+        """
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = manifest_path or os.path.join(CACHE_DIR, f"artifacts_{name}.sqlite3")
+        os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(manifest_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "name TEXT PRIMARY KEY, size INTEGER NOT NULL, created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, metadata TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_accessed ON artifacts (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created_at, name)")
+        # Bumped on every change so listings can be validated without querying them
+        self._conn.execute("CREATE TABLE IF NOT EXISTS store_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO store_state (key, value) VALUES ('version', 0)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pins (name TEXT NOT NULL, owner TEXT NOT NULL, "
+            "expires_at REAL, PRIMARY KEY (name, owner))"
+        )
+        self._conn.commit()
+        self.reconcile()
+
+    def register(self, path, metadata=None):
+        """
+        Record a new or rewritten artifact and enforce the limits
+        
+        Args:
+            path (str): Path of the artifact inside the store directory
+            metadata (dict): Extra fields stored in the manifest (optional)
+            
+        Returns:
+            str: The path
+        """
+        name = os.path.basename(path)
+        now = time.time()
+        size = os.path.getsize(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO artifacts (name, size, created_at, accessed_at, metadata) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET size = excluded.size, accessed_at = excluded.accessed_at, "
+                "metadata = COALESCE(excluded.metadata, artifacts.metadata)",
+                (name, size, now, now, json.dumps(metadata) if metadata is not None else None)
+            )
+            self._evict(now, keep=name)
+            self._bump_version()
+            self._conn.commit()
+        return path
+
+    def touch(self, path):
+        """Mark an artifact as recently used so LRU eviction keeps it"""
+        with self._lock:
+            self._conn.execute("UPDATE artifacts SET accessed_at = ? WHERE name = ?",
+                               (time.time(), os.path.basename(path)))
+            self._conn.commit()
+
+    def resolve(self, path):
+        """
+        Check that a client-supplied path names an artifact of this store
+        
+        Args:
+            path (str): Path to check
+            
+        Returns:
+            str: Real path of the artifact, or None if it lies outside the store directory or is not in the manifest
+        """
+        real = os.path.realpath(path)
+        # Artifacts sit directly in the directory; symlinks and ".." are resolved before comparing
+        if os.path.dirname(real) != os.path.realpath(self.directory):
+            return None
+        with self._lock:
+            known = self._conn.execute("SELECT 1 FROM artifacts WHERE name = ?",
+                                       (os.path.basename(real),)).fetchone()
+        return real if known else None
+
+    def pin(self, paths, owner, ttl=None):
+        """
+        Protect artifacts from eviction while an owner (such as a job) references them
+        
+        Args:
+            paths (list): Artifact paths
+            owner (str): Owner id, used to release the pins
+            ttl (float): Seconds after which the pin lapses even if never released
+        """
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO pins (name, owner, expires_at) VALUES (?, ?, ?)",
+                                   [(os.path.basename(p), owner, expires_at) for p in paths])
+            self._conn.commit()
+
+    def unpin(self, owner):
+        """Release every pin held by an owner"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pins WHERE owner = ?", (owner,))
+            self._conn.commit()
+
+    def evict(self):
+        """Enforce the age, count and size limits now"""
+        with self._lock:
+            self._evict(time.time())
+            self._conn.commit()
+
+    def reconcile(self):
+        """
+        Bring the manifest in line with the directory
+        
+        Indexes files written before the store existed and forgets entries whose
+        files were removed. Runs once at startup; afterwards the manifest is kept
+        up to date as artifacts are written. Workers starting together take
+        turns, so the directory is scanned against a consistent manifest.
+        """
+        with get_state_backend().lock(f"artifacts_{self.name}"):
+            self._reconcile()
+
+    def _reconcile(self):
+        """Scan the directory and update the manifest (caller holds the shared lock)"""
+        now = time.time()
+        on_disk = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith(".tmp") and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    on_disk[entry.name] = (stat.st_size, stat.st_mtime)
+        
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT name FROM artifacts")}
+            missing = known - on_disk.keys()
+            self._conn.executemany("DELETE FROM artifacts WHERE name = ?", [(n,) for n in missing])
+            self._conn.executemany(
+                "INSERT INTO artifacts (name, size, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(n, size, mtime, mtime) for n, (size, mtime) in on_disk.items() if n not in known]
+            )
+            self._evict(now)
+            self._bump_version()
+            self._conn.commit()
+
+    def version(self):
+        """
+        Get the manifest's change counter
+        
+        Returns:
+            int: Value that changes whenever an artifact is added, rewritten or removed
+        """
+        with self._lock:
+            return self._conn.execute("SELECT value FROM store_state WHERE key = 'version'").fetchone()[0]
+
+    def list(self, filters=None, limit=50, cursor=None):
+        """
+        Page through artifacts, newest first, using the manifest index
+        
+        Args:
+            filters (dict): Metadata fields that must match exactly (e.g. ticker, chart_type)
+            limit (int): Page size
+            cursor (str): Opaque cursor from a previous page
+            
+        Returns:
+            tuple: (list of artifact dicts, next cursor or None)
+        """
+        sql = "SELECT name, size, created_at, metadata FROM artifacts"
+        clauses, params = [], []
+        for field, value in (filters or {}).items():
+            if value is not None:
+                clauses.append("json_extract(metadata, ?) = ?")
+                params.extend([f"$.{field}", value])
+        if cursor:
+            created_at, name = self._decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND name < ?))")
+            params.extend([created_at, created_at, name])
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, name DESC LIMIT ?"
+        params.append(limit + 1)
+        
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        
+        items = []
+        for name, size, created_at, metadata in rows[:limit]:
+            item = json.loads(metadata) if metadata else {}
+            item.update({
+                "path": os.path.join(self.directory, name),
+                "size": size,
+                "created_at": created_at
+            })
+            items.append(item)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = self._encode_cursor(last[2], last[0])
+        return items, next_cursor
+
+    def stats(self):
+        """
+        Get the store's current usage
+        
+        Returns:
+            dict: File count, total bytes, pinned count and limits
+        """
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+            pinned = self._conn.execute("SELECT COUNT(DISTINCT name) FROM pins").fetchone()[0]
+        return {
+            "count": count,
+            "bytes": total,
+            "pinned": pinned,
+            "max_count": self.max_count,
+            "max_bytes": self.max_bytes
+        }
+
+    def _encode_cursor(self, created_at, name):
+        """Encode a page position as an opaque cursor"""
+        return base64.urlsafe_b64encode(json.dumps([created_at, name]).encode()).decode()
+
+    def _decode_cursor(self, cursor):
+        """Decode a cursor from _encode_cursor"""
+        try:
+            created_at, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return float(created_at), str(name)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def _bump_version(self):
+        """Record a change to the manifest (caller holds the lock)"""
+        self._conn.execute("UPDATE store_state SET value = value + 1 WHERE key = 'version'")
+
+    def _evict(self, now, keep=None):
+        """Delete expired, then least recently used unpinned artifacts (caller holds the lock)"""
+        # Pins left behind by a process that exited lapse on their own
+        self._conn.execute("DELETE FROM pins WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        
+        unpinned = ("SELECT name, size FROM artifacts WHERE name NOT IN (SELECT name FROM pins) "
+                    "AND name IS NOT ?")
+        victims = []
+        
+        if self.max_age:
+            victims.extend(self._conn.execute(unpinned + " AND accessed_at < ?", (keep, now - self.max_age)))
+        
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts").fetchone()
+        count -= len(victims)
+        total -= sum(size for _, size in victims)
+        over_count = self.max_count is not None and count > self.max_count
+        over_bytes = self.max_bytes is not None and total > self.max_bytes
+        
+        if over_count or over_bytes:
+            expired = {name for name, _ in victims}
+            for name, size in self._conn.execute(unpinned + " ORDER BY accessed_at", (keep,)):
+                if not ((self.max_count is not None and count > self.max_count) or
+                        (self.max_bytes is not None and total > self.max_bytes)):
+                    break
+                if name in expired:
+                    continue
+                victims.append((name, size))
+                count -= 1
+                total -= size
+        
+        for name, _ in victims:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not evict {name} from {self.name}: {str(e)}")
+                continue
+            self._conn.execute("DELETE FROM artifacts WHERE name = ?", (name,))
+        
+        if victims:
+            self._bump_version()
+            print(f"Evicted {len(victims)} artifacts from {self.name}")
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_artifact_store(name):
+    """
+    Get the process-wide store for a served directory
+    
+    Args:
+        name (str): "charts" or "exports"
+        
+    Returns:
+        ArtifactStore: The shared store
+    """
+    settings = {
+        "charts": (CHARTS_DIR, CHARTS_MAX_BYTES, CHARTS_MAX_COUNT),
+        "exports": (EXPORTS_DIR, EXPORTS_MAX_BYTES, EXPORTS_MAX_COUNT)
+    }
+    with _stores_lock:
+        if name not in _stores:
+            directory, max_bytes, max_count = settings[name]
+            _stores[name] = ArtifactStore(name, directory, max_bytes=max_bytes or None,
+                                          max_count=max_count or None, max_age=ARTIFACT_MAX_AGE or None)
+        return _stores[name]
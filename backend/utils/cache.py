@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class MemoryCache:
+    """Thread-safe in-memory LRU cache with TTL and entry/byte limits"""
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries (int): Maximum number of entries kept
+            max_bytes (int): Maximum total size of the stored values (optional)
+            ttl (float): Seconds an entry stays valid (None for no expiry)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a value and mark it as recently used
+        
+        Returns:
+            Any: The cached value, or None on a miss or expiry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size=None, ttl=None):
+        """
+        Store a value, evicting least recently used entries when over the limits
+        
+        Args:
+            key (str): Cache key
+            value (Any): Value to store
+            size (int): Size in bytes used for the byte limit (estimated if omitted)
+            ttl (float): Per-entry TTL overriding the cache default
+        """
+        if size is None:
+            size = len(json.dumps(value, default=str))
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or
+                                     (self.max_bytes and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def items(self):
+        """
+        Snapshot of the live entries
+        
+        Returns:
+            list: (key, value) pairs from least to most recently used
+        """
+        now = time.time()
+        with self._lock:
+            return [(k, v) for k, (v, expires_at, _) in self._entries.items()
+                    if expires_at is None or expires_at >= now]
+
+    def _remove(self, key):
+        """Remove an entry (caller holds the lock)"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteCache:
+    """Persistent key/value cache in a SQLite file with TTL and LRU eviction"""
+    def __init__(self, path, max_entries=10000, max_bytes=None, ttl=None):
+        """
+        Initialize the cache
+        
+        Args:
+            path (str): SQLite database file
+            max_entries (int): Maximum number of rows kept
+            max_bytes (int): Maximum total size of the stored values (optional)
+            ttl (float): Seconds an entry stays valid (None for no expiry)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Get a value and refresh its access time
+        
+        Returns:
+            Any: The cached value, or None on a miss or expiry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key, value, size=None, ttl=None):
+        """
+        Store a JSON-serializable value and evict old entries when over the limits
+        
+        Args:
+            key (str): Cache key
+            value (Any): JSON-serializable value
+            size (int): Ignored, the serialized size is used
+            ttl (float): Per-entry TTL overriding the cache default
+        """
+        payload = json.dumps(value, default=str)
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired rows, then least recently used rows over the limits (caller holds the lock)"""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        if self.max_bytes and total > self.max_bytes:
+            # Walk from the oldest entry until enough bytes are freed
+            excess = total - self.max_bytes
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+                if excess <= 0:
+                    break
+                victims.append((key,))
+                excess -= size
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+class TieredCache:
+    """In-memory LRU tier in front of an optional persistent tier, with hit/miss counters"""
+    def __init__(self, memory, persistent=None):
+        """
+        Initialize the tiered cache
+        
+        Args:
+            memory (MemoryCache): Fast first tier
+            persistent: Durable second tier such as SQLiteCache or RedisCache (optional)
+        """
+        self.memory = memory
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "sets": 0}
+
+    def get(self, key, count=True):
+        """
+        Look a key up in each tier, promoting persistent hits into memory
+        
+        Args:
+            key (str): Cache key
+            count (bool): Record the lookup in the hit/miss counters
+            
+        Returns:
+            Any: The cached value, or None on a miss
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            if count:
+                self._count("memory_hits")
+            return value
+        
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except Exception as e:
+                print(f"Persistent cache read error: {str(e)}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                if count:
+                    self._count("persistent_hits")
+                return value
+        
+        if count:
+            self._count("misses")
+        return None
+
+    def set(self, key, value, ttl=None):
+        """Store a value in every tier"""
+        self.memory.set(key, value, ttl=ttl)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, value, ttl=ttl)
+            except Exception as e:
+                print(f"Persistent cache write error: {str(e)}")
+        self._count("sets")
+
+    def delete(self, key):
+        """Remove a key from every tier"""
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def clear(self):
+        """Remove every entry from every tier"""
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self):
+        """
+        Get hit/miss counters
+        
+        Returns:
+            dict: Counters, hit ratio and current memory tier size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
@@ -0,0 +1,233 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CHART_RENDER_WORKERS
+
+def _new_figure(figsize):
+    """Create a standalone Figure with its own Agg canvas (no global pyplot state)"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def _format_date_axis(ax, monthly=False):
+    """Apply readable, rotated date labels to an axis"""
+    import matplotlib.dates as mdates
+    if monthly:
+        # Show one label per month to avoid overcrowding
+        ax.xaxis.set_major_locator(mdates.MonthLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
+def render_price_chart(path, ticker, dates, close, volume=None, sma_fast=None, sma_slow=None,
+                       bb_upper=None, bb_lower=None):
+    """
+    Render a price trend chart with indicator overlays and a volume panel
+    
+    Args:
+        path (str): Output PNG path
+        ticker (str): Ticker symbol used in the title
+        dates (numpy.ndarray): datetime64 bar timestamps
+        close (numpy.ndarray): Close prices
+        volume (numpy.ndarray): Traded volume (optional)
+        sma_fast (numpy.ndarray): 20-day simple moving average (optional)
+        sma_slow (numpy.ndarray): 50-day simple moving average (optional)
+        bb_upper (numpy.ndarray): Upper Bollinger band (optional)
+        bb_lower (numpy.ndarray): Lower Bollinger band (optional)
+        
+    Returns:
+        str: Path to the rendered chart
+    """
+    fig = _new_figure((12, 10))
+    price_ax, volume_ax = fig.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1]})
+    
+    if bb_upper is not None and bb_lower is not None:
+        price_ax.fill_between(dates, bb_lower, bb_upper, color='tab:blue', alpha=0.12,
+                              linewidth=0, label="Bollinger Bands (20, 2)")
+    price_ax.plot(dates, close, label="Close")
+    if sma_fast is not None:
+        price_ax.plot(dates, sma_fast, linewidth=1, label="SMA 20")
+    if sma_slow is not None:
+        price_ax.plot(dates, sma_slow, linewidth=1, label="SMA 50")
+    price_ax.set_title(f"{ticker} Price Trend (Last 5 Months)")
+    price_ax.set_ylabel("Price ($)")
+    price_ax.grid(True)
+    price_ax.legend(loc='upper left')
+    # Dates are shown on the volume panel below
+    price_ax.tick_params(labelbottom=False)
+    
+    if volume is not None:
+        # A single stepped polygon instead of one Rectangle artist per trading day
+        volume_ax.fill_between(dates, volume, step='mid', color='gray', alpha=0.5, linewidth=0)
+        volume_ax.set_ylim(bottom=0)
+        volume_ax.set_ylabel("Volume")
+        volume_ax.set_title("Trading Volume")
+    else:
+        volume_ax.set_axis_off()
+    _format_date_axis(volume_ax, monthly=True)
+    
+    # Add more space at the bottom for the rotated date labels
+    fig.tight_layout()
+    fig.subplots_adjust(bottom=0.2)
+    fig.savefig(path, format='png')
+    return path
+
+def render_comparison_chart(path, series):
+    """
+    Render normalized prices of several assets on one chart
+    
+    Args:
+        path (str): Output PNG path
+        series (dict): Ticker to (dates, normalized values) arrays
+        
+    Returns:
+        str: Path to the rendered chart
+    """
+    fig = _new_figure((12, 8))
+    ax = fig.subplots()
+    
+    for ticker, (dates, values) in series.items():
+        ax.plot(dates, values, label=ticker)
+    
+    ax.set_title("Price Comparison (Normalized to 100)")
+    ax.set_ylabel("Normalized Price")
+    ax.grid(True)
+    ax.legend()
+    _format_date_axis(ax)
+    
+    fig.tight_layout()
+    fig.savefig(path, format='png')
+    return path
+
+def render_correlation_heatmap(path, tickers, correlation, title="Return Correlation"):
+    """
+    Render a correlation matrix as a heatmap, readable for hundreds of assets
+    
+    Args:
+        path (str): Output PNG path
+        tickers (list): Asset names in matrix order
+        correlation (numpy.ndarray): Square correlation matrix
+        title (str): Chart title
+        
+    Returns:
+        str: Path to the rendered chart
+    """
+    count = len(tickers)
+    fig = _new_figure((12, 10))
+    ax = fig.subplots()
+    
+    image = ax.imshow(correlation, cmap='RdYlGn', vmin=-1, vmax=1, interpolation='nearest')
+    fig.colorbar(image, ax=ax, shrink=0.8, label="Correlation of returns")
+    # Label every asset while the labels still fit, then only every n-th one
+    step = max(1, count // 50)
+    ticks = range(0, count, step)
+    fontsize = 10 if count <= 20 else 6
+    ax.set_xticks(ticks)
+    ax.set_xticklabels([tickers[i] for i in ticks], rotation=90, fontsize=fontsize)
+    ax.set_yticks(ticks)
+    ax.set_yticklabels([tickers[i] for i in ticks], fontsize=fontsize)
+    if count <= 12:
+        for i in range(count):
+            for j in range(count):
+                ax.text(j, i, f"{correlation[i, j]:.2f}", ha='center', va='center', fontsize=8)
+    ax.set_title(f"{title} ({count} assets)")
+    
+    fig.tight_layout()
+    fig.savefig(path, format='png')
+    return path
+
+class ChartRenderer:
+    """Renders a request's charts in parallel across a process pool"""
+    def __init__(self, workers=None):
+        """
+        Initialize the renderer
+        
+        Args:
+            workers (int): Number of render processes (1 renders in-process)
+        """
+        self.workers = max(1, workers or CHART_RENDER_WORKERS or os.cpu_count() or 1)
+        self._pool = None
+        # Request threads and job workers share one renderer and must share one pool
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        """Lazily start the process pool"""
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawn rather than fork: the server process is multi-threaded
+                context = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        """Shut down a broken pool so the next batch starts a fresh one"""
+        if pool is None:
+            return
+        with self._pool_lock:
+            # Another thread may already have replaced it
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, jobs):
+        """
+        Render a batch of charts
+        
+        Args:
+            jobs (list): (render function, kwargs) pairs using the module-level renderers
+            
+        Returns:
+            list: Paths of successfully rendered charts, in job order
+        """
+        if not jobs:
+            return []
+        
+        if self.workers == 1 or len(jobs) == 1:
+            return [p for p in (self._render_one(func, kwargs) for func, kwargs in jobs) if p]
+        
+        pool = None
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(func, **kwargs) for func, kwargs in jobs]
+        except BrokenProcessPool:
+            print("Chart render pool is broken, rendering in-process")
+            self._discard_pool(pool)
+            return [p for p in (self._render_one(func, kwargs) for func, kwargs in jobs) if p]
+        
+        paths = []
+        for (func, kwargs), future in zip(jobs, futures):
+            try:
+                paths.append(future.result())
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                path = self._render_one(func, kwargs)
+                if path:
+                    paths.append(path)
+            except Exception as e:
+                print(f"Chart Error for {kwargs.get('path')}: {str(e)}")
+        return paths
+
+    def _render_one(self, func, kwargs):
+        """Render a single chart in the current process"""
+        try:
+            return func(**kwargs)
+        except Exception as e:
+            print(f"Chart Error for {kwargs.get('path')}: {str(e)}")
+            return None
+
+    def shutdown(self):
+        """Stop the render processes"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,127 @@
+import os
+import sys
+import uuid
+import struct
+import hashlib
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CHARTS_DIR
+from utils.artifact_store import get_artifact_store
+
+# Bump when the chart layout changes so previously stored charts are not reused
+CHART_STYLE_VERSION = "2"
+
+class ChartStore:
+    """Content-addressed chart files: same inputs, same path, rendered once"""
+    def __init__(self, directory=None, artifacts=None):
+        """
+        Initialize the chart store
+        
+        Args:
+            directory (str): Directory holding the chart PNGs
+            artifacts (ArtifactStore): Manifest enforcing the directory's size limits
+        """
+        self.directory = directory or CHARTS_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.artifacts = artifacts if artifacts is not None else get_artifact_store("charts")
+
+    def key(self, ticker, chart_type, start, end, *arrays):
+        """
+        Hash everything that determines a chart's pixels
+        
+        Args:
+            ticker (str): Ticker symbol (or a joined list for multi-asset charts)
+            chart_type (str): Chart type such as "price_trend" or "comparison"
+            start (str): First date in the chart window
+            end (str): Last date in the chart window
+            *arrays: NumPy arrays with the plotted data
+            
+        Returns:
+            str: Hex digest identifying the chart
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{CHART_STYLE_VERSION}|{ticker}|{chart_type}|{start}|{end}".encode())
+        for array in arrays:
+            if array is None:
+                digest.update(b"|none")
+                continue
+            digest.update(f"|{array.dtype}|{array.shape}".encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def path(self, ticker, chart_type, key):
+        """
+        Build the final path for a chart
+        
+        Args:
+            ticker (str): Ticker symbol
+            chart_type (str): Chart type
+            key (str): Digest from key()
+            
+        Returns:
+            str: Path inside the charts directory
+        """
+        # Multi-asset charts join many symbols; keep filenames short
+        slug = ticker.lower().replace('-', '_').replace(',', '_')[:40]
+        return os.path.join(self.directory, f"{slug}_{chart_type}_{key[:16]}.png")
+
+    def get(self, ticker, chart_type, key):
+        """
+        Look up an already rendered chart
+        
+        Returns:
+            str: Path of the existing PNG, or None if it must be rendered
+        """
+        path = self.path(ticker, chart_type, key)
+        if not os.path.exists(path):
+            return None
+        self.artifacts.touch(path)
+        return path
+
+    def temp_path(self, final_path):
+        """
+        Get a private temporary path to render into
+        
+        Args:
+            final_path (str): Path the chart will be published under
+            
+        Returns:
+            str: Unique path in the same directory (so the final rename is atomic)
+        """
+        return f"{final_path}.{uuid.uuid4().hex}.tmp"
+
+    def commit(self, temp_path, final_path, metadata=None):
+        """
+        Publish a rendered chart atomically and add it to the catalog
+        
+        Args:
+            temp_path (str): Path the chart was rendered to
+            final_path (str): Content-addressed destination
+            metadata (dict): Catalog fields such as ticker and chart_type (optional)
+            
+        Returns:
+            str: The final path
+        """
+        width, height = self._png_size(temp_path)
+        os.replace(temp_path, final_path)
+        return self.artifacts.register(final_path, {**(metadata or {}), "width": width, "height": height})
+
+    def _png_size(self, path):
+        """
+        Read a PNG's pixel dimensions from its header
+        
+        Returns:
+            tuple: (width, height), or (None, None) if the file is not a PNG
+        """
+        with open(path, 'rb') as f:
+            header = f.read(24)
+        if len(header) < 24 or header[:8] != b'\x89PNG\r\n\x1a\n':
+            return None, None
+        return struct.unpack('>II', header[16:24])
+
+    def discard(self, temp_path):
+        """Remove a temporary file left by a failed render"""
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
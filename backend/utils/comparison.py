@@ -0,0 +1,220 @@
+import os
+import sys
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import COMPARISON_MIN_COVERAGE, COMPARISON_BENCHMARK, COMPARISON_SUMMARY_ROWS
+
+# Trailing windows (in bars) blended into the relative-strength score; None is the full period
+RELATIVE_STRENGTH_WINDOWS = (21, 63, None)
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+def align_prices(closes, min_coverage=None):
+    """
+    Align the close prices of many assets into one matrix
+    
+    Dates are the union of every asset's bars and gaps are forward-filled.
+    Dates on which no more than half of the assets actually traded are then
+    dropped, so next to equities a weekend crypto move lands in Monday's
+    return instead of adding two days of zero returns to every stock.
+    
+    Args:
+        closes (pandas.DataFrame): One close-price column per asset, NaN where it has no bar
+        min_coverage (float): Share of the kept dates an asset must have traded on
+        
+    Returns:
+        tuple: (datetime64 dates, ticker list, float64 prices of shape dates x assets)
+    """
+    min_coverage = COMPARISON_MIN_COVERAGE if min_coverage is None else min_coverage
+    closes = closes.sort_index()
+    closes = closes[~closes.index.duplicated(keep="last")]
+    values = closes.to_numpy(dtype=np.float64)
+    tickers = [str(t) for t in closes.columns]
+    if not values.size:
+        return closes.index.to_numpy(), tickers, values.reshape(len(closes), len(tickers))
+    
+    traded = np.isfinite(values) & (values > 0)
+    values = np.where(traded, values, np.nan)
+    rows = traded.sum(axis=1) * 2 > traded.shape[1]
+    
+    # Leave out assets that are missing from too much of the common calendar
+    coverage = traded[rows].mean(axis=0) if rows.any() else np.zeros(len(tickers))
+    keep = coverage >= min_coverage
+    for ticker in np.asarray(tickers)[~keep]:
+        print(f"Comparison: leaving out {ticker} (traded on too few dates)")
+    values, tickers = values[:, keep], [t for t, k in zip(tickers, keep) if k]
+    
+    # Forward fill: each cell takes the value at the last row its asset traded on
+    last = np.where(np.isfinite(values), np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    filled = values[last, np.arange(values.shape[1])]
+    
+    # Start once every remaining asset has a price
+    rows &= np.isfinite(filled).all(axis=1)
+    return closes.index.to_numpy()[rows], tickers, filled[rows]
+
+def periods_per_year(dates):
+    """Estimate bars per year from the dates themselves, so any interval or calendar annualizes correctly"""
+    if len(dates) < 2:
+        return 252.0
+    span = (dates[-1] - dates[0]) / np.timedelta64(1, "s")
+    return (len(dates) - 1) / span * SECONDS_PER_YEAR if span > 0 else 252.0
+
+def _percentile_ranks(values):
+    """Rank each row's values from 0 (lowest) to 1 (highest)"""
+    ranks = np.argsort(np.argsort(values, axis=-1, kind="stable"), axis=-1, kind="stable")
+    return ranks / max(values.shape[-1] - 1, 1)
+
+class ComparisonResult:
+    """Aligned prices and return statistics for a set of assets"""
+    def __init__(self, dates, tickers, prices, benchmark=None):
+        """
+        Compute the statistics
+        
+        Args:
+            dates (numpy.ndarray): datetime64 dates of the aligned rows
+            tickers (list): Asset names, one per column
+            prices (numpy.ndarray): Aligned close prices of shape dates x assets
+            benchmark (str): Ticker to measure beta against (an equal-weighted basket when absent)
+        """
+        self.dates = dates
+        self.tickers = tickers
+        self.prices = prices
+        self.returns = prices[1:] / prices[:-1] - 1
+        self.periods_per_year = periods_per_year(dates)
+        
+        centered = self.returns - self.returns.mean(axis=0)
+        self.covariance = centered.T @ centered / max(len(self.returns) - 1, 1)
+        std = np.sqrt(np.diag(self.covariance))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.correlation = self.covariance / np.outer(std, std)
+        np.fill_diagonal(self.correlation, 1.0)
+        self.volatility = std * np.sqrt(self.periods_per_year)
+        self.total_return = prices[-1] / prices[0] - 1
+        
+        if benchmark in tickers:
+            self.benchmark = benchmark
+            market = self.returns[:, tickers.index(benchmark)]
+        else:
+            self.benchmark = "equal-weighted basket"
+            market = self.returns.mean(axis=1)
+        market = market - market.mean()
+        variance = market @ market
+        self.beta = centered.T @ market / variance if variance else np.full(len(tickers), np.nan)
+        
+        # Relative strength: average percentile rank of trailing returns over several windows
+        windows = [min(w or len(prices) - 1, len(prices) - 1) for w in RELATIVE_STRENGTH_WINDOWS]
+        self.trailing_returns = np.stack([prices[-1] / prices[-1 - w] - 1 for w in windows])
+        self.strength = _percentile_ranks(self.trailing_returns).mean(axis=0)
+        self.ranking = np.argsort(-self.strength, kind="stable")
+
+    @property
+    def normalized(self):
+        """Prices rebased to 100 on the first aligned date"""
+        return self.prices / self.prices[0] * 100
+
+    def correlated_pairs(self, count=5, most=True):
+        """
+        Find the most (or least) correlated pairs of assets
+        
+        Args:
+            count (int): Number of pairs
+            most (bool): Highest correlations first when True, lowest when False
+            
+        Returns:
+            list: (ticker, ticker, correlation) tuples
+        """
+        upper_i, upper_j = np.triu_indices(len(self.tickers), k=1)
+        values = self.correlation[upper_i, upper_j]
+        valid = np.flatnonzero(np.isfinite(values))
+        if not len(valid):
+            return []
+        keys = -values[valid] if most else values[valid]
+        count = min(count, len(valid))
+        top = valid[np.argpartition(keys, count - 1)[:count]]
+        top = top[np.argsort(-values[top] if most else values[top], kind="stable")]
+        return [(self.tickers[upper_i[k]], self.tickers[upper_j[k]], float(values[k])) for k in top]
+
+    def heatmap_order(self):
+        """
+        Order assets so that similar ones sit next to each other on a heatmap
+        
+        Returns:
+            numpy.ndarray: Column order, sorted along the correlation matrix's leading eigenvector
+        """
+        matrix = np.nan_to_num(self.correlation)
+        _, vectors = np.linalg.eigh(matrix)
+        return np.argsort(vectors[:, -1], kind="stable")
+
+def compare_assets(closes, benchmark=None, min_coverage=None):
+    """
+    Align and compare the assets of a close-price table
+    
+    Args:
+        closes (pandas.DataFrame): One close-price column per asset
+        benchmark (str): Ticker for beta (COMPARISON_BENCHMARK by default)
+        min_coverage (float): Share of dates an asset must have traded on
+        
+    Returns:
+        ComparisonResult: Statistics, or None with fewer than two assets or three dates
+    """
+    dates, tickers, prices = align_prices(closes, min_coverage)
+    if len(tickers) < 2 or len(dates) < 3:
+        return None
+    return ComparisonResult(dates, tickers, prices, benchmark or COMPARISON_BENCHMARK or None)
+
+def format_comparison_summary(result, max_rows=None):
+    """
+    Render a comparison as compact markdown for the analysis prompt
+    
+    Args:
+        result (ComparisonResult): Output of compare_assets
+        max_rows (int): Assets listed in the ranking table (the strongest and weakest when there are more)
+        
+    Returns:
+        str: Markdown ranking table and correlation highlights, or an empty string
+    """
+    if result is None:
+        return ""
+    max_rows = max_rows or COMPARISON_SUMMARY_ROWS
+    order = result.ranking
+    if len(order) > max_rows:
+        order = np.concatenate((order[:max_rows - max_rows // 2], order[-(max_rows // 2):]))
+    
+    start, end = str(result.dates[0])[:10], str(result.dates[-1])[:10]
+    lines = [
+        f"{len(result.tickers)} assets, {len(result.dates)} aligned dates from {start} to {end}; "
+        f"beta vs {result.benchmark}",
+        "",
+        "| Rank | Ticker | Return % | 1m % | 3m % | Volatility % | Beta | Strength |",
+        "|---|---|---|---|---|---|---|---|"
+    ]
+    positions = np.empty(len(result.ranking), dtype=np.int64)
+    positions[result.ranking] = np.arange(1, len(result.ranking) + 1)
+    for i in order:
+        cells = [
+            str(positions[i]), result.tickers[i],
+            f"{result.total_return[i] * 100:+.1f}",
+            f"{result.trailing_returns[0, i] * 100:+.1f}",
+            f"{result.trailing_returns[1, i] * 100:+.1f}",
+            f"{result.volatility[i] * 100:.1f}",
+            "n/a" if not np.isfinite(result.beta[i]) else f"{result.beta[i]:.2f}",
+            f"{result.strength[i]:.2f}"
+        ]
+        lines.append("| " + " | ".join(cells) + " |")
+    if len(order) < len(result.ranking):
+        lines.append(f"({len(result.ranking) - len(order)} mid-ranked assets omitted)")
+    
+    def pairs(found):
+        return ", ".join(f"{a}/{b} {c:.2f}" for a, b, c in found)
+    
+    pair_total = len(result.tickers) * (len(result.tickers) - 1) // 2
+    lines.append("")
+    if pair_total <= 5:
+        lines.append("Correlations: " + pairs(result.correlated_pairs(pair_total)))
+    else:
+        lines.append("Most correlated: " + pairs(result.correlated_pairs(5, most=True)))
+        lines.append("Least correlated: " + pairs(result.correlated_pairs(5, most=False)))
+    return "\n".join(lines)
@@ -0,0 +1,286 @@
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONTEXT_OUTPUT_RESERVE, CONTEXT_SOURCE_BUDGET, CONTEXT_CHUNK_WORDS
+from utils.search_cache import STOP_WORDS
+
+# Optional exact tokenizer; the heuristic below is used without it
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Context windows of the models this app is configured with
+MODEL_CONTEXT_WINDOWS = {
+    "llama3-70b-8192": 8192,
+    "llama3-8b-8192": 8192,
+    "mixtral-8x7b-32768": 32768,
+    "gemma-7b-it": 8192,
+    "gemma2-9b-it": 8192,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TERM_RE = re.compile(r"\w+")
+_TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_WINDOW_SUFFIX_RE = re.compile(r"-(\d{4,6})$")
+
+def context_window(model):
+    """
+    Get a model's context window in tokens
+    
+    Unknown models fall back to a trailing size in the name (e.g. "-32768"),
+    then to DEFAULT_CONTEXT_WINDOW.
+    
+    Args:
+        model (str): Model name
+        
+    Returns:
+        int: Context window size
+    """
+    if model in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model]
+    match = _WINDOW_SUFFIX_RE.search(model or "")
+    return int(match.group(1)) if match else DEFAULT_CONTEXT_WINDOW
+
+class TokenCounter:
+    """Count tokens with tiktoken when installed, otherwise estimate them"""
+    _encodings = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model):
+        """
+        Initialize the counter
+        
+        Args:
+            model (str): Model name; non-OpenAI models are approximated with cl100k_base
+        """
+        self.model = model
+        self.encoding = self._load_encoding()
+
+    def count(self, text):
+        """
+        Count the tokens in a text
+        
+        Returns:
+            int: Token count (an upper-leaning estimate without tiktoken)
+        """
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        # Word pieces and punctuation, with long words split roughly every 4 characters
+        pieces = _TOKEN_PIECE_RE.findall(text)
+        return sum(1 + len(p) // 5 for p in pieces)
+
+    def _load_encoding(self):
+        """Load and share the tiktoken encoding, or None if unavailable"""
+        if tiktoken is None:
+            return None
+        with self._lock:
+            if "cl100k_base" not in self._encodings:
+                try:
+                    self._encodings["cl100k_base"] = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    print(f"tiktoken unavailable, estimating token counts: {str(e)}")
+                    self._encodings["cl100k_base"] = None
+            return self._encodings["cl100k_base"]
+
+def tokenize_terms(text):
+    """Lowercase content terms of a text, without stop words"""
+    return [t for t in _TERM_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+def chunk_text(text, max_words=None):
+    """
+    Split text into paragraph-aligned chunks of at most max_words words
+    
+    Args:
+        text (str): Source text
+        max_words (int): Chunk size limit
+        
+    Returns:
+        list: Chunk strings in document order
+    """
+    max_words = max_words or CONTEXT_CHUNK_WORDS
+    chunks, current, size = [], [], 0
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if current and size + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        # Paragraphs longer than a chunk are split on their own
+        while len(words) > max_words:
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        current.extend(words)
+        size += len(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def bm25_scores(query, documents):
+    """
+    Score documents against a query with BM25
+    
+    Only query terms are counted, so the term-frequency matrix is
+    documents x query terms and is built with one bincount.
+    
+    Args:
+        query (str): Query text
+        documents (list): Document strings
+        
+    Returns:
+        numpy.ndarray: One score per document
+    """
+    terms = list(dict.fromkeys(tokenize_terms(query)))
+    n_docs = len(documents)
+    if not terms or not n_docs:
+        return np.zeros(n_docs)
+    
+    term_ids = {t: i for i, t in enumerate(terms)}
+    doc_terms = [tokenize_terms(d) for d in documents]
+    lengths = np.fromiter((len(t) for t in doc_terms), dtype=np.float64, count=n_docs)
+    
+    # Flatten (document, term) hits and count them in a single pass
+    doc_index, term_index = [], []
+    for i, tokens in enumerate(doc_terms):
+        for token in tokens:
+            j = term_ids.get(token)
+            if j is not None:
+                doc_index.append(i)
+                term_index.append(j)
+    flat = np.asarray(doc_index, dtype=np.int64) * len(terms) + np.asarray(term_index, dtype=np.int64)
+    tf = np.bincount(flat, minlength=n_docs * len(terms)).reshape(n_docs, len(terms)).astype(np.float64)
+    
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    avg_length = lengths.mean() or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length)
+    return (tf * (BM25_K1 + 1) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+class ContextBuilder:
+    """
+    Pack the most query-relevant parts of the sources into a model's token budget
+    
+    Sources are split into chunks, ranked with BM25 against the query and added
+    greedily until the budget is spent. Chunks are then regrouped by source in
+    their original order so the prompt still reads naturally.
+    """
+    def __init__(self, model, output_reserve=None, source_budget=None, chunk_words=None):
+        """
+        Initialize the builder
+        
+        Args:
+            model (str): Model the prompt is for
+            output_reserve (int): Tokens kept free for the completion
+            source_budget (int): Maximum tokens of source context (0 fills the window)
+            chunk_words (int): Chunk size in words
+        """
+        self.model = model
+        self.window = context_window(model)
+        self.output_reserve = CONTEXT_OUTPUT_RESERVE if output_reserve is None else output_reserve
+        self.source_budget = CONTEXT_SOURCE_BUDGET if source_budget is None else source_budget
+        self.chunk_words = chunk_words or CONTEXT_CHUNK_WORDS
+        self.counter = TokenCounter(model)
+
+    def count(self, text):
+        """Count a text's tokens for this builder's model"""
+        return self.counter.count(text)
+
+    def budget_for(self, template):
+        """
+        Get the tokens left for context once the rest of the prompt is in place
+        
+        Args:
+            template (str): The prompt without its context
+            
+        Returns:
+            int: Token budget for the context (never negative)
+        """
+        available = self.window - self.output_reserve - self.count(template)
+        if self.source_budget:
+            available = min(available, self.source_budget)
+        return max(0, available)
+
+    def build(self, query, sources, budget):
+        """
+        Format the most relevant source chunks within a token budget
+        
+        Args:
+            query (str): Research query the chunks are ranked against
+            sources (list): Dicts with title, url and content
+            budget (int): Token budget for the formatted context
+            
+        Returns:
+            str: Numbered source blocks, or an empty string if nothing fits
+        """
+        chunks, owners = [], []
+        for i, source in enumerate(sources):
+            for chunk in chunk_text(source.get('content') or '', self.chunk_words):
+                chunks.append(chunk)
+                owners.append(i)
+        if not chunks or budget <= 0:
+            return ""
+        
+        scores = bm25_scores(query, chunks)
+        owners = np.asarray(owners)
+        # Highest score first; earlier search results break ties
+        order = np.lexsort((np.arange(len(chunks)), owners, -scores))
+        
+        headers = [f"[{i + 1}] {s.get('title', '')} ({s.get('url', '')})" for i, s in enumerate(sources)]
+        chunk_tokens = [self.count(c) + 1 for c in chunks]
+        selected = set()
+        used_sources = set()
+        spent = 0
+        for idx in order:
+            owner = owners[idx]
+            cost = chunk_tokens[idx]
+            if owner not in used_sources:
+                cost += self.count(headers[owner]) + 2
+            if spent + cost > budget:
+                continue
+            selected.add(int(idx))
+            used_sources.add(owner)
+            spent += cost
+        
+        grouped = {}
+        for j in sorted(selected):
+            grouped.setdefault(int(owners[j]), []).append(chunks[j])
+        blocks = [headers[i] + "\n" + "\n".join(grouped[i]) for i in sorted(grouped)]
+        print(f"Context: {len(selected)}/{len(chunks)} chunks from {len(blocks)} sources, "
+              f"~{spent}/{budget} tokens")
+        return "\n\n".join(blocks)
+
+    def fit(self, text, budget):
+        """
+        Trim text to a token budget, dropping whole lines from the end
+        
+        Args:
+            text (str): Text to fit
+            budget (int): Token budget
+            
+        Returns:
+            str: The text, shortened if needed
+        """
+        if self.count(text) <= budget:
+            return text
+        kept, spent = [], 0
+        for line in text.split("\n"):
+            cost = self.count(line) + 1
+            if spent + cost > budget:
+                break
+            kept.append(line)
+            spent += cost
+        return "\n".join(kept)
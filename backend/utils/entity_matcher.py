@@ -0,0 +1,213 @@
+import os
+import sys
+import pickle
+import hashlib
+import threading
+from collections import deque
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SYMBOLS_FILE, CACHE_DIR
+
+# Bump when the automaton layout changes so stale cache files are ignored
+MATCHER_VERSION = "2"
+ENTITY_CACHE_DIR = os.path.join(CACHE_DIR, "entities")
+
+def _lower(text):
+    """Lowercase text without changing its length, so match offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+def _is_word_char(c):
+    return c.isalnum() or c == "_"
+
+class EntityMatcher:
+    """
+    Aho-Corasick matcher for many names at once
+    
+    Every pattern is found in a single pass over the query, so lookup costs the
+    same per character however many patterns are loaded. Matches must sit on
+    word boundaries ("metadata" does not match "meta"). Case-sensitive patterns,
+    such as bare ticker symbols, match only as written.
+    """
+    def __init__(self, patterns):
+        """
+        Build the automaton
+        
+        Args:
+            patterns (list): (text, entity, case_sensitive) tuples
+        """
+        # Per state: transitions, failure link and (length, entity, exact text or None) outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for text, entity, case_sensitive in patterns:
+            if text:
+                self._add(text, entity, case_sensitive)
+        self._link()
+
+    def find(self, text):
+        """
+        Find entities in text, preferring the leftmost, then longest match
+        
+        Args:
+            text (str): Text to scan
+            
+        Returns:
+            list: Distinct entities in order of first appearance
+        """
+        entities = []
+        for _, _, entity in self.find_spans(text):
+            if entity not in entities:
+                entities.append(entity)
+        return entities
+
+    def find_spans(self, text):
+        """
+        Find entity mentions, preferring the leftmost, then longest match
+        
+        Args:
+            text (str): Text to scan
+            
+        Returns:
+            list: Non-overlapping (start, end, entity) tuples in text order
+        """
+        matches = []
+        lowered = _lower(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, c in enumerate(lowered, 1):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for length, entity, original in out[state]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+                if original is not None and text[start:end] != original:
+                    continue
+                matches.append((start, -length, entity))
+        
+        spans = []
+        covered_until = 0
+        for start, negative_length, entity in sorted(matches):
+            if start < covered_until:
+                continue
+            covered_until = start - negative_length
+            spans.append((start, covered_until, entity))
+        return spans
+
+    def contains_any(self, text):
+        """Check whether text mentions any entity"""
+        return bool(self.find(text))
+
+    def _add(self, text, entity, case_sensitive):
+        """Add one pattern to the trie"""
+        state = 0
+        for c in _lower(text):
+            nxt = self._goto[state].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(text), entity, text if case_sensitive else None))
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and c not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(c, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+def load_symbol_patterns(path):
+    """
+    Read a symbol file into matcher patterns
+    
+    Each line is "symbol<TAB>alias|alias<TAB>flags"; see data/symbols.tsv.
+    
+    Args:
+        path (str): Symbol file path
+        
+    Returns:
+        list: (text, symbol, case_sensitive) tuples
+    """
+    patterns = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            fields = line.split("\t")
+            symbol = fields[0].strip()
+            aliases = fields[1].split("|") if len(fields) > 1 else []
+            flags = fields[2].split(",") if len(fields) > 2 else []
+            patterns.append((f"${symbol}", symbol, False))
+            if "nobare" not in flags and len(symbol) > 1:
+                patterns.append((symbol, symbol, "upper" in flags))
+            patterns.extend((alias.strip(), symbol, False) for alias in aliases if alias.strip())
+    return patterns
+
+def build_symbol_matcher(path=None, cache_dir=None):
+    """
+    Build the ticker matcher, reusing a cached automaton when the file is unchanged
+    
+    Args:
+        path (str): Symbol file (SYMBOLS_FILE by default)
+        cache_dir (str): Directory for the pickled automaton
+        
+    Returns:
+        EntityMatcher: Matcher that maps names and symbols to ticker symbols
+    """
+    path = path or SYMBOLS_FILE
+    cache_dir = cache_dir or ENTITY_CACHE_DIR
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read() + MATCHER_VERSION.encode()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"symbols_{digest}.pickle")
+    
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Entity matcher cache unreadable, rebuilding: {str(e)}")
+    
+    matcher = EntityMatcher(load_symbol_patterns(path))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Entity matcher cache write error: {str(e)}")
+    return matcher
+
+_symbol_matcher = None
+_symbol_matcher_lock = threading.Lock()
+
+def get_symbol_matcher():
+    """
+    Get the process-wide ticker matcher
+    
+    Returns:
+        EntityMatcher: The shared matcher
+    """
+    global _symbol_matcher
+    with _symbol_matcher_lock:
+        if _symbol_matcher is None:
+            _symbol_matcher = build_symbol_matcher()
+    return _symbol_matcher
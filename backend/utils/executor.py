@@ -0,0 +1,41 @@
+import os
+import sys
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import RESEARCH_WORKERS
+
+# Bounded pool shared by all requests so blocking agent calls never run on the event loop
+_executor = ThreadPoolExecutor(max_workers=max(1, RESEARCH_WORKERS), thread_name_prefix="research")
+
+def get_executor():
+    """
+    Get the shared executor used for blocking research work
+    
+    Returns:
+        ThreadPoolExecutor: The bounded research executor
+    """
+    return _executor
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking callable in the research executor without stalling the event loop
+    
+    Args:
+        func (callable): Synchronous function to run
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+        
+    Returns:
+        Any: The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def shutdown_executor():
+    """Stop accepting new work and release the executor threads"""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import COMPRESSION_MIN_SIZE, STATIC_MAX_AGE
+
+# Optional faster serializer and brotli support
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as JSON_RESPONSE_CLASS
+except ImportError:
+    JSON_RESPONSE_CLASS = JSONResponse
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Charts and exports are named {name}_{first 16 hex digits of their content key}.{ext}
+HASHED_NAME_RE = re.compile(r"_([0-9a-f]{16})\.[A-Za-z0-9]+$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Starlette handles Range itself from 0.39 on
+NATIVE_RANGES = hasattr(FileResponse, "_parse_range_header")
+RANGE_CHUNK_SIZE = 64 * 1024
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets clients cache content-addressed artifacts forever
+    
+    A file whose name carries its content hash can never change under that
+    name, so it is served as immutable with the hash as a strong ETag. Any
+    other file must be revalidated. Single byte ranges are supported.
+    """
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        
+        match = HASHED_NAME_RE.search(os.path.basename(full_path))
+        if match:
+            response.headers["etag"] = f'"{match.group(1)}"'
+            response.headers["cache-control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        else:
+            response.headers["cache-control"] = "no-cache"
+        response.headers["accept-ranges"] = "bytes"
+        
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        
+        range_header = request_headers.get("range")
+        if range_header and status_code == 200 and not NATIVE_RANGES:
+            if_range = request_headers.get("if-range")
+            if if_range is None or if_range == response.headers["etag"]:
+                return self._range_response(full_path, stat_result.st_size, range_header, response)
+        return response
+
+    def _range_response(self, full_path, size, range_header, response):
+        """
+        Serve one byte range of a file
+        
+        Args:
+            full_path (str): File to read
+            size (int): File size in bytes
+            range_header (str): The request's Range header
+            response (FileResponse): Full response whose headers are reused
+        
+        Returns:
+            Response: 206 with the requested bytes, 416 if the range is unsatisfiable,
+                or the full response for multi-range or malformed requests
+        """
+        match = RANGE_RE.match(range_header.strip())
+        if not match or match.group(1) == match.group(2) == "":
+            return response
+        
+        start, end = match.groups()
+        if start == "":
+            # Suffix range: the last N bytes
+            start, end = max(0, size - int(end)), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        if start >= size or start > end:
+            return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+        
+        headers = {key: value for key, value in response.headers.items()
+                   if key in ("etag", "last-modified", "cache-control", "accept-ranges")}
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        headers["content-length"] = str(end - start + 1)
+        
+        def read_range():
+            with open(full_path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(RANGE_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        
+        return StreamingResponse(read_range(), status_code=206, headers=headers,
+                                 media_type=response.media_type)
+
+class CompressionMiddleware:
+    """
+    Negotiate brotli (when installed) or gzip for API responses
+    
+    Static artifacts are already compressed formats and are served with byte
+    ranges, and SSE streams must be flushed per event, so matching paths
+    bypass compression entirely.
+    """
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE,
+                 exclude_prefixes=(), exclude_suffixes=("/stream",)):
+        """
+        Initialize the middleware
+        
+        Args:
+            app: The ASGI app to wrap
+            minimum_size (int): Smallest response body worth compressing
+            exclude_prefixes (tuple): Paths starting with these are never compressed
+            exclude_suffixes (tuple): Paths ending with these are never compressed
+        """
+        self.app = app
+        self.exclude_prefixes = tuple(exclude_prefixes)
+        self.exclude_suffixes = tuple(exclude_suffixes)
+        if BrotliMiddleware is not None:
+            self.compressed_app = BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressed_app = GZipMiddleware(app, minimum_size=minimum_size)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            if not (path.startswith(self.exclude_prefixes) or path.endswith(self.exclude_suffixes)):
+                await self.compressed_app(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,126 @@
+import os
+import sys
+import uuid
+import hashlib
+from io import BytesIO
+from collections import namedtuple
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import IMAGE_CACHE_DIR, IMAGE_TARGET_DPI, IMAGE_QUANTIZE
+from utils.cache import MemoryCache
+
+# An image resized and recompressed for embedding in a document
+PreparedImage = namedtuple("PreparedImage", ["data", "width_px", "height_px", "aspect", "mime"])
+
+# Raised by PIL for bytes that are not a readable image (UnidentifiedImageError is an OSError)
+_DECODE_ERRORS = (OSError, ValueError, SyntaxError, ImportError)
+
+class ImagePipeline:
+    """Downsamples and recompresses chart images once per source and target size"""
+    def __init__(self, dpi=None, cache_dir=None, quantize=None, memory_entries=64):
+        """
+        Initialize the pipeline
+        
+        Args:
+            dpi (int): Output resolution at the target print width
+            cache_dir (str): Directory for prepared images (persists across restarts)
+            quantize (bool): Reduce images to a 256-colour palette (charts are line art)
+            memory_entries (int): Prepared images kept in memory
+        """
+        self.dpi = dpi or IMAGE_TARGET_DPI
+        self.cache_dir = cache_dir or IMAGE_CACHE_DIR
+        self.quantize = IMAGE_QUANTIZE if quantize is None else quantize
+        self.memory = MemoryCache(max_entries=memory_entries)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def prepare(self, data, width_inches):
+        """
+        Get an image sized for a given print width
+        
+        Args:
+            data (bytes): Source image bytes
+            width_inches (float): Width the image is printed at
+            
+        Returns:
+            PreparedImage: Recompressed PNG no wider than width_inches at the pipeline DPI,
+                or None if the bytes are not a decodable image
+        """
+        target_px = int(round(width_inches * self.dpi))
+        key = f"{hashlib.sha256(data).hexdigest()}_{target_px}{'q' if self.quantize else ''}"
+        
+        prepared = self.memory.get(key)
+        if prepared is not None:
+            return prepared
+        
+        path = os.path.join(self.cache_dir, f"{key}.png")
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    prepared = self._describe(f.read())
+            except _DECODE_ERRORS as e:
+                # A damaged or vanished cache file is rebuilt from the source
+                print(f"Image pipeline: ignoring cached image {path}: {str(e)}")
+        
+        if prepared is None:
+            try:
+                prepared = self._process(data, target_px)
+            except _DECODE_ERRORS as e:
+                # Only bytes that decoded as an image are ever embedded
+                print(f"Image pipeline: dropping image that could not be decoded: {str(e)}")
+                return None
+            self._write_cache(path, prepared.data)
+        
+        self.memory.set(key, prepared, size=len(prepared.data))
+        return prepared
+
+    def _write_cache(self, path, data):
+        """Store a prepared image on disk; a failed write only costs the reuse"""
+        # Unique per call: several exporters can prepare the same chart at once
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Image pipeline cache write error: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _process(self, data, target_px):
+        """Resize and recompress an image"""
+        from PIL import Image as PILImage
+        
+        with PILImage.open(BytesIO(data)) as img:
+            img.load()
+            if img.mode in ('RGBA', 'LA', 'P'):
+                # Flatten transparency onto white; documents have white pages
+                rgba = img.convert('RGBA')
+                img = PILImage.new('RGB', rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.split()[-1])
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            if img.width > target_px:
+                height = max(1, int(round(img.height * target_px / img.width)))
+                img = img.resize((target_px, height), PILImage.LANCZOS)
+            
+            if self.quantize:
+                img = img.quantize(colors=256)
+            
+            buffer = BytesIO()
+            img.save(buffer, format='PNG', optimize=True, dpi=(self.dpi, self.dpi))
+            return PreparedImage(buffer.getvalue(), img.width, img.height, img.height / img.width, "image/png")
+
+    def _describe(self, data):
+        """Wrap a cached, already processed image after verifying it decodes"""
+        from PIL import Image as PILImage
+        
+        with PILImage.open(BytesIO(data)) as img:
+            img.verify()
+            width, height = img.size
+            mime = PILImage.MIME[img.format]
+        return PreparedImage(data, width, height, height / width, mime)
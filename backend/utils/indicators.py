@@ -0,0 +1,288 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import COMPARISON_SUMMARY_ROWS
+from utils.cache import MemoryCache
+
+# Indicator periods
+SMA_FAST = 20
+SMA_SLOW = 50
+EMA_PERIOD = 20
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_PERIOD = 20
+BOLLINGER_WIDTH = 2.0
+VOLUME_FAST = 5
+VOLUME_SLOW = 20
+
+# Longest look-back any windowed indicator needs
+MAX_WINDOW = max(SMA_SLOW, BOLLINGER_PERIOD, VOLUME_SLOW)
+
+# Recursive smoother states carried between updates: column -> (input, alpha)
+_SMOOTHERS = {
+    "_ema_fast": ("close", 2 / (MACD_FAST + 1)),
+    "_ema_slow": ("close", 2 / (MACD_SLOW + 1)),
+    "_ema": ("close", 2 / (EMA_PERIOD + 1)),
+    "_avg_gain": ("gain", 1 / RSI_PERIOD),
+    "_avg_loss": ("loss", 1 / RSI_PERIOD),
+    "_atr": ("true_range", 1 / ATR_PERIOD)
+}
+
+def _column(frame, name):
+    """Get an OHLCV column as float64, tolerating 'Adj Close'-style variants"""
+    if name in frame.columns:
+        return frame[name].to_numpy(dtype=np.float64)
+    for col in frame.columns:
+        if name.lower() in str(col).lower():
+            return frame[col].to_numpy(dtype=np.float64)
+    return None
+
+def _smooth(values, alpha, seed=None):
+    """
+    Exponentially smooth values: y[t] = alpha * x[t] + (1 - alpha) * y[t-1]
+    
+    Args:
+        values (numpy.ndarray): Inputs
+        alpha (float): Smoothing factor
+        seed (float): Previous output to continue from (the first input when None)
+        
+    Returns:
+        numpy.ndarray: Smoothed values, one per input
+    """
+    if seed is None:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    # Prepending the previous output continues the same recursion exactly
+    series = pd.Series(np.concatenate(([seed], values)))
+    return series.ewm(alpha=alpha, adjust=False).mean().to_numpy()[1:]
+
+def _rolling(values, window, func):
+    """Trailing rolling statistic with NaN until the window is full"""
+    rolling = pd.Series(values).rolling(window, min_periods=window)
+    return getattr(rolling, func)().to_numpy()
+
+def _inputs(frame):
+    """Derive close, gain, loss, true range and volume arrays from OHLCV bars"""
+    close = _column(frame, "Close")
+    high = _column(frame, "High")
+    low = _column(frame, "Low")
+    volume = _column(frame, "Volume")
+    if high is None or low is None:
+        high = low = close
+    
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    change = np.nan_to_num(close - prev_close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return {
+        "close": close,
+        "gain": np.clip(change, 0, None),
+        "loss": np.clip(-change, 0, None),
+        "true_range": true_range,
+        "volume": volume
+    }
+
+def compute_indicators(frame, previous=None):
+    """
+    Compute indicators for OHLCV bars, continuing from earlier results when possible
+    
+    With previous results for the same series, only bars after the last
+    previously computed bar but one are calculated: recursive indicators
+    continue from their stored state and windowed ones use the last
+    MAX_WINDOW bars. The last bar is always recomputed because the latest
+    (partial) bar may have been revised since.
+    
+    Args:
+        frame (pandas.DataFrame): OHLCV bars, oldest first
+        previous (pandas.DataFrame): Earlier output of this function (optional)
+        
+    Returns:
+        pandas.DataFrame: Indicator columns on frame's index; columns starting
+            with "_" are smoother state used by later updates
+    """
+    start = _resume_position(frame, previous)
+    # Earlier results for frame's first `start` bars (previous may reach further back)
+    base = previous.iloc[len(previous) - start - 1:len(previous) - 1] if start else None
+    inputs = _inputs(frame)
+    positions = np.arange(start, len(frame))
+    result = {}
+    
+    for column, (source, alpha) in _SMOOTHERS.items():
+        values = inputs[source][start:]
+        if start:
+            result[column] = _smooth(values, alpha, base[column].iloc[-1])
+        else:
+            # The first bar has no prior close, so its gain/loss/range carry no information
+            result[column] = _smooth(values if source == "close" else values[1:], alpha)
+            if source != "close":
+                result[column] = np.concatenate(([np.nan], result[column]))
+    
+    # Windowed indicators only need the trailing MAX_WINDOW bars before the first new one
+    offset = max(0, start - MAX_WINDOW)
+    close = inputs["close"][offset:]
+    sma_fast = _rolling(close, SMA_FAST, "mean")[start - offset:]
+    sma_slow = _rolling(close, SMA_SLOW, "mean")[start - offset:]
+    band = BOLLINGER_WIDTH * _rolling(close, BOLLINGER_PERIOD, "std")[start - offset:]
+    bollinger_mid = _rolling(close, BOLLINGER_PERIOD, "mean")[start - offset:]
+    
+    macd = result["_ema_fast"] - result["_ema_slow"]
+    if start:
+        signal = _smooth(macd, 2 / (MACD_SIGNAL + 1), base["_macd_signal"].iloc[-1])
+    else:
+        signal = _smooth(macd, 2 / (MACD_SIGNAL + 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(result["_avg_loss"] == 0, 100.0,
+                       100 - 100 / (1 + result["_avg_gain"] / result["_avg_loss"]))
+
+    def warm(values, bars):
+        """Hide values computed from fewer than the indicator's warm-up bars"""
+        return np.where(positions >= bars - 1, values, np.nan)
+    
+    table = {
+        "close": inputs["close"][start:],
+        "sma_20": sma_fast,
+        "sma_50": sma_slow,
+        "ema_20": warm(result["_ema"], EMA_PERIOD),
+        "macd": warm(macd, MACD_SLOW),
+        "macd_signal": warm(signal, MACD_SLOW + MACD_SIGNAL - 1),
+        "rsi_14": warm(rsi, RSI_PERIOD + 1),
+        "bb_upper": bollinger_mid + band,
+        "bb_lower": bollinger_mid - band,
+        "atr_14": warm(result["_atr"], ATR_PERIOD + 1),
+        "_macd_signal": signal,
+        **result
+    }
+    table["macd_hist"] = table["macd"] - table["macd_signal"]
+    volume = inputs["volume"]
+    if volume is not None:
+        volume = volume[offset:]
+        table["volume_sma_5"] = _rolling(volume, VOLUME_FAST, "mean")[start - offset:]
+        table["volume_sma_20"] = _rolling(volume, VOLUME_SLOW, "mean")[start - offset:]
+    
+    computed = pd.DataFrame(table, index=frame.index[start:])
+    if not start:
+        return computed
+    return pd.concat([base, computed])
+
+def _resume_position(frame, previous):
+    """
+    Find the first bar that needs computing
+    
+    Returns:
+        int: 0 for a full computation, otherwise the position of the first new bar
+    """
+    if previous is None or len(previous) < 2 or len(frame) < 2:
+        return 0
+    # Keep everything up to the second-to-last previously computed bar
+    anchor = previous.index[-2]
+    if anchor not in frame.index:
+        return 0
+    position = frame.index.get_loc(anchor)
+    if not isinstance(position, (int, np.integer)):
+        return 0
+    # Earlier bars must be unchanged; history can be trimmed or re-adjusted for splits/dividends
+    if position + 2 > len(previous) or not frame.index[:position + 1].equals(previous.index[-(position + 2):-1]):
+        return 0
+    close = _column(frame, "Close")
+    if not np.isclose(close[position], previous["close"].iloc[-2]):
+        return 0
+    if previous.iloc[-2][list(_SMOOTHERS) + ["_macd_signal"]].isna().any():
+        return 0
+    return position + 1
+
+def summarize(indicators):
+    """
+    Reduce indicator history to the latest values and simple trend signals
+    
+    Args:
+        indicators (pandas.DataFrame): Output of compute_indicators
+        
+    Returns:
+        dict: Latest values plus 20-day change and 5/20-day volume ratio
+    """
+    latest = indicators.iloc[-1]
+    summary = {name: latest.get(name) for name in (
+        "close", "sma_20", "sma_50", "ema_20", "rsi_14", "macd", "macd_signal",
+        "macd_hist", "bb_upper", "bb_lower", "atr_14"
+    )}
+    closes = indicators["close"].to_numpy()
+    summary["change_20d"] = (closes[-1] / closes[-21] - 1) * 100 if len(closes) > 20 else np.nan
+    if "volume_sma_20" in indicators.columns and latest.get("volume_sma_20"):
+        summary["volume_ratio"] = latest["volume_sma_5"] / latest["volume_sma_20"]
+    else:
+        summary["volume_ratio"] = np.nan
+    return summary
+
+def format_indicator_table(summaries, max_rows=None):
+    """
+    Render per-ticker indicator summaries as a compact markdown table
+    
+    Args:
+        summaries (dict): Ticker to summarize() output, in ranking order
+        max_rows (int): Tickers listed (the first and last in order when there are more)
+        
+    Returns:
+        str: Markdown table, or an empty string when there is nothing to show
+    """
+    if not summaries:
+        return ""
+    max_rows = max_rows or COMPARISON_SUMMARY_ROWS
+    tickers = list(summaries)
+    omitted = max(len(tickers) - max_rows, 0)
+    if omitted:
+        tickers = tickers[:max_rows - max_rows // 2] + tickers[len(tickers) - max_rows // 2:]
+    columns = [
+        ("Close", "close", "{:.2f}"), ("20d %", "change_20d", "{:+.1f}"),
+        ("SMA20", "sma_20", "{:.2f}"), ("SMA50", "sma_50", "{:.2f}"),
+        ("EMA20", "ema_20", "{:.2f}"), ("RSI14", "rsi_14", "{:.1f}"),
+        ("MACD", "macd", "{:.2f}"), ("Signal", "macd_signal", "{:.2f}"),
+        ("BB low", "bb_lower", "{:.2f}"), ("BB high", "bb_upper", "{:.2f}"),
+        ("ATR14", "atr_14", "{:.2f}"), ("Vol 5d/20d", "volume_ratio", "{:.2f}")
+    ]
+    lines = [
+        "| Ticker | " + " | ".join(title for title, _, _ in columns) + " |",
+        "|" + "---|" * (len(columns) + 1)
+    ]
+    for ticker in tickers:
+        cells = []
+        for _, key, fmt in columns:
+            value = summaries[ticker].get(key)
+            cells.append("n/a" if value is None or not np.isfinite(value) else fmt.format(value))
+        lines.append(f"| {ticker} | " + " | ".join(cells) + " |")
+    if omitted:
+        lines.append(f"({omitted} mid-ranked tickers omitted)")
+    return "\n".join(lines)
+
+class IndicatorEngine:
+    """Indicator computation with per-ticker results kept for incremental updates"""
+    def __init__(self, max_entries=256):
+        """
+        Initialize the engine
+        
+        Args:
+            max_entries (int): Number of tickers whose results are kept in memory
+        """
+        self._results = MemoryCache(max_entries=max_entries)
+
+    def compute(self, ticker, history, interval="1d"):
+        """
+        Get indicators for a ticker's full bar history
+        
+        Args:
+            ticker (str): Ticker symbol
+            history (pandas.DataFrame): All available OHLCV bars, oldest first
+            interval (str): Bar interval
+            
+        Returns:
+            pandas.DataFrame: Indicator columns on history's index
+        """
+        key = f"{ticker}:{interval}"
+        indicators = compute_indicators(history, self._results.get(key))
+        self._results.set(key, indicators, size=int(indicators.memory_usage(deep=False).sum()))
+        return indicators
@@ -0,0 +1,309 @@
+import os
+import sys
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RESULT_TTL, JOB_CANCEL_POLL_INTERVAL
+from utils.artifact_store import get_artifact_store
+from utils.state_backend import get_state_backend
+
+# Stages reported by the agents, in pipeline order
+JOB_STAGES = ["search", "data", "charts", "llm"]
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job when it has been cancelled
+    
+    Derives from BaseException (like asyncio.CancelledError) so the agents'
+    broad "except Exception" error handling does not swallow it.
+    """
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    """A research request running in the background"""
+    def __init__(self, state, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.state = state
+        self.status = "queued"
+        self.stages = {stage: "pending" for stage in JOB_STAGES}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.future = None
+        self._cancel_event = threading.Event()
+        # Set by JobManager: persists status changes and checks for cancellation from other workers
+        self.on_change = None
+        self.remote_cancelled = None
+        self._cancel_checked_at = 0.0
+
+    @property
+    def cancelled(self):
+        if not self._cancel_event.is_set() and self.remote_cancelled is not None:
+            now = time.monotonic()
+            if now - self._cancel_checked_at >= JOB_CANCEL_POLL_INTERVAL:
+                self._cancel_checked_at = now
+                if self.remote_cancelled(self.id):
+                    self._cancel_event.set()
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def progress(self, stage, status="running"):
+        """
+        Record stage progress; the agents call this through state["progress"]
+        
+        Args:
+            stage (str): One of JOB_STAGES
+            status (str): "running", "done" or "skipped"
+            
+        Raises:
+            JobCancelled: If the job was cancelled, so the worker stops at the next checkpoint
+        """
+        if self.cancelled:
+            raise JobCancelled(self.id)
+        if stage in self.stages and self.stages[stage] != status:
+            self.stages[stage] = status
+            if self.on_change is not None:
+                self.on_change(self)
+
+    def to_dict(self):
+        """
+        Serialize the job status for the API
+        
+        Returns:
+            dict: Id, status, per-stage progress, timings and error
+        """
+        return {
+            "job_id": self.id,
+            "query": self.state.get("query"),
+            "status": self.status,
+            "stages": dict(self.stages),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+    def to_record(self):
+        """Serialize the job, including its result, for the shared state backend"""
+        return {**self.to_dict(), "result": self.result}
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Rebuild a read-only snapshot of a job owned by another worker
+        
+        Args:
+            record (dict): Output of to_record()
+            
+        Returns:
+            Job: Snapshot with the recorded status, stages and result
+        """
+        job = cls({"query": record.get("query")}, job_id=record["job_id"])
+        job.status = record["status"]
+        job.stages = dict(record["stages"])
+        job.created_at = record["created_at"]
+        job.started_at = record["started_at"]
+        job.finished_at = record["finished_at"]
+        job.error = record["error"]
+        job.result = record.get("result")
+        return job
+
+class JobManager:
+    """
+    Runs jobs in a bounded worker pool with a bounded queue
+    
+    Jobs run in the process that accepted them, but their status and results
+    are also written to the shared state backend, so any API worker can report
+    on or cancel any job.
+    """
+    def __init__(self, workers=None, queue_depth=None, result_ttl=None, artifacts=None, records=None):
+        """
+        Initialize the job manager
+        
+        Args:
+            workers (int): Number of jobs that run at the same time
+            queue_depth (int): Number of jobs that may wait for a worker
+            result_ttl (float): Seconds finished jobs are kept for polling
+            artifacts (ArtifactStore): Chart store whose files are pinned while a job's result is live
+            records: Shared job record store with get/set (the state backend's "jobs" cache by default)
+        """
+        self.artifacts = artifacts if artifacts is not None else get_artifact_store("charts")
+        self.workers = max(1, workers or JOB_WORKERS)
+        self.queue_depth = JOB_QUEUE_DEPTH if queue_depth is None else queue_depth
+        self.result_ttl = JOB_RESULT_TTL if result_ttl is None else result_ttl
+        self.records = records if records is not None else get_state_backend().cache("jobs", ttl=self.result_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="research-job")
+        self._jobs = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, func, state):
+        """
+        Queue a job
+        
+        Args:
+            func (callable): Agent entry point taking the state dict
+            state (dict): Agent state; "progress" and "pin_artifacts" callbacks are added
+            
+        Returns:
+            Job: The queued job
+            
+        Raises:
+            QueueFullError: If every worker is busy and the queue is full
+        """
+        self._prune()
+        job = Job(state)
+        job.on_change = self._save
+        job.remote_cancelled = self._remote_cancelled
+        with self._lock:
+            if self._active >= self.workers + self.queue_depth:
+                raise QueueFullError("Research job queue is full, try again later")
+            self._active += 1
+            self._jobs[job.id] = job
+        
+        self._save(job)
+        job.future = self._executor.submit(self._run, job, func)
+        return job
+
+    def get(self, job_id):
+        """
+        Look up a job, including jobs running in other workers
+        
+        Returns:
+            Job: The job (a snapshot if another worker owns it), or None if unknown or expired
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            record = self.records.get(job_id)
+        except Exception as e:
+            print(f"Job record read error: {str(e)}")
+            return None
+        return Job.from_record(record) if record else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a job
+        
+        A queued job is dropped before it starts; a running job stops at its next
+        progress checkpoint, which frees its worker. Jobs owned by another
+        worker are flagged in the state backend and stop once it notices.
+        
+        Returns:
+            Job: The job, or None if unknown
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        
+        if job.future is None:
+            try:
+                self.records.set(f"{job_id}:cancel", True, ttl=self.result_ttl)
+            except Exception as e:
+                print(f"Job cancel request error: {str(e)}")
+            return job
+        job._cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Never started, so _run will not release its slot
+            self._finish(job, "cancelled")
+        return job
+
+    def stats(self):
+        """
+        Get pool occupancy
+        
+        Returns:
+            dict: Worker count, queue depth and active (running or queued) jobs
+        """
+        with self._lock:
+            return {"workers": self.workers, "queue_depth": self.queue_depth, "active": self._active}
+
+    def shutdown(self):
+        """Cancel queued jobs and stop the workers"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, func):
+        """Execute a job in a worker thread"""
+        if job.cancelled:
+            self._finish(job, "cancelled")
+            return
+        
+        job.status = "running"
+        job.started_at = time.time()
+        self._save(job)
+        
+        def pin_artifacts(paths):
+            # Charts are pinned as they are planned, so eviction cannot remove them mid-job
+            self.artifacts.pin(paths, job.id, ttl=self.result_ttl)
+        
+        try:
+            job.result = func({**job.state, "progress": job.progress, "pin_artifacts": pin_artifacts})
+            # Keep the charts the result points at until the job expires
+            self.artifacts.pin(job.result.get("images", []), job.id, ttl=self.result_ttl)
+            self._finish(job, "succeeded")
+        except JobCancelled:
+            print(f"Research job {job.id} cancelled")
+            self._finish(job, "cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        """Mark a job finished and release its slot"""
+        with self._lock:
+            if job.finished:
+                return
+            job.status = status
+            job.finished_at = time.time()
+            for stage, stage_status in job.stages.items():
+                if stage_status == "pending":
+                    job.stages[stage] = "skipped"
+                elif stage_status == "running" and status != "succeeded":
+                    # The stage that was interrupted takes the job's final status
+                    job.stages[stage] = status
+            self._active -= 1
+        self._save(job)
+
+    def _save(self, job):
+        """Write a job's current state to the shared record store"""
+        try:
+            self.records.set(job.id, job.to_record(), ttl=self.result_ttl)
+        except Exception as e:
+            print(f"Job record write error: {str(e)}")
+
+    def _remote_cancelled(self, job_id):
+        """Check whether another worker asked to cancel a job"""
+        try:
+            return bool(self.records.get(f"{job_id}:cancel"))
+        except Exception as e:
+            print(f"Job cancel check error: {str(e)}")
+            return False
+
+    def _prune(self):
+        """Forget finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            self.artifacts.unpin(job_id)
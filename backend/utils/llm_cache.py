@@ -0,0 +1,258 @@
+import os
+import sys
+import re
+import math
+import hashlib
+import threading
+from collections import Counter
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (LLM_CACHE_ENABLED, LLM_CACHE_MODE, LLM_CACHE_TTL, LLM_CACHE_SIMILARITY_THRESHOLD,
+                    LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_BYTES)
+from utils.cache import MemoryCache, TieredCache
+from utils.entity_matcher import get_symbol_matcher
+from utils.state_backend import get_state_backend
+
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+def _term_vector(text):
+    """Bag-of-words vector with its norm, used for similarity matching"""
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return counts, norm
+
+def _cosine(a, b):
+    """Cosine similarity of two term vectors"""
+    (counts_a, norm_a), (counts_b, norm_b) = a, b
+    if not norm_a or not norm_b:
+        return 0.0
+    if len(counts_a) > len(counts_b):
+        counts_a, counts_b = counts_b, counts_a
+    dot = sum(c * counts_b.get(t, 0) for t, c in counts_a.items())
+    return dot / (norm_a * norm_b)
+
+def _prompt_profile(prompt):
+    """Lines, named companies and numbers of a prompt, used for similarity matching"""
+    lines = Counter(line.strip() for line in prompt.splitlines() if line.strip())
+    entities = frozenset(get_symbol_matcher().find(prompt))
+    numbers = frozenset(_NUMBER_RE.findall(prompt))
+    return lines, entities, numbers
+
+def _similarity(a, b):
+    """
+    Similarity of the parts of two prompts that differ
+    
+    Lines both prompts share (the template) are left out, so a changed question
+    is not outweighed by the instructions around it. Prompts naming different
+    companies or numbers never match.
+    """
+    (lines_a, entities_a, numbers_a), (lines_b, entities_b, numbers_b) = a, b
+    if entities_a != entities_b or numbers_a != numbers_b:
+        return 0.0
+    shared = lines_a & lines_b
+    variable_a = " ".join((lines_a - shared).elements())
+    variable_b = " ".join((lines_b - shared).elements())
+    if not variable_a and not variable_b:
+        return 1.0
+    return _cosine(_term_vector(variable_a), _term_vector(variable_b))
+
+class LLMCache:
+    """Completion cache keyed on model name, temperature and prompt hash"""
+    def __init__(self, cache=None, mode=None, ttl=None, similarity_threshold=None):
+        """
+        Initialize the completion cache
+        
+        Args:
+            cache: Backing store with get/set/stats (a memory + shared state backend TieredCache by default)
+            mode (str): "exact" for prompt-hash matches only, "similar" to also reuse near-identical prompts
+            ttl (float): Seconds a completion stays valid
+            similarity_threshold (float): Minimum cosine similarity of the differing prompt lines for a "similar" hit
+        """
+        self.mode = mode or LLM_CACHE_MODE
+        self.ttl = LLM_CACHE_TTL if ttl is None else ttl
+        self.similarity_threshold = similarity_threshold or LLM_CACHE_SIMILARITY_THRESHOLD
+        self.cache = cache or TieredCache(
+            MemoryCache(max_entries=LLM_CACHE_MEMORY_ENTRIES, ttl=self.ttl),
+            get_state_backend().cache("llm", max_entries=LLM_CACHE_MAX_ENTRIES,
+                                      max_bytes=LLM_CACHE_MAX_BYTES, ttl=self.ttl)
+        )
+        # Recent prompt profiles per model/temperature for similarity lookups
+        self._profiles = MemoryCache(max_entries=LLM_CACHE_MEMORY_ENTRIES, ttl=self.ttl)
+        self._lock = threading.Lock()
+        self._similar_hits = 0
+
+    def key(self, model, temperature, prompt):
+        """Build the exact-match cache key"""
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        return f"llm:{model}:{temperature}:{prompt_hash}"
+
+    def get(self, model, temperature, prompt):
+        """
+        Get a cached completion
+        
+        Returns:
+            str: The cached completion text, or None on a miss
+        """
+        exact_key = self.key(model, temperature, prompt)
+        content = self.cache.get(exact_key)
+        if content is not None or self.mode != "similar":
+            return content
+        
+        # Fall back to the closest recent prompt for the same model and temperature
+        profile = _prompt_profile(prompt)
+        prefix = f"llm:{model}:{temperature}:"
+        best_key, best_score = None, 0.0
+        for candidate_key, candidate_profile in self._profiles.items():
+            if not candidate_key.startswith(prefix):
+                continue
+            score = _similarity(profile, candidate_profile)
+            if score > best_score:
+                best_key, best_score = candidate_key, score
+        
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+        # Counted as a similar hit only; the exact lookup above already counted the miss
+        content = self.cache.get(best_key, count=False)
+        if content is not None:
+            with self._lock:
+                self._similar_hits += 1
+        return content
+
+    def set(self, model, temperature, prompt, content):
+        """Store a completion"""
+        exact_key = self.key(model, temperature, prompt)
+        self.cache.set(exact_key, content)
+        if self.mode == "similar":
+            self._profiles.set(exact_key, _prompt_profile(prompt), size=0)
+
+    def invoke(self, llm, prompt, model, temperature, bypass=False):
+        """
+        Invoke an LLM through the cache
+        
+        Args:
+            llm: LangChain chat model
+            prompt (str): Prompt text
+            model (str): Model name used in the key
+            temperature (float): Sampling temperature used in the key
+            bypass (bool): Skip the lookup and always call the model (the result is still stored)
+            
+        Returns:
+            str: Completion text (empty if the model returned nothing)
+        """
+        if not bypass:
+            content = self.get(model, temperature, prompt)
+            if content is not None:
+                print(f"LLM cache hit for {model}")
+                return content
+        
+        response = llm.invoke(prompt)
+        content = getattr(response, 'content', None) or ""
+        if content:
+            self.set(model, temperature, prompt, content)
+        return content
+
+    def stats(self):
+        """
+        Get hit/miss counters
+        
+        Returns:
+            dict: Counters from the backing cache, with lookups served by a similar prompt
+                counted as similar hits rather than misses
+        """
+        stats = self.cache.stats()
+        stats["mode"] = self.mode
+        with self._lock:
+            stats["similar_hits"] = self._similar_hits
+        stats["misses"] -= stats["similar_hits"]
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+def stream_completion(llm, prompt, model, temperature, cache=None, bypass=False):
+    """
+    Synchronously stream completion tokens, serving cached completions as a single chunk
+    
+    Args:
+        llm: LangChain chat model
+        prompt (str): Prompt text
+        model (str): Model name used in the cache key
+        temperature (float): Sampling temperature used in the cache key
+        cache (LLMCache): Completion cache (optional)
+        bypass (bool): Skip the cache lookup
+        
+    Yields:
+        str: Completion text chunks as the model produces them
+    """
+    if cache is not None and not bypass:
+        content = cache.get(model, temperature, prompt)
+        if content is not None:
+            print(f"LLM cache hit for {model}")
+            yield content
+            return
+    
+    chunks = []
+    for chunk in llm.stream(prompt):
+        text = getattr(chunk, 'content', None) or ""
+        if text:
+            chunks.append(text)
+            yield text
+    
+    # Only completions that ran to the end are cached
+    content = "".join(chunks)
+    if cache is not None and content:
+        cache.set(model, temperature, prompt, content)
+
+async def astream_completion(llm, prompt, model, temperature, cache=None, bypass=False):
+    """
+    Stream completion tokens, serving cached completions as a single chunk
+    
+    Args:
+        llm: LangChain chat model
+        prompt (str): Prompt text
+        model (str): Model name used in the cache key
+        temperature (float): Sampling temperature used in the cache key
+        cache (LLMCache): Completion cache (optional)
+        bypass (bool): Skip the cache lookup
+        
+    Yields:
+        str: Completion text chunks as the model produces them
+    """
+    if cache is not None and not bypass:
+        content = cache.get(model, temperature, prompt)
+        if content is not None:
+            print(f"LLM cache hit for {model}")
+            yield content
+            return
+    
+    chunks = []
+    async for chunk in llm.astream(prompt):
+        text = getattr(chunk, 'content', None) or ""
+        if text:
+            chunks.append(text)
+            yield text
+    
+    # Only completions that ran to the end are cached; a cancelled stream never gets here
+    content = "".join(chunks)
+    if cache is not None and content:
+        cache.set(model, temperature, prompt, content)
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    """
+    Get the process-wide completion cache shared by all agents
+    
+    Returns:
+        LLMCache: The shared cache, or None when caching is disabled
+    """
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMCache()
+    return _llm_cache
@@ -0,0 +1,131 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Intermediate representation shared by the PDF and DOCX exporters
+Run = namedtuple("Run", ["text", "bold", "italic", "code"])
+Heading = namedtuple("Heading", ["level", "runs"])
+Paragraph = namedtuple("Paragraph", ["runs"])
+ListBlock = namedtuple("ListBlock", ["ordered", "items"])
+ImageBlock = namedtuple("ImageBlock", ["path", "alt"])
+
+# One pattern classifies every line; group names tell which rule matched
+_LINE_RE = re.compile(
+    r"^(?:"
+    r"(?P<heading>#{1,6})\s+(?P<heading_text>.*?)(?:\s+#+)?\s*"
+    r"|[ \t]*(?P<bullet>[*+-])\s+(?P<bullet_text>.*)"
+    r"|[ \t]*(?P<number>\d+)[.)]\s+(?P<number_text>.*)"
+    r"|!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)\)\s*"
+    r"|(?P<rule>(?:[-*_][ \t]*){3,})"
+    r"|(?P<blank>\s*)"
+    r")$"
+)
+
+# Line kind for the last group each alternative captures
+_LINE_KINDS = {
+    "heading_text": "heading",
+    "bullet_text": "bullet",
+    "number_text": "number",
+    "src": "src",
+    "rule": "rule",
+    "blank": "blank"
+}
+
+# Inline emphasis in a single left-to-right scan
+_INLINE_RE = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold_u>.+?)__"
+    r"|\*(?P<italic>[^*\s](?:[^*]*?[^*\s])?)\*"
+    r"|(?<!\w)_(?P<italic_u>[^_\s](?:[^_]*?[^_\s])?)_(?!\w)"
+    r"|`(?P<code>[^`]+)`"
+)
+
+def parse_inline(text):
+    """
+    Split a line of markdown into styled runs
+    
+    Args:
+        text (str): Inline markdown
+        
+    Returns:
+        tuple: Run tuples in reading order
+    """
+    runs = []
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        if match.start() > position:
+            runs.append(Run(text[position:match.start()], False, False, False))
+        kind = match.lastgroup
+        value = match.group(kind)
+        runs.append(Run(value, kind.startswith("bold"), kind.startswith("italic"), kind == "code"))
+        position = match.end()
+    if position < len(text):
+        runs.append(Run(text[position:], False, False, False))
+    return tuple(runs)
+
+def plain_text(runs):
+    """Join runs back into unstyled text"""
+    return "".join(run.text for run in runs)
+
+@lru_cache(maxsize=32)
+def parse_markdown(content):
+    """
+    Parse markdown into a cached block list in a single pass over its lines
+    
+    Supports ATX headings, paragraphs, bullet and numbered lists, standalone
+    images and inline bold/italic/code. Results are cached per content string
+    so every export format of a report shares one parse.
+    
+    Args:
+        content (str): Markdown text
+        
+    Returns:
+        tuple: Heading, Paragraph, ListBlock and ImageBlock tuples
+    """
+    blocks = []
+    paragraph = []
+    list_items = []
+    list_ordered = False
+    
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(Paragraph(parse_inline(" ".join(paragraph))))
+            paragraph.clear()
+    
+    def flush_list():
+        if list_items:
+            blocks.append(ListBlock(list_ordered, tuple(parse_inline(item) for item in list_items)))
+            list_items.clear()
+    
+    for line in content.splitlines():
+        match = _LINE_RE.match(line)
+        kind = _LINE_KINDS.get(match.lastgroup) if match else None
+        
+        if kind == "heading":
+            flush_paragraph()
+            flush_list()
+            blocks.append(Heading(len(match.group("heading")), parse_inline(match.group("heading_text"))))
+        elif kind in ("bullet", "number"):
+            flush_paragraph()
+            ordered = kind == "number"
+            if list_items and ordered != list_ordered:
+                flush_list()
+            list_ordered = ordered
+            list_items.append(match.group(f"{kind}_text").strip())
+        elif kind == "src":
+            flush_paragraph()
+            flush_list()
+            blocks.append(ImageBlock(match.group("src"), match.group("alt")))
+        elif kind in ("rule", "blank"):
+            flush_paragraph()
+            flush_list()
+        elif list_items and line[:1] in (" ", "\t"):
+            # Indented continuation of the previous list item
+            list_items[-1] = f"{list_items[-1]} {line.strip()}"
+        else:
+            flush_list()
+            paragraph.append(line.strip())
+    
+    flush_paragraph()
+    flush_list()
+    return tuple(blocks)
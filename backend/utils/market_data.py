@@ -0,0 +1,197 @@
+import os
+import sys
+import pandas as pd
+import yfinance as yf
+from datetime import datetime, timedelta
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import MARKET_DATA_PERIOD, MARKET_DATA_LOOKBACK_DAYS, MARKET_DATA_INTERVAL
+from utils.ohlcv_cache import OHLCVCache
+
+# Days of history kept on disk for each yfinance period
+PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827}
+
+class MarketSnapshot:
+    """OHLCV data for every ticker of a single request, fetched once and shared"""
+    def __init__(self, frames, history=None):
+        """
+        Initialize the snapshot
+        
+        Args:
+            frames (dict): Ticker to OHLCV frame trimmed to the lookback window
+            history (dict): Ticker to all cached bars, for indicators that need warm-up (optional)
+        """
+        self.frames = frames
+        self.history = history if history is not None else frames
+        self._closes = None
+
+    @property
+    def tickers(self):
+        """Tickers that returned data, in request order"""
+        return list(self.frames.keys())
+
+    @property
+    def closes(self):
+        """
+        Close prices of all tickers aligned on a common date index
+        
+        Returns:
+            pandas.DataFrame: One column per ticker
+        """
+        if self._closes is None:
+            self._closes = pd.DataFrame({t: f['Close'] for t, f in self.frames.items()})
+        return self._closes
+
+    def __contains__(self, ticker):
+        return ticker in self.frames
+
+    def __getitem__(self, ticker):
+        return self.frames[ticker]
+
+    def __len__(self):
+        return len(self.frames)
+
+class MarketData:
+    def __init__(self, period=None, lookback_days=None, interval=None, cache=None):
+        """
+        Initialize the market data layer
+        
+        Args:
+            period (str): yfinance download period
+            lookback_days (int): Number of most recent days kept for analysis
+            interval (str): Bar interval
+            cache (OHLCVCache): Persistent bar cache (created if not provided)
+        """
+        self.period = period or MARKET_DATA_PERIOD
+        self.lookback_days = lookback_days or MARKET_DATA_LOOKBACK_DAYS
+        self.interval = interval or MARKET_DATA_INTERVAL
+        self.cache = cache or OHLCVCache()
+
+    def fetch(self, tickers):
+        """
+        Get OHLCV data for all tickers, downloading only what the cache lacks
+        
+        Fresh cache entries are used as-is, stale ones are topped up with the
+        bars since their last timestamp and missing tickers are downloaded in
+        one batched request.
+        
+        Args:
+            tickers (list): Ticker symbols
+            
+        Returns:
+            MarketSnapshot: Per-ticker frames trimmed to the lookback window
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return MarketSnapshot({})
+        
+        history = {}
+        stale = {}
+        missing = []
+        for ticker in tickers:
+            cached, fresh = self.cache.load(ticker, self.interval)
+            if cached is None or cached.empty:
+                missing.append(ticker)
+            elif fresh:
+                history[ticker] = cached
+            else:
+                stale[ticker] = cached
+        
+        # Full history for tickers we have never seen
+        if missing:
+            print(f"Downloading {', '.join(missing)} data for {self.period}...")
+            downloaded = self._download(missing, period=self.period)
+            for ticker, frame in downloaded.items():
+                history[ticker] = frame
+                self.cache.save(ticker, frame, self.interval)
+        
+        # Incremental refresh, grouped by the last cached date so each group is one request
+        by_start = {}
+        for ticker, cached in stale.items():
+            start = cached.index.max().strftime("%Y-%m-%d")
+            by_start.setdefault(start, []).append(ticker)
+        
+        for start, group in by_start.items():
+            print(f"Refreshing {', '.join(group)} data since {start}...")
+            try:
+                downloaded = self._download(group, start=start)
+            except Exception as e:
+                print(f"Incremental download error: {str(e)}")
+                downloaded = {}
+            for ticker in group:
+                fresh = downloaded.get(ticker)
+                merged = self.cache.merge(stale[ticker], fresh,
+                                          max_age_days=PERIOD_DAYS.get(self.period))
+                history[ticker] = merged
+                # Saving also bumps the mtime so the entry is fresh again; after a failed
+                # refresh the stale bars are served once and retried on the next request
+                if fresh is not None and not fresh.empty:
+                    self.cache.save(ticker, merged, self.interval)
+        
+        frames = {}
+        for ticker in tickers:
+            if ticker not in history:
+                print(f"No data received for {ticker}")
+                continue
+            frames[ticker] = self._trim(history[ticker])
+        
+        return MarketSnapshot(frames, {t: history[t] for t in frames})
+
+    def _download(self, tickers, **kwargs):
+        """
+        Download bars for several tickers in one request
+        
+        Args:
+            tickers (list): Ticker symbols
+            **kwargs: period or start passed to yf.download
+            
+        Returns:
+            dict: Ticker to OHLCV frame, for tickers that returned data
+        """
+        raw = yf.download(tickers, interval=self.interval, auto_adjust=True,
+                          group_by="ticker", threads=True, progress=False, **kwargs)
+        
+        frames = {}
+        for ticker in tickers:
+            frame = self._split_ticker(raw, ticker)
+            if frame is not None and not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+    def _split_ticker(self, raw, ticker):
+        """
+        Extract a single ticker's OHLCV columns from a batched download
+        
+        Args:
+            raw (pandas.DataFrame): Result of yf.download
+            ticker (str): Ticker symbol
+            
+        Returns:
+            pandas.DataFrame: Flat OHLCV frame, or None if the ticker is missing
+        """
+        if raw is None or raw.empty:
+            return None
+        
+        columns = raw.columns
+        if isinstance(columns, pd.MultiIndex):
+            if ticker in columns.get_level_values(0):
+                frame = raw[ticker]
+            elif ticker in columns.get_level_values(1):
+                frame = raw.xs(ticker, axis=1, level=1)
+            else:
+                return None
+        else:
+            frame = raw
+        
+        # Rows that are all NaN belong to other tickers' trading days
+        return frame.dropna(how="all").copy()
+
+    def _trim(self, frame):
+        """Keep only the bars inside the lookback window"""
+        cutoff = datetime.now() - timedelta(days=self.lookback_days)
+        index = frame.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        return frame[index >= cutoff]
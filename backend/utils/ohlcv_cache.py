@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import uuid
+import pandas as pd
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import OHLCV_CACHE_DIR, OHLCV_CACHE_TTL
+
+class OHLCVCache:
+    """On-disk Parquet cache of OHLCV bars keyed by ticker and interval"""
+    def __init__(self, directory=None, ttl=None):
+        """
+        Initialize the cache
+        
+        Args:
+            directory (str): Directory holding the Parquet files
+            ttl (int): Seconds a cached series is considered fresh
+        """
+        self.directory = directory or OHLCV_CACHE_DIR
+        self.ttl = OHLCV_CACHE_TTL if ttl is None else ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, ticker, interval):
+        """Build the file path for a ticker/interval pair"""
+        slug = "".join(c if c.isalnum() else "_" for c in ticker.upper())
+        return os.path.join(self.directory, f"{slug}_{interval}.parquet")
+
+    def load(self, ticker, interval="1d"):
+        """
+        Load cached bars for a ticker
+        
+        Args:
+            ticker (str): Ticker symbol
+            interval (str): Bar interval
+            
+        Returns:
+            tuple: (DataFrame, is_fresh) or (None, False) on a miss
+        """
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return None, False
+        
+        try:
+            frame = pd.read_parquet(path)
+        except Exception as e:
+            print(f"OHLCV cache read error for {ticker}: {str(e)}")
+            return None, False
+        
+        # The file's mtime records when the series was last refreshed
+        age = time.time() - os.path.getmtime(path)
+        return frame, age < self.ttl
+
+    def save(self, ticker, frame, interval="1d"):
+        """
+        Atomically write bars for a ticker
+        
+        Args:
+            ticker (str): Ticker symbol
+            frame (pandas.DataFrame): OHLCV bars indexed by timestamp
+            interval (str): Bar interval
+        """
+        path = self._path(ticker, interval)
+        # Unique per call: two requests may refresh the same ticker at once
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            frame.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"OHLCV cache write error for {ticker}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def merge(self, cached, fresh, max_age_days=None):
+        """
+        Append newly downloaded bars to a cached series
+        
+        Args:
+            cached (pandas.DataFrame): Bars already on disk
+            fresh (pandas.DataFrame): Bars downloaded since the last cached timestamp
+            max_age_days (int): Drop bars older than this many days
+            
+        Returns:
+            pandas.DataFrame: Combined series; newer rows win on overlapping timestamps
+        """
+        if fresh is None or fresh.empty:
+            combined = cached
+        else:
+            combined = pd.concat([cached, fresh[cached.columns.intersection(fresh.columns)]])
+            combined = combined[~combined.index.duplicated(keep="last")].sort_index()
+        
+        if max_age_days:
+            cutoff = combined.index.max() - pd.Timedelta(days=max_age_days)
+            combined = combined[combined.index >= cutoff]
+        return combined
@@ -0,0 +1,354 @@
+import os
+import re
+import sys
+import time
+import asyncio
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import httpx
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (PAGE_FETCH_ENABLED, PAGE_FETCH_TIMEOUT, PAGE_FETCH_MAX_BYTES,
+                    PAGE_FETCH_MAX_CONNECTIONS, PAGE_FETCH_PER_HOST, PAGE_CACHE_TTL,
+                    PAGE_CACHE_MAX_AGE, PAGE_CACHE_MEMORY_ENTRIES, PAGE_CACHE_MAX_ENTRIES,
+                    PAGE_CACHE_MAX_BYTES)
+from utils.cache import MemoryCache, TieredCache
+from utils.state_backend import get_state_backend
+
+USER_AGENT = "Mozilla/5.0 (compatible; DeepResearchBot/1.0)"
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Elements that never hold a page's main text
+SKIP_TAGS = frozenset([
+    "script", "style", "noscript", "nav", "header", "footer", "aside", "form",
+    "svg", "iframe", "button", "select", "template", "figure"
+])
+BLOCK_TAGS = frozenset([
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "td",
+    "blockquote", "pre", "h1", "h2", "h3", "h4", "h5", "h6", "table", "dd", "dt"
+])
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "source", "track", "wbr"
+])
+# class/id values used by cookie banners, menus, share bars and the like
+BOILERPLATE_RE = re.compile(
+    r"cookie|consent|banner|menu|sidebar|share|social|comment|subscribe|newsletter|"
+    r"advert|promo|related|breadcrumb|footer|header|nav|popup|modal",
+    re.IGNORECASE
+)
+_WHITESPACE_RE = re.compile(r"[ \t\r\f\v]+")
+# Lines shorter than this are usually link lists and captions, not prose
+MIN_LINE_WORDS = 5
+# <article>/<main> text is preferred when it has at least this many characters
+MIN_MAIN_CHARS = 200
+
+class _TextExtractor(HTMLParser):
+    """Collect visible text, skipping boilerplate elements and their children"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Each entry is (tag, skipping, inside article/main)
+        self._stack = []
+        self.parts = []
+        self.main_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._newline()
+        if tag in VOID_TAGS:
+            return
+        
+        skipping, in_main = self._stack[-1][1:] if self._stack else (False, False)
+        if not skipping:
+            attributes = dict(attrs)
+            marker = f"{attributes.get('class') or ''} {attributes.get('id') or ''}"
+            skipping = tag in SKIP_TAGS or (tag not in ("body", "main", "article")
+                                            and BOILERPLATE_RE.search(marker) is not None)
+        self._stack.append((tag, skipping, in_main or tag in ("article", "main")))
+
+    def handle_endtag(self, tag):
+        if tag in BLOCK_TAGS:
+            self._newline()
+        # Pop up to the matching start tag, tolerating unclosed children
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        skipping, in_main = self._stack[-1][1:] if self._stack else (False, False)
+        if skipping:
+            return
+        self.parts.append(data)
+        if in_main:
+            self.main_parts.append(data)
+
+    def _newline(self):
+        self.parts.append("\n")
+        if self._stack and self._stack[-1][2]:
+            self.main_parts.append("\n")
+
+def _clean_lines(text):
+    """Collapse whitespace and keep prose-like lines"""
+    lines = (_WHITESPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if len(line.split()) >= MIN_LINE_WORDS)
+
+def extract_text(html):
+    """
+    Extract a page's main text, dropping navigation, ads and other boilerplate
+    
+    Args:
+        html (str): Page markup
+        
+    Returns:
+        str: Main text, one paragraph per line
+    """
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        print(f"HTML parse error: {str(e)}")
+    
+    main_text = _clean_lines("".join(parser.main_parts))
+    if len(main_text) >= MIN_MAIN_CHARS:
+        return main_text
+    return _clean_lines("".join(parser.parts))
+
+class PageFetcher:
+    """
+    Fetch and extract full page text with a pooled async HTTP client
+    
+    Requests run on a private event loop in a background thread, so the
+    synchronous agents can fetch many pages concurrently. Each host gets at
+    most per_host requests at a time. Bodies are streamed and cut off at
+    max_bytes. Extracted text is cached by URL together with the response's
+    ETag/Last-Modified, so stale entries are revalidated with a conditional
+    request instead of being downloaded again.
+    """
+    def __init__(self, cache=None, timeout=None, max_bytes=None, max_connections=None,
+                 per_host=None, ttl=None, transport=None):
+        """
+        Initialize the fetcher
+        
+        Args:
+            cache: Backing store with get/set/stats (a memory + shared state backend TieredCache by default)
+            timeout (float): Seconds allowed for one page, including the body
+            max_bytes (int): Maximum bytes read from one response
+            max_connections (int): Connection pool size
+            per_host (int): Maximum concurrent requests to one host
+            ttl (float): Seconds a fetched page is used without revalidation
+            transport (httpx.AsyncBaseTransport): Custom transport, e.g. httpx.MockTransport (optional)
+        """
+        self.timeout = PAGE_FETCH_TIMEOUT if timeout is None else timeout
+        self.max_bytes = PAGE_FETCH_MAX_BYTES if max_bytes is None else max_bytes
+        self.per_host = max(1, PAGE_FETCH_PER_HOST if per_host is None else per_host)
+        self.ttl = PAGE_CACHE_TTL if ttl is None else ttl
+        self.cache = cache or TieredCache(
+            MemoryCache(max_entries=PAGE_CACHE_MEMORY_ENTRIES, ttl=PAGE_CACHE_MAX_AGE),
+            get_state_backend().cache("pages", max_entries=PAGE_CACHE_MAX_ENTRIES,
+                                      max_bytes=PAGE_CACHE_MAX_BYTES, ttl=PAGE_CACHE_MAX_AGE)
+        )
+        
+        max_connections = PAGE_FETCH_MAX_CONNECTIONS if max_connections is None else max_connections
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,text/plain;q=0.9"},
+            follow_redirects=True,
+            transport=transport
+        )
+        self._host_limits = {}
+        self._inflight = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="page-fetcher", daemon=True)
+        self._thread.start()
+
+    def fetch(self, url):
+        """
+        Fetch one page's main text
+        
+        Returns:
+            str: Extracted text, or None if the page could not be fetched
+        """
+        return self.fetch_many([url]).get(url)
+
+    def fetch_many(self, urls):
+        """
+        Fetch several pages concurrently
+        
+        Args:
+            urls (list): Page URLs
+            
+        Returns:
+            dict: Extracted text by URL; failed pages are omitted
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(self.afetch_many(urls), self._loop)
+        try:
+            # afetch_many keeps to its own deadline; this only guards against a wedged loop
+            return future.result(timeout=self.timeout * 2 + 5)
+        except Exception as e:
+            future.cancel()
+            print(f"Page fetch error: {str(e)}")
+            return {}
+    
+    async def afetch_many(self, urls):
+        """
+        Fetch several pages concurrently (runs on the fetcher's loop)
+        
+        Pages still waiting for their host's turn when the batch deadline passes
+        are given up on, and the pages that did finish are returned.
+        
+        Returns:
+            dict: Extracted text by URL; failed and unfinished pages are omitted
+        """
+        tasks = {url: asyncio.ensure_future(self._fetch_shared(url)) for url in urls}
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.timeout * 2)
+        for task in pending:
+            task.cancel()
+        if pending:
+            print(f"Page fetch deadline passed with {len(pending)} of {len(urls)} pages unfinished")
+        return {url: task.result() for url, task in tasks.items()
+                if task in done and not task.cancelled() and task.exception() is None and task.result()}
+
+    def stats(self):
+        """
+        Get hit/miss counters
+        
+        Returns:
+            dict: Counters from the backing cache
+        """
+        return self.cache.stats()
+
+    def close(self):
+        """Close the connection pool and stop the background loop"""
+        if self._loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+        except Exception as e:
+            print(f"Page fetcher close error: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+    
+    async def _fetch_shared(self, url):
+        """Fetch a URL, joining a request already in flight for it"""
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, url):
+        """
+        Fetch a page, serving fresh cache entries and revalidating stale ones
+        
+        Returns:
+            str: Extracted text, or None on failure
+        """
+        key = f"page:{url}"
+        loop = asyncio.get_running_loop()
+        # The shared tier is SQLite or Redis; keep its round-trips off the loop
+        cached = await loop.run_in_executor(None, self.cache.get, key)
+        if cached is not None and time.time() - cached["fetched_at"] < self.ttl:
+            return cached["text"]
+        
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        host = urlsplit(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        
+        try:
+            async with limit:
+                entry = await asyncio.wait_for(self._download(url, headers, cached), self.timeout)
+        except Exception as e:
+            print(f"Page fetch failed for {url}: {type(e).__name__} {str(e)}")
+            return None
+        
+        if entry is None:
+            return None
+        await loop.run_in_executor(None, self.cache.set, key, entry)
+        return entry["text"]
+    
+    async def _download(self, url, headers, cached):
+        """
+        Stream one response body up to max_bytes and extract its text
+        
+        Returns:
+            dict: Cache entry with text, validators and fetch time, or None
+        """
+        async with self._client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached is not None:
+                return {**cached, "fetched_at": time.time()}
+            if response.status_code != 200:
+                print(f"Page fetch for {url} returned HTTP {response.status_code}")
+                return None
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in TEXT_CONTENT_TYPES:
+                return None
+            
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+            body = b"".join(chunks)[:self.max_bytes]
+            encoding = response.encoding or "utf-8"
+            validators = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified")
+            }
+        
+        markup = body.decode(encoding, errors="replace")
+        if content_type == "text/plain":
+            text = "\n".join(_WHITESPACE_RE.sub(" ", line).strip() for line in markup.splitlines() if line.strip())
+        else:
+            # Parsing is CPU-bound; keep it off the loop so other downloads keep flowing
+            text = await asyncio.get_running_loop().run_in_executor(None, extract_text, markup)
+        return {"url": url, "text": text, "fetched_at": time.time(), **validators}
+
+_page_fetcher = None
+_page_fetcher_lock = threading.Lock()
+
+def get_page_fetcher():
+    """
+    Get the process-wide page fetcher shared by all ResearchTools instances
+    
+    Returns:
+        PageFetcher: The shared fetcher, or None when page fetching is disabled
+    """
+    global _page_fetcher
+    if not PAGE_FETCH_ENABLED:
+        return None
+    with _page_fetcher_lock:
+        if _page_fetcher is None:
+            _page_fetcher = PageFetcher()
+    return _page_fetcher
+
+def shutdown_page_fetcher():
+    """Close the shared fetcher if it was created"""
+    global _page_fetcher
+    with _page_fetcher_lock:
+        if _page_fetcher is not None:
+            _page_fetcher.close()
+            # A later get_page_fetcher() starts a new fetcher instead of returning a closed one
+            _page_fetcher = None
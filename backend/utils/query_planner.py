@@ -0,0 +1,93 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Clause boundaries a multi-part question is usually split on
+_CLAUSE_RE = re.compile(r"\s*(?:[?;]|,\s*and\s+|,\s*|\s+and\s+|\s+vs\.?\s+|\s+versus\s+)\s*", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+# Query parameters that only track where a link came from
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|ref|ref_src)$", re.IGNORECASE)
+
+def decompose_query(query, max_subqueries=4, min_words=3):
+    """
+    Split a multi-part query into focused sub-queries
+    
+    The full query is always searched first. Clauses are only added when every
+    clause is long enough to stand on its own, so "Apple and Microsoft" stays
+    one search while "How did NVDA earnings change and what is the outlook for AI chips"
+    becomes three.
+    
+    Args:
+        query (str): Research query
+        max_subqueries (int): Maximum number of searches, including the full query
+        min_words (int): Minimum words per clause for a split to be used
+    
+    Returns:
+        list: Sub-queries, the full query first
+    """
+    query = query.strip()
+    clauses = [c.strip(" .,") for c in _CLAUSE_RE.split(query)]
+    clauses = [c for c in clauses if c]
+    
+    subqueries = [query]
+    if len(clauses) > 1 and all(len(_WORD_RE.findall(c)) >= min_words for c in clauses):
+        seen = {query.lower()}
+        for clause in clauses:
+            if clause.lower() not in seen:
+                seen.add(clause.lower())
+                subqueries.append(clause)
+    return subqueries[:max(1, max_subqueries)]
+
+def normalize_url(url):
+    """
+    Normalize a URL so the same page found by different searches compares equal
+    
+    Args:
+        url (str): Result URL
+    
+    Returns:
+        str: https URL with lowercased host, no fragment, no tracking parameters
+            and no trailing slash
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if not _TRACKING_PARAMS.match(k)])
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    # http and https copies of a page are the same source
+    scheme = parts.scheme.lower()
+    if scheme in ("", "http"):
+        scheme = "https"
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), query, ""))
+
+def merge_results(result_lists, limit=None):
+    """
+    Interleave several searches' results, dropping duplicate URLs
+    
+    Results are taken round-robin so every sub-query is represented before
+    any one of them contributes its lower-ranked hits.
+    
+    Args:
+        result_lists (list): One ranked result list per sub-query
+        limit (int): Maximum number of merged results (optional)
+    
+    Returns:
+        list: Merged results in interleaved rank order
+    """
+    merged = []
+    seen = set()
+    depth = max((len(results) for results in result_lists), default=0)
+    for rank in range(depth):
+        for results in result_lists:
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            url = result.get('url', '')
+            key = normalize_url(url) if url else id(result)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(result)
+            if limit is not None and len(merged) >= limit:
+                return merged
+    return merged
@@ -0,0 +1,97 @@
+import os
+import sys
+import re
+import threading
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (SEARCH_CACHE_ENABLED, SEARCH_CACHE_TTL, SEARCH_CACHE_MEMORY_ENTRIES,
+                    SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES)
+from utils.cache import MemoryCache, TieredCache
+from utils.state_backend import get_state_backend
+
+# Words that do not change what a search returns
+STOP_WORDS = frozenset([
+    "a", "an", "the", "and", "or", "of", "for", "to", "in", "on", "at", "by", "with",
+    "is", "are", "was", "were", "be", "what", "whats", "how", "me", "about", "please",
+    "tell", "show", "give", "can", "you", "i", "do", "does", "latest", "current"
+])
+
+_TOKEN_RE = re.compile(r"[a-z0-9$&.+-]+")
+
+def normalize_query(query):
+    """
+    Normalize a search query so near-identical queries share a cache entry
+    
+    Args:
+        query (str): Raw query text
+        
+    Returns:
+        str: Lowercased query without punctuation, extra whitespace or stop words
+    """
+    tokens = [t.strip(".-+") for t in _TOKEN_RE.findall(query.lower())]
+    kept = [t for t in tokens if t and t not in STOP_WORDS]
+    # A query made only of stop words still needs a distinct key
+    return " ".join(kept or tokens)
+
+class SearchCache:
+    """Cache of web search results keyed by normalized query and result count"""
+    def __init__(self, cache=None, ttl=None):
+        """
+        Initialize the search cache
+        
+        Args:
+            cache: Backing store with get/set/stats (a memory + shared state backend TieredCache by default)
+            ttl (float): Seconds a result set stays valid
+        """
+        self.ttl = SEARCH_CACHE_TTL if ttl is None else ttl
+        self.cache = cache or TieredCache(
+            MemoryCache(max_entries=SEARCH_CACHE_MEMORY_ENTRIES, ttl=self.ttl),
+            get_state_backend().cache("search", max_entries=SEARCH_CACHE_MAX_ENTRIES,
+                                      max_bytes=SEARCH_CACHE_MAX_BYTES, ttl=self.ttl)
+        )
+
+    def key(self, query, max_results):
+        """Build the cache key for a query"""
+        return f"search:{max_results}:{normalize_query(query)}"
+
+    def get(self, query, max_results):
+        """
+        Get cached results for a query
+        
+        Returns:
+            list: Cached search results, or None on a miss
+        """
+        return self.cache.get(self.key(query, max_results))
+
+    def set(self, query, max_results, results):
+        """Store search results for a query"""
+        self.cache.set(self.key(query, max_results), results)
+
+    def stats(self):
+        """
+        Get hit/miss counters
+        
+        Returns:
+            dict: Counters from the backing cache
+        """
+        return self.cache.stats()
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+def get_search_cache():
+    """
+    Get the process-wide search cache shared by all ResearchTools instances
+    
+    Returns:
+        SearchCache: The shared cache, or None when caching is disabled
+    """
+    global _search_cache
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+    return _search_cache
@@ -0,0 +1,324 @@
+import os
+import sys
+import time
+import zlib
+import sqlite3
+import threading
+
+import numpy as np
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (SOURCE_INDEX_ENABLED, SOURCE_INDEX_DIR, SOURCE_INDEX_DIM, SOURCE_INDEX_MAX_ENTRIES,
+                    SOURCE_INDEX_MAX_AGE, SOURCE_INDEX_MIN_SCORE, SOURCE_INDEX_MIN_COVERAGE)
+from utils.context_builder import tokenize_terms, bm25_scores
+from utils.entity_matcher import get_symbol_matcher
+from utils.state_backend import get_state_backend
+
+INITIAL_CAPACITY = 1024
+# Rows scored per step, so a search never holds more than one block in memory
+SCORE_BLOCK_ROWS = 8192
+# Nearest rows re-checked against their stored text per search
+CANDIDATE_POOL = 64
+
+def hash_vector(text, dim):
+    """
+    Embed text as a signed, L2-normalized hashed term-frequency vector
+    
+    Terms are hashed with CRC32 so the same text maps to the same vector in
+    every process.
+    
+    Args:
+        text (str): Text to embed
+        dim (int): Vector size
+        
+    Returns:
+        numpy.ndarray: float32 vector of length dim (all zeros for empty text)
+    """
+    terms = tokenize_terms(text)
+    vector = np.zeros(dim, dtype=np.float32)
+    if not terms:
+        return vector
+    hashes = np.fromiter((zlib.crc32(t.encode()) for t in terms), dtype=np.uint64, count=len(terms))
+    buckets = (hashes % dim).astype(np.int64)
+    signs = np.where((hashes >> 31) & 1, -1.0, 1.0)
+    np.add.at(vector, buckets, signs)
+    # Sublinear term frequency so long pages do not drown out short ones
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return (vector / norm).astype(np.float32) if norm else vector
+
+def term_coverage(terms, documents):
+    """
+    Share of the query terms each document contains, weighted by rarity
+    
+    IDF comes from the documents themselves, so terms every candidate shares
+    ("stock", "price") count for little while a missing rare term sinks the
+    document.
+    
+    Args:
+        terms (list): Distinct query terms
+        documents (list): Set of terms per document
+        
+    Returns:
+        numpy.ndarray: Coverage between 0 and 1 per document
+    """
+    if not terms:
+        return np.ones(len(documents))
+    present = np.array([[t in d for t in terms] for d in documents], dtype=bool).reshape(len(documents), len(terms))
+    df = present.sum(axis=0)
+    idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+    return present @ idf / idf.sum()
+
+class SourceIndex:
+    """
+    Persistent index of every source returned by web search
+    
+    Source metadata and text live in SQLite; vectors live in a memory-mapped
+    float32 matrix that grows by doubling, so the OS pages it in and out
+    instead of the process holding it. Once max_entries is reached the oldest
+    source's row is reused.
+    
+    Several worker processes can share one index: writes take a shared lock
+    and every operation first picks up rows and file growth from the others.
+    
+    Hashed vectors only shortlist candidates. Pages about different companies
+    share most of their vocabulary, so a source is returned only if it names
+    every company the query names and covers the query's rarer terms.
+    """
+    def __init__(self, directory=None, dim=None, max_entries=None, matcher=None):
+        """
+        Initialize the index, creating its files if needed
+        
+        Args:
+            directory (str): Directory for sources.sqlite3 and vectors.f32
+            dim (int): Vector size (changing it rebuilds the vectors)
+            max_entries (int): Maximum number of indexed sources
+            matcher (EntityMatcher): Company and ticker matcher (the shared symbol matcher by default)
+        """
+        self.directory = directory or SOURCE_INDEX_DIR
+        self.dim = dim or SOURCE_INDEX_DIM
+        self.max_entries = max_entries or SOURCE_INDEX_MAX_ENTRIES
+        self.matcher = matcher
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._lock = threading.Lock()
+        
+        self._conn = sqlite3.connect(os.path.join(self.directory, "sources.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources (url TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, "
+            "title TEXT, content TEXT, fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sources_fetched ON sources (fetched_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+        
+        with self._shared_lock():
+            self._rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM sources").fetchone()[0]
+            self._open_vectors()
+
+    def add(self, sources, fetched_at=None):
+        """
+        Insert or refresh sources
+        
+        Args:
+            sources (list): Dicts with url, title and content
+            fetched_at (float): When the sources were retrieved (now by default)
+            
+        Returns:
+            int: Number of sources indexed
+        """
+        fetched_at = fetched_at or time.time()
+        added = 0
+        with self._lock, self._shared_lock():
+            self._sync()
+            for source in sources:
+                url, content = source.get('url'), source.get('content') or ''
+                if not url or not content:
+                    continue
+                vector = hash_vector(f"{source.get('title', '')}\n{content}", self.dim)
+                row = self._row_for(url)
+                self._vectors[row] = vector
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (url, row, title, content, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, row, source.get('title', ''), content, fetched_at)
+                )
+                added += 1
+            if added:
+                self._vectors.flush()
+                self._conn.commit()
+        return added
+
+    def search(self, query, limit=5, max_age=None, min_score=None, min_coverage=None):
+        """
+        Find the indexed sources relevant to a query
+        
+        Args:
+            query (str): Search query
+            limit (int): Maximum number of results
+            max_age (float): Ignore sources retrieved more than this many seconds ago
+            min_score (float): Minimum cosine similarity to be shortlisted
+            min_coverage (float): Minimum IDF-weighted share of the query's other terms a source must contain
+            
+        Returns:
+            list: Result dicts (title, url, content, score, fetched_at), best BM25 score first
+        """
+        max_age = SOURCE_INDEX_MAX_AGE if max_age is None else max_age
+        min_score = SOURCE_INDEX_MIN_SCORE if min_score is None else min_score
+        min_coverage = SOURCE_INDEX_MIN_COVERAGE if min_coverage is None else min_coverage
+        query_vector = hash_vector(query, self.dim)
+        if not query_vector.any():
+            return []
+        
+        # Companies are matched by name or ticker; the remaining terms must appear verbatim
+        matcher = self.matcher or get_symbol_matcher()
+        spans = matcher.find_spans(query)
+        entities = set(entity for _, _, entity in spans)
+        remainder = query
+        for start, end, _ in reversed(spans):
+            remainder = remainder[:start] + " " + remainder[end:]
+        terms = list(dict.fromkeys(tokenize_terms(remainder)))
+        
+        with self._lock:
+            self._sync()
+            if not self._rows:
+                return []
+            scores = np.empty(self._rows, dtype=np.float32)
+            for start in range(0, self._rows, SCORE_BLOCK_ROWS):
+                end = min(start + SCORE_BLOCK_ROWS, self._rows)
+                scores[start:end] = self._vectors[start:end] @ query_vector
+            
+            # Over-fetch so stale and off-topic candidates can be dropped without a second pass
+            candidates = np.flatnonzero(scores >= min_score)
+            if not len(candidates):
+                return []
+            take = min(len(candidates), max(limit * 4, CANDIDATE_POOL))
+            top = candidates[np.argpartition(-scores[candidates], take - 1)[:take]]
+            
+            placeholders = ",".join("?" * len(top))
+            rows = self._conn.execute(
+                f"SELECT row, url, title, content, fetched_at FROM sources "
+                f"WHERE row IN ({placeholders}) AND fetched_at >= ?",
+                [int(r) for r in top] + [time.time() - max_age]
+            ).fetchall()
+        
+        if not rows:
+            return []
+        
+        documents = [f"{title}\n{content}" for _, _, title, content, _ in rows]
+        coverage = term_coverage(terms, [set(tokenize_terms(d)) for d in documents])
+        relevant = [i for i in np.flatnonzero(coverage >= min_coverage)
+                    if entities <= set(matcher.find(documents[i]))]
+        if not relevant:
+            return []
+        
+        bm25 = bm25_scores(query, [documents[i] for i in relevant])
+        results = [{
+            'title': rows[i][2],
+            'url': rows[i][1],
+            'content': rows[i][3],
+            'score': float(score),
+            'fetched_at': rows[i][4]
+        } for i, score in zip(relevant, bm25)]
+        results.sort(key=lambda r: r['score'], reverse=True)
+        return results[:limit]
+
+    def stats(self):
+        """
+        Get the index's size
+        
+        Returns:
+            dict: Source count, vector capacity and vector file size
+        """
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+            return {
+                "sources": count,
+                "capacity": self._capacity,
+                "vector_bytes": self._capacity * self.dim * 4,
+                "max_entries": self.max_entries
+            }
+
+    def _shared_lock(self):
+        """Lock that serializes writers across worker processes"""
+        return get_state_backend().lock("source_index")
+
+    def _sync(self):
+        """Pick up rows added and vector file growth by other workers (caller holds the lock)"""
+        self._rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM sources").fetchone()[0]
+        capacity = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        if capacity > self._capacity:
+            self._remap(capacity)
+
+    def _row_for(self, url):
+        """Pick the vector row for a URL: its own, a new one, or the oldest source's (caller holds the lock)"""
+        existing = self._conn.execute("SELECT row FROM sources WHERE url = ?", (url,)).fetchone()
+        if existing:
+            return existing[0]
+        if self._rows >= self.max_entries:
+            oldest = self._conn.execute("SELECT url, row FROM sources ORDER BY fetched_at LIMIT 1").fetchone()
+            self._conn.execute("DELETE FROM sources WHERE url = ?", (oldest[0],))
+            return oldest[1]
+        if self._rows >= self._capacity:
+            self._grow(min(self._capacity * 2, self.max_entries))
+        self._rows += 1
+        return self._rows - 1
+
+    def _open_vectors(self):
+        """Map the vector file, rebuilding it if the dimension changed"""
+        stored_dim = self._conn.execute("SELECT value FROM index_meta WHERE key = 'dim'").fetchone()
+        needed = max(INITIAL_CAPACITY, self._rows)
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        # Re-embed from the stored text if the dimension changed or the vector file was lost
+        rebuild = self._rows > 0 and (size == 0 or (stored_dim is not None and stored_dim[0] != self.dim))
+        if rebuild:
+            print(f"Rebuilding source index vectors for {self._rows} rows")
+        self._capacity = max(needed, size // (self.dim * 4)) if not rebuild else needed
+        mode = "r+" if size and not rebuild else "w+"
+        if mode == "r+" and size < self._capacity * self.dim * 4:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(self._capacity * self.dim * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode,
+                                  shape=(self._capacity, self.dim))
+        
+        if rebuild:
+            for row, title, content in self._conn.execute("SELECT row, title, content FROM sources"):
+                self._vectors[row] = hash_vector(f"{title}\n{content}", self.dim)
+            self._vectors.flush()
+        self._conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES ('dim', ?)", (self.dim,))
+        self._conn.commit()
+
+    def _grow(self, capacity):
+        """Extend the vector file and remap it (caller holds the lock)"""
+        self._remap(capacity, extend=True)
+
+    def _remap(self, capacity, extend=False):
+        """Map the vector file at a new capacity, extending the file first if asked (caller holds the lock)"""
+        self._vectors.flush()
+        del self._vectors
+        if extend:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+        self._capacity = capacity
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                  shape=(self._capacity, self.dim))
+
+_source_index = None
+_source_index_lock = threading.Lock()
+
+def get_source_index():
+    """
+    Get the process-wide source index shared by all ResearchTools instances
+    
+    Returns:
+        SourceIndex: The shared index, or None when it is disabled
+    """
+    global _source_index
+    if not SOURCE_INDEX_ENABLED:
+        return None
+    with _source_index_lock:
+        if _source_index is None:
+            _source_index = SourceIndex()
+    return _source_index
@@ -0,0 +1,193 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from contextlib import contextmanager
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.executor import run_blocking
+
+# Reference point for startup timings; main imports this module first
+PROCESS_STARTED = time.perf_counter()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Third-party packages whose import dominates cold start, reported as loaded or not
+HEAVY_MODULES = ["langchain_groq", "tavily", "yfinance", "pandas", "numpy", "matplotlib",
+                 "reportlab", "docx", "PIL", "httpx"]
+
+# "import time: <self us> | <cumulative us> | <indented module name>" lines from -X importtime
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+def record(name, seconds):
+    """
+    Record how long a startup phase or component took
+    
+    Args:
+        name (str): Phase or component name
+        seconds (float): Duration
+    """
+    with _timings_lock:
+        _timings[name] = round(seconds * 1000, 1)
+
+@contextmanager
+def timed(name):
+    """Record the duration of a block under name"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+def startup_report():
+    """
+    Get the startup timings collected in this process
+    
+    Returns:
+        dict: Millisecond timings, loaded module count and which heavy packages are imported
+    """
+    with _timings_lock:
+        timings = dict(_timings)
+    return {
+        "timings_ms": timings,
+        "uptime_s": round(time.perf_counter() - PROCESS_STARTED, 1),
+        "modules_loaded": len(sys.modules),
+        "heavy_modules": {name: name in sys.modules for name in HEAVY_MODULES}
+    }
+
+class LazyComponent:
+    """
+    An object built on first use instead of at import time
+    
+    The factory runs once even when several threads ask at the same moment;
+    later calls return the same instance without locking.
+    """
+    def __init__(self, name, factory):
+        """
+        Initialize the component
+        
+        Args:
+            name (str): Name used in startup timings
+            factory (callable): Builds the instance; heavy imports belong inside it
+        """
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Get the instance, building it on the first call
+        
+        Returns:
+            Any: The shared instance
+        """
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    with timed(f"build:{self.name}"):
+                        self._instance = self._factory()
+        return self._instance
+
+    async def aget(self):
+        """Get the instance from async code, building it off the event loop if needed"""
+        if self._instance is not None:
+            return self._instance
+        return await run_blocking(self.get)
+
+    def peek(self):
+        """Get the instance only if it has already been built"""
+        return self._instance
+
+def warm_up(components, names):
+    """
+    Build components in a background thread so the server accepts requests meanwhile
+    
+    Args:
+        components (dict): Name to LazyComponent
+        names (list): Names to build, or ["all"]
+        
+    Returns:
+        threading.Thread: The warm-up thread, or None when there is nothing to build
+    """
+    selected = list(components) if "all" in names else [n for n in names if n in components]
+    for name in names:
+        if name != "all" and name not in components:
+            print(f"Unknown warm-up component: {name}")
+    if not selected:
+        return None
+
+    def run():
+        with timed("warm_up"):
+            for name in selected:
+                try:
+                    components[name].get()
+                except Exception as e:
+                    print(f"Warm-up of {name} failed: {str(e)}")
+        print(f"Warm-up finished: {', '.join(selected)}")
+    
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def profile_imports(module="main", top=20):
+    """
+    Measure a module's import time in a fresh interpreter with -X importtime
+    
+    Args:
+        module (str): Module to import, relative to the backend directory
+        top (int): Number of packages to list
+        
+    Returns:
+        dict: Total import time and the slowest top-level packages, in milliseconds
+    """
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    completed = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    
+    packages = {}
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        # Self time summed per top-level package shows where the time really goes
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+        if name == module and len(indent) == 1:
+            total_us = int(cumulative_us)
+    
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "ok": completed.returncode == 0,
+        "error": completed.stderr.strip().splitlines()[-1] if completed.returncode else None,
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {name: round(us / 1000, 1) for name, us in slowest}
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the import time of a backend module")
+    parser.add_argument("module", nargs="?", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="Number of packages to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    
+    report = profile_imports(args.module, args.top)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        if not report["ok"]:
+            print(f"Import failed: {report['error']}")
+        print(f"import {report['module']}: {report['total_ms']:.1f} ms")
+        for name, ms in report["packages_ms"].items():
+            print(f"  {name:<30} {ms:>9.1f} ms")
@@ -0,0 +1,318 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import STATE_BACKEND, STATE_DIR, STATE_LOCK_TIMEOUT, REDIS_URL, REDIS_PREFIX
+from utils.cache import SQLiteCache
+
+# File locking differs by platform
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Optional shared backend for several hosts; SQLite files are used without it
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Seconds between attempts while waiting for a file lock
+LOCK_POLL_INTERVAL = 0.05
+# Seconds a Redis lock is held at most, so a crashed worker cannot keep it forever
+REDIS_LOCK_LEASE = 300
+
+class LockTimeout(Exception):
+    """Raised when a shared lock cannot be acquired in time"""
+
+class FileLock:
+    """
+    Lock on a file, exclusive across processes and across threads of one process
+    
+    Usable as a context manager. The lock is released by the OS if the process
+    dies, so a crashed worker never leaves it held.
+    """
+    _thread_locks = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, path, timeout=None):
+        """
+        Initialize the lock
+        
+        Args:
+            path (str): Lock file path
+            timeout (float): Seconds to wait before raising LockTimeout
+        """
+        self.path = path
+        self.timeout = STATE_LOCK_TIMEOUT if timeout is None else timeout
+        with self._thread_locks_guard:
+            self._thread_lock = self._thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+        self._file = None
+
+    def acquire(self):
+        """Wait for the lock, raising LockTimeout after the timeout"""
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise LockTimeout(f"Timed out waiting for {self.path}")
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a+b")
+            while not self._try_lock():
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"Timed out waiting for {self.path}")
+                time.sleep(LOCK_POLL_INTERVAL)
+        except BaseException:
+            self._close()
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        """Release the lock"""
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._close()
+            self._thread_lock.release()
+
+    def _try_lock(self):
+        """Try once to take the OS-level lock"""
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+class SQLiteStateBackend:
+    """
+    Shared state in SQLite files and file locks
+    
+    Every worker process on the host opens the same files, so caches, job
+    records and locks are shared by `uvicorn --workers N` without extra
+    services. Replicas on other hosts need a shared volume or RedisStateBackend.
+    """
+    name = "sqlite"
+
+    def __init__(self, directory=None):
+        """
+        Initialize the backend
+        
+        Args:
+            directory (str): Directory for the database and lock files
+        """
+        self.directory = directory or STATE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def cache(self, namespace, max_entries=10000, max_bytes=None, ttl=None):
+        """
+        Get a shared key/value cache
+        
+        Args:
+            namespace (str): Cache name, one SQLite file each
+            max_entries (int): Maximum number of entries kept
+            max_bytes (int): Maximum total size of the stored values (optional)
+            ttl (float): Seconds an entry stays valid (None for no expiry)
+            
+        Returns:
+            SQLiteCache: Cache with get/set/delete/clear
+        """
+        return SQLiteCache(os.path.join(self.directory, f"{namespace}.sqlite3"),
+                           max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+    def lock(self, name, timeout=None):
+        """
+        Get a lock shared by every worker
+        
+        Args:
+            name (str): Lock name
+            timeout (float): Seconds to wait before raising LockTimeout
+            
+        Returns:
+            FileLock: Context manager holding the lock
+        """
+        filename = re.sub(r"[^\w.-]", "_", name)
+        return FileLock(os.path.join(self.directory, "locks", f"{filename}.lock"), timeout)
+
+class RedisCache:
+    """
+    Key/value cache in Redis with the same interface as SQLiteCache
+    
+    Entries expire through Redis TTLs. Entry and byte limits are left to the
+    server's maxmemory policy (allkeys-lru is recommended).
+    """
+    def __init__(self, client, namespace, ttl=None):
+        """
+        Initialize the cache
+        
+        Args:
+            client (redis.Redis): Connected client
+            namespace (str): Key prefix separating this cache from others
+            ttl (float): Seconds an entry stays valid (None for no expiry)
+        """
+        self.client = client
+        self.prefix = f"{REDIS_PREFIX}:{namespace}:"
+        self.ttl = ttl
+
+    def get(self, key):
+        """
+        Get a value
+        
+        Returns:
+            Any: The cached value, or None on a miss or expiry
+        """
+        payload = self.client.get(self.prefix + key)
+        return json.loads(payload) if payload is not None else None
+
+    def set(self, key, value, size=None, ttl=None):
+        """
+        Store a JSON-serializable value
+        
+        Args:
+            key (str): Cache key
+            value (Any): JSON-serializable value
+            size (int): Ignored, Redis accounts for memory itself
+            ttl (float): Per-entry TTL overriding the cache default
+        """
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value, default=str),
+                        px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        """Remove a key if present"""
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        """Remove every entry of this namespace"""
+        batch = []
+        for key in self.client.scan_iter(match=self.prefix + "*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*", count=1000))
+
+class RedisLock:
+    """Redis lock that raises LockTimeout like FileLock"""
+    def __init__(self, lock, name):
+        self._lock = lock
+        self.name = name
+
+    def __enter__(self):
+        if not self._lock.acquire():
+            raise LockTimeout(f"Timed out waiting for lock {self.name}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._lock.release()
+        except Exception as e:
+            # The lease ran out while the lock was held; another worker may own it now
+            print(f"Lock {self.name} release error: {str(e)}")
+
+class RedisStateBackend:
+    """Shared state in Redis (or a Redis-compatible server) for workers on several hosts"""
+    name = "redis"
+
+    def __init__(self, url=None):
+        """
+        Connect to the server
+        
+        Args:
+            url (str): Redis URL such as redis://host:6379/0
+            
+        Raises:
+            RuntimeError: If the redis package is not installed
+        """
+        if redis is None:
+            raise RuntimeError("The redis package is not installed")
+        self.url = url or REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.client.ping()
+
+    def cache(self, namespace, max_entries=10000, max_bytes=None, ttl=None):
+        """
+        Get a shared key/value cache
+        
+        Args:
+            namespace (str): Cache name, used as a key prefix
+            max_entries (int): Unused, see RedisCache
+            max_bytes (int): Unused, see RedisCache
+            ttl (float): Seconds an entry stays valid (None for no expiry)
+            
+        Returns:
+            RedisCache: Cache with get/set/delete/clear
+        """
+        return RedisCache(self.client, namespace, ttl=ttl)
+
+    def lock(self, name, timeout=None):
+        """
+        Get a lock shared by every worker on every host
+        
+        Args:
+            name (str): Lock name
+            timeout (float): Seconds to wait before raising LockTimeout
+            
+        Returns:
+            RedisLock: Context manager holding the lock
+        """
+        timeout = STATE_LOCK_TIMEOUT if timeout is None else timeout
+        return RedisLock(self.client.lock(f"{REDIS_PREFIX}:lock:{name}", timeout=REDIS_LOCK_LEASE,
+                                          blocking_timeout=timeout), name)
+
+_state_backend = None
+_state_backend_lock = threading.Lock()
+
+def get_state_backend():
+    """
+    Get the process-wide state backend selected by STATE_BACKEND
+    
+    Falls back to SQLite when Redis is selected but unavailable, so a missing
+    server degrades to per-host sharing instead of failing requests.
+    
+    Returns:
+        SQLiteStateBackend or RedisStateBackend: The shared backend
+    """
+    global _state_backend
+    with _state_backend_lock:
+        if _state_backend is None:
+            if STATE_BACKEND == "redis":
+                try:
+                    _state_backend = RedisStateBackend()
+                except Exception as e:
+                    print(f"Redis state backend unavailable, using SQLite: {str(e)}")
+            elif STATE_BACKEND != "sqlite":
+                print(f"Unknown STATE_BACKEND {STATE_BACKEND!r}, using SQLite")
+            if _state_backend is None:
+                _state_backend = SQLiteStateBackend()
+    return _state_backend
@@ -1,16 +1,33 @@
 import os
 import sys
+import math
+from concurrent.futures import ThreadPoolExecutor
 from tavily import TavilyClient
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config import TAVILY_API_KEY, MAX_RESEARCH_RESULTS
+from config import (TAVILY_API_KEY, MAX_RESEARCH_RESULTS, SEARCH_FANOUT_CONCURRENCY,
+                    PAGE_CONTENT_MAX_CHARS, SOURCE_INDEX_COVERAGE)
+from utils.search_cache import get_search_cache
+from utils.page_fetcher import get_page_fetcher
+from utils.source_index import get_source_index
+from utils.query_planner import merge_results
 
 class ResearchTools:
-    def __init__(self):
-        """Initialize research tools with API clients"""
+    def __init__(self, cache=None, page_fetcher=None, index=None):
+        """
+        Initialize research tools with API clients
+        
+        Args:
+            cache (SearchCache): Search result cache (the shared cache by default)
+            page_fetcher (PageFetcher): Full page fetcher (the shared fetcher by default)
+            index (SourceIndex): Local index of collected sources (the shared index by default)
+        """
         self.tavily = TavilyClient(api_key=TAVILY_API_KEY)
+        self.cache = cache if cache is not None else get_search_cache()
+        self.page_fetcher = page_fetcher if page_fetcher is not None else get_page_fetcher()
+        self.index = index if index is not None else get_source_index()
 
     def web_search(self, query, max_results=None):
         """
@@ -26,25 +43,119 @@ class ResearchTools:
         try:
             if max_results is None:
                 max_results = MAX_RESEARCH_RESULTS
+            
+            if self.cache is not None:
+                cached = self.cache.get(query, max_results)
+                if cached is not None:
+                    print(f"Search cache hit: {query}")
+                    return cached
+            
+            local = self.search_local(query, max_results)
+            if local is not None:
+                return local
                 
             results = self.tavily.search(query, max_results=max_results)
-            return results.get('results', [])
+            results = results.get('results', [])
+            
+            # Only successful, non-empty searches are worth remembering
+            if results and self.cache is not None:
+                self.cache.set(query, max_results, results)
+            return results
         except Exception as e:
             print(f"Web search error: {str(e)}")
             return []
 
+    def search_local(self, query, max_results):
+        """
+        Answer a search from the local source index when it covers the query
+        
+        Args:
+            query (str): Search query
+            max_results (int): Number of results wanted
+            
+        Returns:
+            list: Fresh, relevant indexed sources, or None if there are too few
+        """
+        if self.index is None:
+            return None
+        try:
+            hits = self.index.search(query, limit=max_results)
+        except Exception as e:
+            print(f"Source index search error: {str(e)}")
+            return None
+        
+        if len(hits) < max(1, math.ceil(max_results * SOURCE_INDEX_COVERAGE)):
+            return None
+        print(f"Source index hit: {query} ({len(hits)} sources)")
+        # Indexed content is already full page text, so it must not be fetched or re-indexed as new
+        return [{**hit, 'indexed': True} for hit in hits]
+
+    def fanout_search(self, queries, max_results=None, limit=None, concurrency=None):
+        """
+        Search several sub-queries concurrently and merge their results
+        
+        Args:
+            queries (list): Sub-queries to search
+            max_results (int): Maximum number of results per sub-query
+            limit (int): Maximum number of merged results (optional)
+            concurrency (int): Maximum searches in flight for this call
+            
+        Returns:
+            list: Results deduplicated by URL, interleaved across sub-queries
+        """
+        if len(queries) == 1:
+            return merge_results([self.web_search(queries[0], max_results)], limit)
+        
+        if concurrency is None:
+            concurrency = SEARCH_FANOUT_CONCURRENCY
+        # A pool per call caps this request's searches without competing with other requests
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(queries))),
+                                thread_name_prefix="search") as pool:
+            result_lists = list(pool.map(lambda q: self.web_search(q, max_results), queries))
+        
+        print(f"Fan-out search: {len(queries)} sub-queries, "
+              f"{sum(len(r) for r in result_lists)} results")
+        return merge_results(result_lists, limit)
+
     def extract_key_information(self, results):
         """
         Extract and format key information from search results
         
+        Result pages are fetched concurrently when page fetching is enabled; a
+        page that cannot be fetched falls back to its search snippet.
+        
         Args:
             results (list): Raw search results
             
         Returns:
             list: Formatted search results
         """
-        return [{
-            'title': r.get('title', ''),
-            'url': r.get('url', ''),
-            'content': r.get('content', '')[:500] + '...' if r.get('content') else ''
-        } for r in results] 
\ No newline at end of file
+        pages = {}
+        if self.page_fetcher is not None:
+            pages = self.page_fetcher.fetch_many([r.get('url') for r in results if not r.get('indexed')])
+        
+        formatted = []
+        fresh = []
+        for r in results:
+            page = pages.get(r.get('url'))
+            if r.get('indexed'):
+                content = r.get('content', '')[:PAGE_CONTENT_MAX_CHARS]
+            elif page:
+                content = page[:PAGE_CONTENT_MAX_CHARS] + ('...' if len(page) > PAGE_CONTENT_MAX_CHARS else '')
+            else:
+                content = r.get('content', '')[:500] + '...' if r.get('content') else ''
+            formatted.append({
+                'title': r.get('title', ''),
+                'url': r.get('url', ''),
+                'content': content
+            })
+            if not r.get('indexed'):
+                fresh.append({**formatted[-1], 'content': (page or r.get('content', ''))[:PAGE_CONTENT_MAX_CHARS]})
+        
+        # Remember what the web returned so later queries can be answered locally
+        if self.index is not None and fresh:
+            try:
+                self.index.add(fresh)
+            except Exception as e:
+                print(f"Source index insert error: {str(e)}")
+        return formatted 
\ No newline at end of file
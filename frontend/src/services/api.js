@@ -23,6 +23,86 @@ export const conductResearch = async (query, searchType = 'normal', siteCount =
   }
 };
 
+// Stream research results as server-sent events.
+// handlers: { onSources, onImages, onToken, onDone, onError }; pass an AbortSignal to cancel.
+export const streamResearch = async (query, searchType = 'normal', siteCount = 5, handlers = {}, signal) => {
+  const result = { result: '', sources: [], images: [] };
+
+  const handleEvent = (event, data) => {
+    switch (event) {
+      case 'sources':
+        result.sources = data;
+        handlers.onSources?.(data);
+        break;
+      case 'images':
+        result.images = data;
+        handlers.onImages?.(data);
+        break;
+      case 'token':
+        result.result += data.text;
+        handlers.onToken?.(data.text, result.result);
+        break;
+      case 'done':
+        handlers.onDone?.(result);
+        break;
+      case 'error':
+        handlers.onError?.(data.detail);
+        throw data.detail || 'Research failed';
+      default:
+        break;
+    }
+  };
+
+  try {
+    const response = await fetch(`${api.defaults.baseURL}/query/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({
+        query,
+        search_type: searchType,
+        site_count: siteCount
+      }),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Research stream failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        let event = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach((line) => {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (data) handleEvent(event, JSON.parse(data));
+      }
+    }
+    return result;
+  } catch (error) {
+    if (error?.name === 'AbortError') {
+      return result;
+    }
+    console.error('Research stream error:', error);
+    throw error?.message || error || 'Research failed';
+  }
+};
+
 export const exportReport = async (content, images, format = 'pdf') => {
   try {
     const response = await api.post('/export', { 
@@ -37,6 +117,42 @@ export const exportReport = async (content, images, format = 'pdf') => {
   }
 };
 
+// Render the report in memory on the server and receive the file directly
+export const downloadReport = async (content, images, format = 'pdf') => {
+  try {
+    const response = await api.post('/export/download', {
+      content,
+      images,
+      format
+    }, { responseType: 'blob' });
+    const disposition = response.headers['content-disposition'] || '';
+    const match = disposition.match(/filename="([^"]+)"/);
+    return {
+      blob: response.data,
+      filename: match ? match[1] : `report.${format}`
+    };
+  } catch (error) {
+    console.error('Download API error:', error);
+    throw error.response?.data?.detail || error.message || 'Download failed';
+  }
+};
+
+// Export several formats at once; with archive=true the server returns one zip
+export const exportBatch = async (content, images, formats = ['pdf', 'docx', 'html'], archive = false) => {
+  try {
+    const response = await api.post('/export/batch', {
+      content,
+      images,
+      formats,
+      archive
+    }, archive ? { responseType: 'blob' } : undefined);
+    return response.data;
+  } catch (error) {
+    console.error('Batch export API error:', error);
+    throw error.response?.data?.detail || error.message || 'Export failed';
+  }
+};
+
 export const getImages = async () => {
   try {
     const response = await api.get('/images');
@@ -49,6 +165,9 @@ export const getImages = async () => {
 
 export default {
   conductResearch,
+  streamResearch,
   exportReport,
+  downloadReport,
+  exportBatch,
   getImages
 }; 
\ No newline at end of file